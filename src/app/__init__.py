@@ -1,18 +1,23 @@
 import os
-from flask import Flask, send_from_directory
+import click
+from flask import Flask
 from flask_cors import CORS
+from pymongo.errors import PyMongoError
 
 from app.config import Config
 from app.routes import session_route
 from app.routes import game_route
 
-from app.extensions import mongo
+from app.extensions import storage, game_cache, events, compression, static_files
+from app.extensions.json_provider import GameJSONProvider
+from app.models.indexes import ensure_indexes, get_index_report
 
 
 def create_app(config_override=None):
     static_folder = os.getenv("STATIC_PATH", "static")
 
     app = Flask(__name__, static_folder=static_folder)
+    app.json = GameJSONProvider(app)
     CORS(app)
     app.config.from_object(Config)
 
@@ -21,21 +26,59 @@ def create_app(config_override=None):
         app.config.update(config_override)
 
     # Initialize extensions
-    mongo.init_app(app)
+    storage.init_app(app)
+    game_cache.init_app(app, storage)
+    events.init_app(app)
+    compression.init_app(app)
+    static_files.init_app(app)
+
+    # Create missing indexes and report on existing ones
+    if app.config['ENSURE_INDEXES']:
+        apply_indexes(app)
+
+    @app.cli.command('ensure-indexes')
+    def ensure_indexes_command():
+        """Create missing indexes and report missing or unused indexes."""
+        report = apply_indexes(app)
+
+        for report_type, index_names in report.items():
+            click.echo(f"{report_type}: {', '.join(index_names) or 'none'}")
 
     # Register blueprints
     app.register_blueprint(session_route, url_prefix='/session')
     app.register_blueprint(game_route, url_prefix='/game')
 
-    # Serve the Vue app
+    # Serve the Vue app from the static manifest, unknown paths get index.html
     @app.route("/", defaults={"path": ""})
     @app.route("/<path:path>")
     def serve_vue_app(path):
-        if app.static_folder and path:
-            file_path = os.path.join(app.static_folder, path)
-            if os.path.exists(file_path):
-                return send_from_directory(app.static_folder, path)
-
-        return send_from_directory(app.static_folder, "index.html")
+        return static_files.send(path)
 
     return app
+
+
+def apply_indexes(app):
+    """
+    Create the registered indexes and log any that are missing or unused.
+
+    The app still starts if the database cannot be reached.
+
+    :return: The index report, empty if the database could not be reached.
+    """
+    try:
+        ensure_indexes(storage.db)
+        report = get_index_report(storage.db)
+    except PyMongoError as e:
+        app.logger.warning(f"Could not apply database indexes: {e}")
+        return {}
+
+    for index_name in report['missing']:
+        app.logger.warning(f"Missing index: {index_name}")
+
+    for index_name in report['unregistered']:
+        app.logger.info(f"Index not in registry: {index_name}")
+
+    for index_name in report['unused']:
+        app.logger.info(f"Unused index: {index_name}")
+
+    return report
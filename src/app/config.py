@@ -5,12 +5,92 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your_secret_key')
     MONGO_URI = os.environ.get(
         'MONGO_URI', 'mongodb://localhost:27017/ava')
+
+    # 'mongo', 'memory' or 'sqlite', see extensions/storage.py
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')
+    SQLITE_PATH = os.environ.get('SQLITE_PATH', 'ava.sqlite3')
+
     DEBUG = False
     TESTING = False
 
+    # 'split' stores sessions and game states in separate collections,
+    # 'embedded' stores the game state inside its session document so both
+    # are read and written in one round-trip, and atomically. In 'split' mode a
+    # session update is undone if its game state update conflicts. Applies to new games.
+    GAME_STORAGE_MODE = os.environ.get('GAME_STORAGE_MODE', 'split')
+
+    # 'dict' stores game states as GameState.to_dict, 'compact' stores them with
+    # short keys, positional units and territory indices (see models/game_state_codec.py).
+    # Applies to new games, existing games keep their format.
+    GAME_STATE_FORMAT = os.environ.get('GAME_STATE_FORMAT', 'dict')
+    # Store identical units as counts, see models/unit_stacks.py. Applies to new games.
+    GAME_STATE_UNIT_STACKS = os.environ.get(
+        'GAME_STATE_UNIT_STACKS', 'false').lower() == 'true'
+
+    # Create the registered indexes when the app starts (see models/indexes.py)
+    ENSURE_INDEXES = os.environ.get(
+        'ENSURE_INDEXES', 'true').lower() == 'true'
+
+    # Log every game action and snapshot the game every N actions
+    ACTION_LOG_ENABLED = os.environ.get(
+        'ACTION_LOG_ENABLED', 'true').lower() == 'true'
+    ACTION_LOG_SNAPSHOT_INTERVAL = int(
+        os.environ.get('ACTION_LOG_SNAPSHOT_INTERVAL', 50))
+
+    # Per-worker cache of loaded games, see extensions/game_cache.py
+    GAME_CACHE_ENABLED = os.environ.get(
+        'GAME_CACHE_ENABLED', 'false').lower() == 'true'
+    GAME_CACHE_MAX_ENTRIES = int(os.environ.get('GAME_CACHE_MAX_ENTRIES', 100))
+    GAME_CACHE_MEMORY_BUDGET = int(
+        os.environ.get('GAME_CACHE_MEMORY_BUDGET', 64 * 1024 * 1024))
+    GAME_CACHE_TTL = float(os.environ.get('GAME_CACHE_TTL', 300))
+    # Hold writes and send them at most GAME_CACHE_MAX_STALENESS seconds later.
+    # GET /session and GET /game send a game's held writes before reading it.
+    # Other direct reads of the db may be behind by up to the staleness window.
+    GAME_CACHE_WRITE_BEHIND = os.environ.get(
+        'GAME_CACHE_WRITE_BEHIND', 'false').lower() == 'true'
+    GAME_CACHE_MAX_STALENESS = float(
+        os.environ.get('GAME_CACHE_MAX_STALENESS', 2))
+
+    # Game event streams (GET /game/<id>/events) check the stored versions every
+    # EVENTS_HEARTBEAT seconds and end after EVENTS_STREAM_TIMEOUT, clients reconnect.
+    # Each open stream holds a worker thread for up to EVENTS_STREAM_TIMEOUT, so streams
+    # are off by default and clients poll. Only enable them (and VITE_EVENTS_ENABLED in
+    # the UI build) when serving with threaded or async workers, without GAME_CACHE_ENABLED
+    # which expects one request at a time per worker.
+    EVENTS_ENABLED = os.environ.get(
+        'EVENTS_ENABLED', 'false').lower() == 'true'
+    EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', 15))
+    EVENTS_STREAM_TIMEOUT = float(os.environ.get('EVENTS_STREAM_TIMEOUT', 300))
+    EVENTS_MAX_QUEUED = int(os.environ.get('EVENTS_MAX_QUEUED', 100))
+
+    # Compress API responses of at least COMPRESS_MIN_SIZE bytes, with brotli if
+    # installed or gzip. Static files are precompressed by scripts/precompress_static.py
+    COMPRESS_ENABLED = os.environ.get(
+        'COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+
+    # Seconds browsers cache static files without a hashed name, ex. the map geojson.
+    # Hashed assets are cached as immutable and index.html is always revalidated.
+    STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 86400))
+
+    # Check the incrementally kept player totals and unit index against a full scan
+    # after every action (see models/player_aggregates.py and models/unit_index.py),
+    # raises if they differ
+    CHECK_GAME_INDEXES = os.environ.get(
+        'CHECK_GAME_INDEXES', 'false').lower() == 'true'
+
+    # Most actions accepted by one POST /game/<id>/actions request
+    BATCH_ACTIONS_MAX = int(os.environ.get('BATCH_ACTIONS_MAX', 100))
+
+    # Times a route is retried when another request updated the game first
+    VERSION_CONFLICT_RETRIES = int(
+        os.environ.get('VERSION_CONFLICT_RETRIES', 3))
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    CHECK_GAME_INDEXES = True
 
 
 class ProductionConfig(Config):
@@ -1,3 +1,14 @@
 from flask_pymongo import PyMongo
 
+from app.extensions.compression import Compression
+from app.extensions.events import EventBroker
+from app.extensions.game_cache import GameCache
+from app.extensions.static_files import StaticFiles
+from app.extensions.storage import Storage
+
 mongo = PyMongo()  # Create an uninitialized instance
+storage = Storage(mongo)
+game_cache = GameCache()
+events = EventBroker()
+compression = Compression()
+static_files = StaticFiles()
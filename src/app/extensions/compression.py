@@ -0,0 +1,88 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css',
+                          'text/javascript', 'application/javascript'}
+
+# added to the ETag of a compressed response, it is a different representation
+ENCODING_ETAG_SUFFIXES = {'br': '-br', 'gzip': '-gz'}
+
+# precompressed static file extensions, see scripts/precompress_static.py and StaticFiles
+PRECOMPRESSED_EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+
+def get_accepted_encodings():
+    """
+    :return: The encodings the client accepts that are available, preferred first.
+    """
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    return [encoding for encoding in encodings
+            if request.accept_encodings.quality(encoding) > 0]
+
+
+class Compression:
+    """
+    Compresses API responses of at least COMPRESS_MIN_SIZE bytes with brotli
+    (when installed) or gzip, as accepted by the client.
+
+    Streamed responses (event streams) and files are not compressed here,
+    static files are precompressed at build time and served by StaticFiles.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 5
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 5)
+
+        if self.enabled:
+            app.after_request(self.compress_response)
+
+    def compress_response(self, response):
+        if (response.direct_passthrough or response.is_streamed
+                or not 200 <= response.status_code < 300
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if response.content_length is not None and response.content_length < self.min_size:
+            return response
+
+        encodings = get_accepted_encodings()
+
+        if not encodings:
+            return response
+
+        encoding = encodings[0]
+        data = response.get_data()
+
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(etag + ENCODING_ETAG_SUFFIXES[encoding], weak)
+
+        return response
+
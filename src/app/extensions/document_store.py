@@ -0,0 +1,442 @@
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+"""
+Document databases that stand in for MongoDB, for tests and single-process deployments.
+
+They implement the part of the pymongo collection API the models use: equality,
+$in, $ne, $gt(e), $lt(e) and $exists filters on dotted paths, $set, $unset and $inc
+updates, include or exclude projections, sorting and unique indexes.
+Documents are copied in and out, like a round-trip through the db.
+
+MemoryDatabase keeps the documents in the process and loses them on exit.
+SQLiteDatabase stores them as JSON in a SQLite file, keyed by session_id.
+
+"""
+
+_MISSING = object()
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class UpdateResult:
+    def __init__(self, matched_count, modified_count, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+
+class DeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+
+def get_path(document, path):
+    """
+    Get the value at a dotted path, or _MISSING.
+    """
+    value = document
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+
+    return value
+
+
+def set_path(document, path, value):
+    keys = path.split('.')
+    for key in keys[:-1]:
+        document = document.setdefault(key, {})
+
+    document[keys[-1]] = value
+
+
+def unset_path(document, path):
+    keys = path.split('.')
+    for key in keys[:-1]:
+        document = document.get(key)
+        if not isinstance(document, dict):
+            return
+
+    document.pop(keys[-1], None)
+
+
+def matches_condition(value, condition):
+    if not isinstance(condition, dict) or not any(key.startswith('$') for key in condition):
+        # a missing field matches None
+        return (None if value is _MISSING else value) == condition
+
+    for operator, operand in condition.items():
+        if operator == '$in':
+            matched = (None if value is _MISSING else value) in operand
+        elif operator == '$ne':
+            matched = (None if value is _MISSING else value) != operand
+        elif operator == '$exists':
+            matched = (value is not _MISSING) == bool(operand)
+        elif operator in ('$gt', '$gte', '$lt', '$lte'):
+            if value is _MISSING or value is None:
+                return False
+            matched = {'$gt': value > operand, '$gte': value >= operand,
+                       '$lt': value < operand, '$lte': value <= operand}[operator]
+        else:
+            raise ValueError(f"Unsupported query operator {operator}")
+
+        if not matched:
+            return False
+
+    return True
+
+
+def matches_filter(document, query):
+    return all(matches_condition(get_path(document, path), condition)
+               for path, condition in query.items())
+
+
+def apply_update(document, update):
+    """
+    Apply $set, $unset and $inc operations to a document in place.
+    """
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            if operator == '$set':
+                set_path(document, path, deepcopy(value))
+            elif operator == '$unset':
+                unset_path(document, path)
+            elif operator == '$inc':
+                current = get_path(document, path)
+                set_path(document, path,
+                         value if current is _MISSING else current + value)
+            else:
+                raise ValueError(f"Unsupported update operator {operator}")
+
+
+def apply_projection(document, projection):
+    if not projection:
+        return document
+
+    projection = dict(projection)
+    include_id = projection.pop('_id', 1)
+
+    if any(projection.values()):
+        result = {}
+        if include_id and '_id' in document:
+            result['_id'] = document['_id']
+
+        for path in projection:
+            value = get_path(document, path)
+            if value is not _MISSING:
+                set_path(result, path, value)
+
+        return result
+
+    for path in projection:
+        unset_path(document, path)
+
+    if not include_id:
+        document.pop('_id', None)
+
+    return document
+
+
+class DocumentCollection:
+    """
+    Base collection, subclasses store the documents.
+    """
+
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.indexes = OrderedDict()
+        self.index_ops = {}
+
+    # storage, implemented by subclasses
+
+    def _load_documents(self, query):
+        """
+        :return: Iterable of stored documents that may match the query, in insertion order.
+        """
+        raise NotImplementedError
+
+    def _save_document(self, document):
+        raise NotImplementedError
+
+    def _delete_document(self, document_id):
+        raise NotImplementedError
+
+    # pymongo api
+
+    def find(self, filter=None, projection=None, sort=None):
+        filter = filter or {}
+        with self.database.lock:
+            self._record_index_use(filter)
+            documents = [deepcopy(document) for document in self._load_documents(filter)
+                         if matches_filter(document, filter)]
+
+        for key, direction in reversed(sort or []):
+            documents.sort(key=lambda document: get_path(document, key),
+                           reverse=direction < 0)
+
+        return [apply_projection(document, projection) for document in documents]
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        documents = self.find(filter, projection, sort)
+        return documents[0] if documents else None
+
+    def insert_one(self, document):
+        # like pymongo, the inserted document gets its _id
+        document.setdefault('_id', str(ObjectId()))
+
+        with self.database.lock:
+            self._check_unique(document)
+            self._save_document(deepcopy(document))
+
+        return InsertOneResult(document['_id'])
+
+    def update_one(self, filter, update, upsert=False):
+        with self.database.lock:
+            document = self._find_stored(filter)
+
+            if document is None:
+                if not upsert:
+                    return UpdateResult(0, 0)
+
+                document = {path: value for path, value in filter.items()
+                            if not isinstance(value, dict)}
+                apply_update(document, update)
+                return UpdateResult(0, 0, self.insert_one(document).inserted_id)
+
+            apply_update(document, update)
+            self._save_document(document)
+
+        return UpdateResult(1, 1)
+
+    def replace_one(self, filter, replacement, upsert=False):
+        with self.database.lock:
+            document = self._find_stored(filter)
+
+            if document is None:
+                if not upsert:
+                    return UpdateResult(0, 0)
+
+                return UpdateResult(0, 0, self.insert_one(deepcopy(replacement)).inserted_id)
+
+            replacement = deepcopy(replacement)
+            replacement['_id'] = document['_id']
+            self._save_document(replacement)
+
+        return UpdateResult(1, 1)
+
+    def find_one_and_update(self, filter, update, projection=None, return_document=False):
+        """
+        :param return_document: ReturnDocument.AFTER (True) to return the updated document.
+        """
+        with self.database.lock:
+            document = self._find_stored(filter)
+
+            if document is None:
+                return None
+
+            before = deepcopy(document)
+            apply_update(document, update)
+            self._save_document(document)
+
+        return apply_projection(deepcopy(document) if return_document else before, projection)
+
+    def bulk_update(self, writes):
+        """
+        Apply (filter, update) pairs in order, stopping at the first that does not match.
+
+        :return: Number of matched writes.
+        """
+        matched_count = 0
+
+        with self.database.lock:
+            for query, update in writes:
+                if not self.update_one(query, update).matched_count:
+                    break
+                matched_count += 1
+
+        return matched_count
+
+    def delete_one(self, filter):
+        with self.database.lock:
+            document = self._find_stored(filter)
+
+            if document is None:
+                return DeleteResult(0)
+
+            self._delete_document(document['_id'])
+
+        return DeleteResult(1)
+
+    def delete_many(self, filter):
+        with self.database.lock:
+            document_ids = [document['_id'] for document in self._load_documents(filter)
+                            if matches_filter(document, filter)]
+
+            for document_id in document_ids:
+                self._delete_document(document_id)
+
+        return DeleteResult(len(document_ids))
+
+    def create_indexes(self, indexes):
+        """
+        :param indexes: List of pymongo IndexModel.
+        :return: The index names.
+        """
+        with self.database.lock:
+            for index in indexes:
+                document = index.document
+                self.indexes[document['name']] = document
+                self.index_ops.setdefault(document['name'], 0)
+
+        return [index.document['name'] for index in indexes]
+
+    def index_information(self):
+        information = {'_id_': {'key': [('_id', 1)]}}
+        for name, document in self.indexes.items():
+            information[name] = {'key': list(document['key'].items()),
+                                 'unique': document.get('unique', False)}
+
+        return information
+
+    def aggregate(self, pipeline):
+        """
+        Only supports [{'$indexStats': {}}], counting the queries filtering on each
+        index's first key.
+        """
+        if pipeline != [{'$indexStats': {}}]:
+            raise ValueError("Only $indexStats is supported")
+
+        return [{'name': name, 'accesses': {'ops': ops}}
+                for name, ops in self.index_ops.items()]
+
+    def _find_stored(self, filter):
+        self._record_index_use(filter)
+
+        for document in self._load_documents(filter):
+            if matches_filter(document, filter):
+                return deepcopy(document)
+
+        return None
+
+    def _record_index_use(self, filter):
+        for name, document in self.indexes.items():
+            if next(iter(document['key'])) in filter:
+                self.index_ops[name] += 1
+
+    def _check_unique(self, document):
+        for name, index in self.indexes.items():
+            if not index.get('unique'):
+                continue
+
+            key = {path: get_path(document, path) for path in index['key']}
+            key = {path: None if value is _MISSING else value
+                   for path, value in key.items()}
+
+            if any(matches_filter(existing, key) for existing in self._load_documents(key)):
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.name} index: {name}")
+
+
+class DocumentDatabase:
+    collection_class = DocumentCollection
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.collections = {}
+
+    def __getitem__(self, name):
+        with self.lock:
+            if name not in self.collections:
+                self.collections[name] = self.collection_class(self, name)
+
+            return self.collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        return self[name]
+
+
+class MemoryCollection(DocumentCollection):
+    def __init__(self, database, name):
+        super().__init__(database, name)
+        self.documents = OrderedDict()
+
+    def _load_documents(self, query):
+        return list(self.documents.values())
+
+    def _save_document(self, document):
+        self.documents[document['_id']] = document
+
+    def _delete_document(self, document_id):
+        self.documents.pop(document_id, None)
+
+
+class MemoryDatabase(DocumentDatabase):
+    collection_class = MemoryCollection
+
+
+class SQLiteCollection(DocumentCollection):
+    """
+    Stores each document as JSON, with its session_id in an indexed column
+    so queries on a session only decode that session's documents.
+    """
+
+    def _load_documents(self, query):
+        session_id = query.get('session_id')
+
+        if session_id is None or isinstance(session_id, dict):
+            rows = self.database.connection.execute(
+                'SELECT data FROM documents WHERE collection = ? ORDER BY rowid',
+                (self.name,))
+        else:
+            rows = self.database.connection.execute(
+                'SELECT data FROM documents WHERE collection = ? AND session_id = ? ORDER BY rowid',
+                (self.name, session_id))
+
+        return [json.loads(data) for data, in rows.fetchall()]
+
+    def _save_document(self, document):
+        with self.database.connection:
+            self.database.connection.execute(
+                'INSERT INTO documents (collection, id, session_id, data) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (collection, id) DO UPDATE SET '
+                'session_id = excluded.session_id, data = excluded.data',
+                (self.name, document['_id'], document.get('session_id'),
+                 json.dumps(document, separators=(',', ':'))))
+
+    def _delete_document(self, document_id):
+        with self.database.connection:
+            self.database.connection.execute(
+                'DELETE FROM documents WHERE collection = ? AND id = ?',
+                (self.name, document_id))
+
+
+class SQLiteDatabase(DocumentDatabase):
+    collection_class = SQLiteCollection
+
+    def __init__(self, path):
+        super().__init__()
+        # access is serialized by the database lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS documents ('
+                'collection TEXT NOT NULL, id TEXT NOT NULL, session_id TEXT, data TEXT NOT NULL, '
+                'PRIMARY KEY (collection, id))')
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS documents_session_id '
+                'ON documents (collection, session_id)')
@@ -0,0 +1,61 @@
+import queue
+import threading
+
+
+class EventBroker:
+    """
+    In-process publish/subscribe of game events, keyed by session ID.
+
+    Models publish an event when an update commits, the events route streams them
+    to subscribed clients (see routes/game.py handle_game_events).
+
+    Events only reach subscribers in the same worker. Streams also check the stored
+    versions every EVENTS_HEARTBEAT seconds, so updates committed by other workers
+    are announced with at most that delay.
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+        self.max_queued = 100
+
+    def init_app(self, app):
+        self.max_queued = app.config.get('EVENTS_MAX_QUEUED', 100)
+
+    def subscribe(self, session_id):
+        """
+        :return: A queue receiving the session's events, unsubscribe it when done.
+        """
+        subscriber = queue.Queue(maxsize=self.max_queued)
+
+        with self.lock:
+            self.subscribers.setdefault(session_id, set()).add(subscriber)
+
+        return subscriber
+
+    def unsubscribe(self, session_id, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(session_id, set())
+            subscribers.discard(subscriber)
+
+            if not subscribers:
+                self.subscribers.pop(session_id, None)
+
+    def publish(self, session_id, event):
+        """
+        Send an event to the session's subscribers.
+
+        A subscriber that is too slow misses the event, it catches up
+        at its next version check.
+
+        :param event: Dict, sent as JSON.
+        :return: None
+        """
+        with self.lock:
+            subscribers = list(self.subscribers.get(session_id, ()))
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                pass
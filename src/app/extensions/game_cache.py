@@ -0,0 +1,288 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g
+from pymongo.errors import PyMongoError
+
+
+class GameCacheEntry:
+    """
+    A hydrated session and game state, with the writes not yet sent to the db.
+    """
+
+    def __init__(self, session, game_state, size):
+        self.session = session
+        self.game_state = game_state
+        self.size = size
+        self.last_used_at = time.monotonic()
+
+        # (session version, game state version) as stored in the db
+        self.persisted_versions = (session.version, game_state.version)
+
+        # list of (collection name, filter, update operations), sent in order
+        self.pending_writes = []
+        self.pending_since = None
+
+        # (session version, game state version) once the held writes are sent
+        self.held_versions = None
+
+
+class GameCache:
+    """
+    Opt-in per-worker cache of hydrated sessions and game states (GAME_CACHE_ENABLED).
+
+    Entries are keyed by session ID and are only used while the versions in the
+    db still match, so updates from other workers are picked up. Entries are
+    evicted least recently used first when over GAME_CACHE_MAX_ENTRIES or
+    GAME_CACHE_MEMORY_BUDGET (estimated bytes), and after GAME_CACHE_TTL seconds unused.
+
+    A request checks an entry out when it loads a game. If the request does not
+    commit the game, its objects may hold unsaved changes and the entry is evicted.
+
+    With GAME_CACHE_WRITE_BEHIND the writes of a commit are held in the entry and
+    sent at most GAME_CACHE_MAX_STALENESS seconds later, in order.
+    Version conflicts are then found when flushing instead of when committing, and
+    the held writes are dropped. Only use it when a game is served by one worker.
+    Reads that go to the db (GET /session, GET /game) send a game's held writes
+    first, and If-None-Match is answered from the held versions, so clients see
+    their own writes.
+
+    Workers are expected to serve one request at a time (gunicorn sync workers).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.write_behind = False
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0,
+                      'evictions': 0, 'flushes': 0, 'conflicts': 0}
+        self.app = None
+        self.storage = None
+        self._flush_thread = None
+
+    def init_app(self, app, storage):
+        self.app = app
+        self.storage = storage
+        self.enabled = app.config.get('GAME_CACHE_ENABLED', False)
+        self.write_behind = self.enabled and app.config.get(
+            'GAME_CACHE_WRITE_BEHIND', False)
+        self.max_entries = app.config.get('GAME_CACHE_MAX_ENTRIES', 100)
+        self.memory_budget = app.config.get(
+            'GAME_CACHE_MEMORY_BUDGET', 64 * 1024 * 1024)
+        self.ttl = app.config.get('GAME_CACHE_TTL', 300)
+        self.max_staleness = app.config.get('GAME_CACHE_MAX_STALENESS', 2)
+
+        if self.enabled:
+            app.teardown_request(self._evict_uncommitted)
+
+        if self.write_behind:
+            atexit.register(self.flush_all)
+
+    @property
+    def size(self):
+        return sum(entry.size for entry in self.entries.values())
+
+    def get(self, session_id, versions):
+        """
+        Get a cached session and game state and check them out to this request.
+
+        :param versions: (session version, game state version) currently in the db.
+        :return: The entry, or None if not cached or out of date.
+        """
+        with self.lock:
+            entry = self.entries.get(session_id)
+
+            if entry and time.monotonic() - entry.last_used_at > self.ttl:
+                self.evict(session_id)
+                entry = None
+
+            if entry and entry.persisted_versions != versions:
+                # another worker updated the game, any held writes would conflict
+                self.stats['stale'] += 1
+                self.drop(session_id)
+                entry = None
+
+            if not entry:
+                self.stats['misses'] += 1
+                return None
+
+            self.stats['hits'] += 1
+            self.entries.move_to_end(session_id)
+            entry.last_used_at = time.monotonic()
+            self._check_out(session_id)
+
+            return entry
+
+    def put(self, session_id, session, game_state, size):
+        """
+        Cache a freshly loaded session and game state and check them out to this request.
+
+        :param size: Estimated memory used by the objects, in bytes.
+        :return: None
+        """
+        with self.lock:
+            self.drop(session_id)
+            self.entries[session_id] = GameCacheEntry(
+                session, game_state, size)
+            self._check_out(session_id)
+
+            while self.entries and (len(self.entries) > self.max_entries or
+                                    self.size > self.memory_budget):
+                self.evict(next(iter(self.entries)))
+
+    def commit(self, session_id, writes=None, versions=None):
+        """
+        Mark a checked out game as committed by this request.
+
+        :param writes: With write behind, the writes to hold, as a list of
+            (collection name, filter, update operations).
+        :param versions: (session version, game state version) the writes leave in
+            the db. Taken from the caller, the objects may already be ahead of the
+            writes held so far when a flush runs in between.
+        :return: None
+        """
+        checked_out = g.setdefault('game_cache_checked_out', set())
+        checked_out.discard(session_id)
+
+        with self.lock:
+            entry = self.entries.get(session_id)
+
+            if not entry:
+                return
+
+            if not writes:
+                entry.persisted_versions = (
+                    entry.session.version, entry.game_state.version)
+                return
+
+            entry.pending_writes.extend(writes)
+            entry.pending_since = entry.pending_since or time.monotonic()
+            entry.held_versions = versions
+
+        self._start_flush_thread()
+
+    def get_held_versions(self, session_id):
+        """
+        :return: (session version, game state version) of a game with held writes,
+            the db is behind these. None if no writes are held.
+        """
+        with self.lock:
+            entry = self.entries.get(session_id)
+
+            if not entry or not entry.pending_writes:
+                return None
+
+            return entry.held_versions
+
+    def release(self, session_id):
+        """
+        Return a checked out game that this request only read, it stays cached.
+        """
+        g.setdefault('game_cache_checked_out', set()).discard(session_id)
+
+    def evict(self, session_id):
+        """
+        Remove an entry, sending its held writes first.
+        """
+        with self.lock:
+            if session_id not in self.entries:
+                return
+
+            self.flush(session_id)
+            self.drop(session_id)
+            self.stats['evictions'] += 1
+
+    def drop(self, session_id):
+        """
+        Remove an entry without sending its held writes.
+        """
+        with self.lock:
+            entry = self.entries.pop(session_id, None)
+
+            if entry and entry.pending_writes:
+                self.stats['conflicts'] += 1
+                self.app.logger.warning(
+                    f"Dropped {len(entry.pending_writes)} held writes for session {session_id}.")
+
+    def flush(self, session_id):
+        """
+        Send an entry's held writes in order, see Storage.bulk_update.
+
+        If a write does not match (another worker updated the game) the writes after
+        it are not sent and the entry is dropped.
+
+        :return: None
+        """
+        with self.lock:
+            entry = self.entries.get(session_id)
+
+            if not entry or not entry.pending_writes:
+                return
+
+            try:
+                matched = self.storage.bulk_update(entry.pending_writes)
+            except PyMongoError as e:
+                self.app.logger.warning(
+                    f"Failed to flush held writes for session {session_id}: {e}")
+                matched = False
+
+            if not matched:
+                self.drop(session_id)
+                return
+
+            self.stats['flushes'] += 1
+            entry.pending_writes = []
+            entry.pending_since = None
+            entry.persisted_versions = entry.held_versions
+            entry.held_versions = None
+
+    def flush_overdue(self):
+        """
+        Send the held writes of entries older than the staleness window.
+        """
+        with self.lock:
+            now = time.monotonic()
+
+            for session_id, entry in list(self.entries.items()):
+                if entry.pending_since and now - entry.pending_since >= self.max_staleness:
+                    self.flush(session_id)
+
+    def flush_all(self):
+        with self.lock:
+            for session_id in list(self.entries):
+                self.flush(session_id)
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries), size=self.size)
+
+    def _check_out(self, session_id):
+        g.setdefault('game_cache_checked_out', set()).add(session_id)
+
+    def _evict_uncommitted(self, exception=None):
+        """
+        Evict games loaded by this request but not committed, they may hold unsaved changes.
+        """
+        for session_id in g.pop('game_cache_checked_out', set()):
+            self.evict(session_id)
+
+    def _start_flush_thread(self):
+        """
+        Flush overdue writes in the background, so writes are held no longer
+        than the staleness window even when the game gets no more requests.
+        """
+        with self.lock:
+            if self._flush_thread and self._flush_thread.is_alive():
+                return
+
+            def run():
+                while True:
+                    time.sleep(max(self.max_staleness / 2, 0.1))
+                    with self.app.app_context():
+                        self.flush_overdue()
+
+            self._flush_thread = threading.Thread(target=run, daemon=True)
+            self._flush_thread.start()
@@ -0,0 +1,47 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class GameJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that uses orjson when it is installed, and the stdlib encoder otherwise.
+
+    Objects with a __json__ method (Session, GameState, Territory and Unit) are
+    serialized from their attributes as the encoder reaches them, so routes can
+    return models without first building their whole to_dict tree.
+
+    Keys are not sorted, and responses are compact outside of debug mode.
+    """
+
+    sort_keys = False
+
+    @staticmethod
+    def default(obj):
+        if hasattr(obj, '__json__'):
+            return obj.__json__()
+
+        return DefaultJSONProvider.default(obj)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+
+        option = 0
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option = orjson.OPT_INDENT_2
+
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option) + b'\n',
+            mimetype=self.mimetype)
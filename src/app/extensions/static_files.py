@@ -0,0 +1,125 @@
+import mimetypes
+import os
+import re
+
+from flask import send_file
+
+from app.extensions.compression import PRECOMPRESSED_EXTENSIONS, get_accepted_encodings
+
+# Vite writes bundled files to assets/ as [name]-[hash][extname]
+HASHED_ASSET_PATTERN = re.compile(r'^assets/.+-[\w-]{8,}\.\w+$')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class StaticFileEntry:
+    """
+    A static file found when building the manifest.
+    """
+
+    def __init__(self, path, file_path, encodings, cache_control):
+        self.path = path
+        self.file_path = file_path
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+        # dict of encoding to the absolute path of the precompressed sibling
+        self.encodings = encodings
+        self.cache_control = cache_control
+
+
+class StaticFiles:
+    """
+    Serves the built Vue app from a manifest of the static folder, built when the
+    app starts, so requests are looked up without checking the filesystem.
+    Unknown paths get index.html, which routes on the client.
+
+    Cache-Control:
+        hashed Vite assets (assets/name-hash.js): cached for a year, immutable
+        index.html: no-cache, revalidated on every visit
+        other files (ex. the map geojson): STATIC_MAX_AGE seconds, then revalidated
+
+    Precompressed .br and .gz siblings (see scripts/precompress_static.py) are sent
+    to clients that accept them. The static folder is expected to only change on
+    deploy, restart the app after rebuilding the UI.
+    """
+
+    def __init__(self):
+        self.static_folder = None
+        self.max_age = 86400
+        self.manifest = {}
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.max_age = app.config.get('STATIC_MAX_AGE', 86400)
+        self.manifest = self.build_manifest()
+
+    def build_manifest(self):
+        """
+        :return: Dict of path relative to the static folder (with / separators) to StaticFileEntry.
+        """
+        if not self.static_folder or not os.path.isdir(self.static_folder):
+            return {}
+
+        file_paths = {}
+
+        for directory, _, file_names in os.walk(self.static_folder):
+            for file_name in file_names:
+                file_path = os.path.join(directory, file_name)
+                path = os.path.relpath(file_path, self.static_folder).replace(os.sep, '/')
+                file_paths[path] = file_path
+
+        manifest = {}
+
+        for path, file_path in file_paths.items():
+            if path.endswith(tuple(PRECOMPRESSED_EXTENSIONS.values())) and \
+                    os.path.splitext(path)[0] in file_paths:
+                continue
+
+            encodings = {encoding: file_paths[path + extension]
+                         for encoding, extension in PRECOMPRESSED_EXTENSIONS.items()
+                         if path + extension in file_paths}
+
+            manifest[path] = StaticFileEntry(path, file_path, encodings,
+                                             self.get_cache_control(path))
+
+        return manifest
+
+    def get_cache_control(self, path):
+        if HASHED_ASSET_PATTERN.match(path):
+            return IMMUTABLE_CACHE_CONTROL
+
+        if path == 'index.html':
+            return 'no-cache'
+
+        return f'public, max-age={self.max_age}'
+
+    def send(self, path):
+        """
+        Send a static file, or index.html if the path is not in the manifest.
+
+        :return: The response, a 404 if there is no index.html either.
+        """
+        entry = self.manifest.get(path) or self.manifest.get('index.html')
+
+        if not entry:
+            return 'Not found.', 404
+
+        file_path = entry.file_path
+        encoding = None
+
+        for accepted_encoding in get_accepted_encodings():
+            if accepted_encoding in entry.encodings:
+                encoding = accepted_encoding
+                file_path = entry.encodings[accepted_encoding]
+                break
+
+        response = send_file(file_path, mimetype=entry.mimetype, conditional=True)
+        response.headers['Cache-Control'] = entry.cache_control
+
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+        if entry.encodings:
+            response.vary.add('Accept-Encoding')
+
+        return response
@@ -0,0 +1,63 @@
+from app.extensions.document_store import MemoryDatabase, SQLiteDatabase
+
+
+class Storage:
+    """
+    The database the models read and write, selected by STORAGE_BACKEND:
+
+    - 'mongo': MongoDB through Flask-PyMongo (MONGO_URI)
+    - 'memory': documents kept in the process, for tests and local play
+    - 'sqlite': documents stored as JSON in a SQLite file (SQLITE_PATH)
+
+    `storage.db` has the pymongo database interface for every backend.
+    """
+
+    BACKENDS = ('mongo', 'memory', 'sqlite')
+
+    def __init__(self, mongo):
+        self.mongo = mongo
+        self.backend = None
+        self.db = None
+
+    def init_app(self, app):
+        self.backend = app.config.get('STORAGE_BACKEND', 'mongo')
+
+        if self.backend == 'mongo':
+            self.mongo.init_app(app)
+            self.db = self.mongo.db
+        elif self.backend == 'memory':
+            self.db = MemoryDatabase()
+        elif self.backend == 'sqlite':
+            self.db = SQLiteDatabase(app.config.get('SQLITE_PATH', 'ava.sqlite3'))
+        else:
+            raise ValueError(
+                f"Unknown STORAGE_BACKEND {self.backend}, expected one of {', '.join(self.BACKENDS)}")
+
+    def bulk_update(self, writes):
+        """
+        Send updates in order, stopping at the first that does not match a document.
+
+        Consecutive updates to the same collection are sent together on the memory
+        and sqlite backends. On mongo they are sent one by one, an ordered bulk_write
+        does not stop at an update that matches nothing.
+
+        :param writes: List of (collection name, filter, update operations).
+        :return: True if every update matched a document.
+        """
+        runs = []
+        for collection_name, query, operations in writes:
+            if not runs or runs[-1][0] != collection_name:
+                runs.append((collection_name, []))
+            runs[-1][1].append((query, operations))
+
+        for collection_name, collection_writes in runs:
+            collection = self.db[collection_name]
+
+            if self.backend == 'mongo':
+                for query, operations in collection_writes:
+                    if not collection.update_one(query, operations).matched_count:
+                        return False
+            elif collection.bulk_update(collection_writes) != len(collection_writes):
+                return False
+
+        return True
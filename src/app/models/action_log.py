@@ -0,0 +1,99 @@
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from app.extensions import storage
+
+"""
+The action log records every successful game action of a session, in order.
+
+An action is:
+    Session ID
+    Sequence number (starts at 1)
+    Action name, ex. 'move_units'
+    Params (as sent by the player)
+    Outcomes (dice rolls and new unit IDs)
+
+The actions of a batch are saved together and logged as one 'batch' action, its
+params hold their action records.
+
+A snapshot is the full session and game state after an action, taken when the
+game starts (sequence 0) and every ACTION_LOG_SNAPSHOT_INTERVAL actions. A game is
+rebuilt from the latest snapshot by replaying the actions after it.
+
+"""
+
+
+def append_action(session_id, action, params, outcomes):
+    """
+    Append an action to the end of a session's log.
+
+    The sequence number is taken from a counter on the session document.
+
+    :return: The sequence number of the action.
+    """
+    counter = storage.db.session.find_one_and_update(
+        {'session_id': session_id},
+        {'$inc': {'action_seq': 1}},
+        projection={'_id': 0, 'action_seq': 1},
+        return_document=ReturnDocument.AFTER,
+    )
+
+    seq = counter['action_seq']
+
+    record = {
+        'session_id': session_id,
+        'seq': seq,
+        'action': action,
+        'params': params,
+    }
+
+    # keep records compact, most actions have no random outcomes
+    outcomes = {key: value for key, value in outcomes.items() if value}
+    if outcomes:
+        record['outcomes'] = outcomes
+
+    storage.db.game_action_log.insert_one(record)
+
+    return seq
+
+
+def save_snapshot(session_id, seq, session_data, game_state_data, backup_data=None):
+    """
+    Save the full session and game state as of an action.
+
+    :param backup_data: The game state backup for undoing the current phase, if any.
+    :return: None
+    """
+    storage.db.game_state_snapshot.replace_one(
+        {'session_id': session_id, 'seq': seq},
+        {
+            'session_id': session_id,
+            'seq': seq,
+            'session': session_data,
+            'game_state': game_state_data,
+            'game_state_backup': backup_data,
+        },
+        upsert=True
+    )
+
+
+def get_latest_snapshot(session_id):
+    """
+    Get the most recent snapshot of a session.
+
+    :return: The snapshot as a dict, or None if there is none.
+    """
+    return storage.db.game_state_snapshot.find_one(
+        {'session_id': session_id}, {'_id': 0}, sort=[('seq', DESCENDING)])
+
+
+def get_actions(session_id, after_seq=0):
+    """
+    Get a session's logged actions after a sequence number, in order.
+
+    :return: List of actions as dicts.
+    """
+    return list(storage.db.game_action_log.find(
+        {'session_id': session_id, 'seq': {'$gt': after_seq}},
+        {'_id': 0},
+        sort=[('seq', ASCENDING)]
+    ))
@@ -1,7 +1,20 @@
-from app.extensions import mongo
+from copy import deepcopy
+
+from flask import current_app
+
+from app.extensions import storage, events
 from app.models.territory_data import TERRITORY_DATA
+from app.models.map_graph import MAP_GRAPH
 from app.models.unit import Unit
 from app.models.territory import Territory
+from app.models.version import VersionConflictError, version_filter
+from app.models.game_state_codec import (decode_game_state, encode_field, encode_game_state,
+                                         encode_projection_field, encode_territory_change,
+                                         is_compact)
+from app.models.unit_stacks import (assign_stacked_unit_ids, get_pinned_unit_ids, get_individual_unit_ids,
+                                    stack_territory, unstack_territory)
+from app.models.player_aggregates import PlayerAggregates, build_player_aggregates
+from app.models.unit_index import build_unit_index, index_unit
 
 """
 This is the game_state object. It tracks the state of the game world including the territories, units, and players.
@@ -9,6 +22,7 @@ This is the game_state object. It tracks the state of the game world including t
 A game_state is a:
     Session ID
     List of Territory
+    Version (incremented on every update)
 
 A Territory is:
     Team ID
@@ -19,16 +33,81 @@ A Territory is:
 """
 
 
+EMBEDDED_GAME_STATE_PREFIX = 'game_state.'
+
+
+def is_game_state_embedded():
+    """
+    Check if game states are stored inside their session document
+    (GAME_STORAGE_MODE 'embedded') instead of the game_state collection.
+
+    :return bool:
+    """
+    return current_app.config.get('GAME_STORAGE_MODE') == 'embedded'
+
+
+def get_game_state_format():
+    """
+    Get the format new game states are stored in (GAME_STATE_FORMAT),
+    'dict' for the to_dict shape or 'compact' (see game_state_codec.py).
+
+    :return str:
+    """
+    return current_app.config.get('GAME_STATE_FORMAT', 'dict')
+
+
+def is_unit_stacks_enabled():
+    """
+    Check if new game states store identical units as counts (GAME_STATE_UNIT_STACKS).
+
+    :return bool:
+    """
+    return current_app.config.get('GAME_STATE_UNIT_STACKS', False)
+
+
+def is_path_safe_key(key):
+    """
+    Check if a dict key can be used in a dotted update path.
+
+    Mongo reads dots as nested fields and a leading $ as an operator.
+
+    :return bool:
+    """
+    return '.' not in key and not key.startswith('$')
+
+
+GAME_STATE_FIELDS = ['session_id', 'territories',
+                     'battles', 'factory_production_counts', 'version']
+
+
 class GameState:
-    def __init__(self, session_id, territories=None, battles=None, factory_production_counts=None):
+    def __init__(self, session_id, territories=None, battles=None, factory_production_counts=None, version=0):
         self.session_id = session_id
         self.territories = territories if territories is not None else {}
         self.battles = battles if battles is not None else []
         self.factory_production_counts = factory_production_counts if factory_production_counts is not None else {}
+        self.version = version
+
+        # 'dict' or 'compact', and if identical units are stored as counts (see unit_stacks.py).
+        # A game state is always saved the way it was created.
+        self.storage_format = 'dict'
+        self.unit_stacks = False
 
         if not self.territories:
             self.territories = self.initialize_territories()
 
+        # last persisted battles, production counts and territory names,
+        # None if the game state was never saved
+        self._snapshot = None
+
+        # what the last update changed, see mark_updated
+        self.last_update = None
+
+        # per team totals and where each unit is, built when first used
+        # (see player_aggregates.py and unit_index.py)
+        self._player_aggregates = None
+        self._unit_index = None
+
     def __repr__(self):
         return (
             f"<Session(session_id={self.session_id}, "
@@ -44,6 +123,7 @@ class GameState:
             'territories': {},
             'battles': self.battles,
             'factory_production_counts': self.factory_production_counts,
+            'version': self.version,
         }
 
         for territory_name, territory in self.territories.items():
@@ -51,36 +131,160 @@ class GameState:
 
         return result
 
+    def __json__(self):
+        """
+        The game state for the app's JSON provider, same as to_dict but territories
+        are serialized by the provider.
+        """
+        return {
+            'session_id': self.session_id,
+            'territories': self.territories,
+            'battles': self.battles,
+            'factory_production_counts': self.factory_production_counts,
+            'version': self.version,
+        }
+
+    def to_document(self, current_territories=None):
+        """
+        Converts the GameState object to a dictionary in its storage format.
+
+        :param current_territories: Dict of territory name to the territory as a dict,
+            if the territories were already serialized by get_current_territories.
+        """
+        if current_territories is None:
+            current_territories = self.get_current_territories()
+
+        pinned_unit_ids = self.get_pinned_unit_ids()
+        taken_unit_ids = self.get_individual_unit_ids(pinned_unit_ids)
+
+        result = {
+            'session_id': self.session_id,
+            'territories': {territory_name: self.to_stored_territory(territory_name, territory,
+                                                                     pinned_unit_ids, taken_unit_ids)
+                            for territory_name, territory in current_territories.items()},
+            'battles': self.battles,
+            'factory_production_counts': self.factory_production_counts,
+            'version': self.version,
+        }
+
+        if self.unit_stacks:
+            result['unit_stacks'] = True
+
+        if self.storage_format == 'compact':
+            return encode_game_state(result)
+
+        return result
+
+    def get_current_territories(self):
+        """
+        Serialize the territories, after giving stacked units their IDs.
+
+        :return: Dict of territory name to the territory as a dict.
+        """
+        if self.unit_stacks:
+            self.assign_stacked_unit_ids()
+
+        return {territory_name: territory.to_dict()
+                for territory_name, territory in self.territories.items()}
+
+    def assign_stacked_unit_ids(self):
+        """
+        Order each territory's units as they are stored and give stacked units their
+        derived IDs, so IDs match what a reload from the db would give.
+        """
+        pinned_unit_ids = self.get_pinned_unit_ids()
+        taken_unit_ids = self.get_individual_unit_ids(pinned_unit_ids)
+
+        for territory_name, territory in self.territories.items():
+            territory.units = assign_stacked_unit_ids(
+                self.session_id, territory_name, territory.units, pinned_unit_ids, taken_unit_ids)
+
+        # the index is by unit ID
+        self._unit_index = None
+
+    def get_pinned_unit_ids(self):
+        """
+        :return: Set of the IDs of units that are never stacked, empty without unit stacks.
+        """
+        return get_pinned_unit_ids(self.battles) if self.unit_stacks else set()
+
+    def get_individual_unit_ids(self, pinned_unit_ids):
+        """
+        :return: Set of the IDs of units stored individually, empty without unit stacks.
+        """
+        return get_individual_unit_ids(self.territories, pinned_unit_ids) if self.unit_stacks else set()
+
+    def to_stored_territory(self, territory_name, territory, pinned_unit_ids, taken_unit_ids):
+        """
+        Convert a territory dict to its stored shape, see unit_stacks.py.
+        """
+        if self.unit_stacks:
+            return stack_territory(self.session_id, territory_name, territory, pinned_unit_ids, taken_unit_ids)
+
+        return territory
+
     @classmethod
     def from_dict(cls, data):
         """
         Creates a Session object from a dictionary.
 
         This should only be used on existing data, not for creating new sessions.
+        Data in the compact storage format is decoded first.
 
         If a session is missing values, this will raise an error.
         """
+        storage_format = 'compact' if is_compact(data) else 'dict'
+
         try:
-            return cls(
+            if storage_format == 'compact':
+                data = decode_game_state(data)
+
+            if data.get('unit_stacks'):
+                data['territories'] = {
+                    territory_name: unstack_territory(
+                        data['session_id'], territory_name, territory)
+                    for territory_name, territory in data['territories'].items()}
+
+            game_state = cls(
                 session_id=data['session_id'],
                 territories={territory_name: Territory.from_dict(territory)
                              for territory_name, territory in data['territories'].items()},
                 battles=data.get('battles'),
                 factory_production_counts=data.get(
                     'factory_production_counts'),
+                version=data.get('version', 0),
             )
         except KeyError as e:
             # TODO log error
             raise ValueError(
                 f"Failed to cast GameState json to class: {e}")
 
+        game_state.storage_format = storage_format
+        game_state.unit_stacks = data.get('unit_stacks', False)
+
+        # data came from the db, so it is the persisted version
+        game_state._take_snapshot()
+
+        return game_state
+
     @classmethod
     def create_game_state(cls, session_id):
         """
         Create a Game State and tie it to this session via session id.
         """
         game_state = cls(session_id=session_id)
-        mongo.db.game_state.insert_one(game_state.to_dict())
+        game_state.storage_format = get_game_state_format()
+        game_state.unit_stacks = is_unit_stacks_enabled()
+
+        if is_game_state_embedded():
+            storage.db.session.update_one(
+                {'session_id': session_id},
+                {'$set': {'game_state': game_state.to_document()}}
+            )
+        else:
+            storage.db.game_state.insert_one(game_state.to_document())
+
+        game_state.mark_persisted()
         return game_state
 
     @staticmethod
@@ -88,55 +292,431 @@ class GameState:
         """
         Get a session by session ID.
         """
-        result = mongo.db.game_state.find_one({'session_id': session_id})
-
-        # remove mongo ObjectID
-        del result['_id']
+        if is_game_state_embedded():
+            result = storage.db.session.find_one(
+                {'session_id': session_id}, {'_id': 0, 'game_state': 1})
+            result = result.get('game_state') if result else None
+        else:
+            result = storage.db.game_state.find_one({'session_id': session_id})
 
         if not result:
             return None
 
+        # remove mongo ObjectID
+        result.pop('_id', None)
+
         if convert_to_class:
             return GameState.from_dict(result)
 
+        if is_compact(result):
+            result = decode_game_state(result)
+
+        if result.pop('unit_stacks', False):
+            result['territories'] = {
+                territory_name: unstack_territory(
+                    session_id, territory_name, territory)
+                for territory_name, territory in result['territories'].items()}
+
+        return result
+
+    @staticmethod
+    def get_game_state_fields_by_session_id(session_id, fields=None, territory_names=None):
+        """
+        Get only some fields of a game state by session ID.
+
+        Only the requested fields are sent by the db. session_id and version are always included.
+
+        :param fields: List of game state field names, defaults to territories
+            if territory names are given, otherwise all fields.
+        :param territory_names: List of territory names to include, defaults to all territories.
+        :return: Dict of the requested fields, or None if not found.
+        """
+        if fields is None:
+            fields = ['territories'] if territory_names else GAME_STATE_FIELDS
+
+        invalid_fields = [
+            field for field in fields if field not in GAME_STATE_FIELDS]
+
+        if invalid_fields:
+            raise ValueError(
+                f"Invalid game state fields: {', '.join(invalid_fields)}")
+
+        fields = set(fields) | {'session_id', 'version'}
+
+        # Territory names that cannot be used in a dotted path are filtered after loading
+        project_territory_names = (territory_names and 'territories' in fields and
+                                   all(is_path_safe_key(territory_name) for territory_name in territory_names))
+
+        if project_territory_names:
+            fields.remove('territories')
+            fields.update(
+                f"territories.{territory_name}" for territory_name in territory_names)
+
+        embedded = is_game_state_embedded()
+        prefix = EMBEDDED_GAME_STATE_PREFIX if embedded else ''
+
+        # the storage format is not known before reading, so project both shapes
+        fields.update([encode_projection_field(field) for field in fields] + ['format', 'unit_stacks'])
+
+        projection = {f"{prefix}{field}": 1 for field in fields}
+        projection['_id'] = 0
+
+        collection = storage.db.session if embedded else storage.db.game_state
+
+        result = collection.find_one({'session_id': session_id}, projection)
+
+        if result and embedded:
+            result = result.get('game_state')
+
+        if not result:
+            return None
+
+        if is_compact(result):
+            result = decode_game_state(result)
+
+        if result.pop('unit_stacks', False) and 'territories' in result:
+            result['territories'] = {
+                territory_name: unstack_territory(
+                    session_id, territory_name, territory)
+                for territory_name, territory in result['territories'].items()}
+
+        if territory_names and 'territories' in result and not project_territory_names:
+            result['territories'] = {territory_name: territory
+                                     for territory_name, territory in result['territories'].items()
+                                     if territory_name in territory_names}
+
         return result
 
     def update(self):
         """
         Update a game state.
 
+        Only the fields that changed since the game state was loaded (or last
+        saved) are written. Nothing is written if there are no changes.
+
+        The update only applies if the game state has not been updated since it was read.
+        Raises VersionConflictError otherwise.
+
         Returns None.
         """
-        mongo.db.game_state.update_one(
-            {'session_id': self.session_id},
-            {'$set': self.to_dict()}
+        embedded = is_game_state_embedded()
+
+        query, operations, current_territories = self.get_update_operations(
+            prefix=EMBEDDED_GAME_STATE_PREFIX if embedded else '')
+
+        if not operations:
+            return
+
+        collection = storage.db.session if embedded else storage.db.game_state
+
+        result = collection.update_one(
+            {'session_id': self.session_id, **query},
+            operations
         )
 
+        if not result.matched_count:
+            raise VersionConflictError(
+                f"Game state {self.session_id} was updated by another request.")
+
+        self.mark_updated(current_territories)
+
+        events.publish(self.session_id, {'game_state': self.get_event_data()})
+
+    def get_update_operations(self, prefix=''):
+        """
+        Build the versioned update for the fields that changed since the game state was loaded.
+
+        :param prefix: Path of the game state within its document, ex. 'game_state.'
+            when it is embedded in the session document.
+        :return: Tuple of (version query, update operations or None if nothing changed,
+            dict of territory name to the territory as a dict).
+        """
+        set_fields, unset_fields, current_territories = self.get_changes()
+
+        query = {f"{prefix}version": version_filter(self.version)}
+
+        if not set_fields and not unset_fields:
+            return query, None, current_territories
+
+        operations = {'$inc': {f"{prefix}version": 1}}
+
+        if set_fields:
+            operations['$set'] = {f"{prefix}{path}": value
+                                  for path, value in set_fields.items()}
+
+        if unset_fields:
+            operations['$unset'] = {f"{prefix}{path}": ''
+                                    for path in unset_fields}
+
+        return query, operations, current_territories
+
+    def get_event_data(self):
+        """
+        The game state fields sent to event subscribers when the game state is updated.
+
+        territories lists the territories changed by the last update, or is None if unknown.
+        """
+        last_update = self.last_update or {}
+
+        return {
+            'version': self.version,
+            'territories': last_update.get('territories'),
+        }
+
+    def get_delta(self, base_version):
+        """
+        Get what changed since a version, only the changed territories and fields.
+
+        Only the changes of the last update are known. The game state must be saved.
+
+        :param base_version: The game state version the client has.
+        :return: Dict of base_version, version, territories (name to Territory)
+            and any changed top level fields, or None if the changes are not known.
+        """
+        if base_version == self.version:
+            changed_territories, changed_fields = [], []
+        elif self.last_update and self.last_update['base_version'] == base_version \
+                and not self.last_update['removed_territories']:
+            changed_territories = self.last_update['territories']
+            changed_fields = self.last_update['fields']
+        else:
+            return None
+
+        delta = {
+            'base_version': base_version,
+            'version': self.version,
+            'territories': {territory_name: self.territories[territory_name]
+                            for territory_name in changed_territories},
+        }
+
+        for field in changed_fields:
+            delta[field] = getattr(self, field)
+
+        return delta
+
+    def mark_updated(self, current_territories=None):
+        """
+        Bump the version and record the current data as persisted after a successful update.
+
+        What the update changed is kept in last_update, for events and delta responses.
+
+        :param current_territories: Dict of territory name to the territory as a dict,
+            if the territories were already serialized.
+        :return: None
+        """
+        current_territories = current_territories or {}
+
+        self.last_update = {
+            'base_version': self.version,
+            'territories': [territory_name for territory_name, territory in self.territories.items()
+                            if territory.get_changes(current_territories.get(territory_name))],
+            'fields': [field for field in ['battles', 'factory_production_counts']
+                       if self._snapshot is None or getattr(self, field) != self._snapshot[field]],
+            'removed_territories': self._snapshot is not None and any(
+                territory_name not in self.territories for territory_name in self._snapshot['territories']),
+        }
+
+        self.version += 1
+        self.mark_persisted(current_territories)
+
+    def get_changes(self):
+        """
+        Diff the game state against its last persisted version and build the
+        targeted update paths, ex. territories.Germany.units.
+
+        Territory names that cannot be used in a dotted path (ex. Ukraine S.S.R.)
+        fall back to setting the whole territories field.
+
+        In the compact storage format the paths and values are encoded,
+        ex. T.<territory index>.u, and every territory has a dotted path.
+
+        With unit stacks, a territory's stacks are written with its units.
+
+        :return: Tuple of (dict of paths to $set, list of paths to $unset,
+            dict of territory name to the territory as a dict).
+        """
+        compact = self.storage_format == 'compact'
+
+        current_territories = self.get_current_territories()
+
+        # never saved, write everything
+        if self._snapshot is None:
+            set_fields = self.to_document(current_territories)
+            del set_fields['version']
+            return set_fields, [], current_territories
+
+        set_fields = {}
+        unset_fields = []
+
+        changed_territories = {}
+
+        for territory_name, territory in self.territories.items():
+            changes = territory.get_changes(current_territories[territory_name])
+
+            if changes:
+                changed_territories[territory_name] = changes
+
+        pinned_unit_ids = self.get_pinned_unit_ids()
+        taken_unit_ids = self.get_individual_unit_ids(pinned_unit_ids)
+
+        # units that became (or stopped being) referenced by a battle
+        # move between the stacks and the individual units
+        for unit_id in pinned_unit_ids ^ self._snapshot['pinned_unit_ids']:
+            for territory_name, territory in current_territories.items():
+                if any(unit['unit_id'] == unit_id for unit in territory['units']):
+                    changed_territories.setdefault(
+                        territory_name, {})['units'] = territory['units']
+
+        stored_territories = {territory_name: self.to_stored_territory(territory_name,
+                                                                       current_territories[territory_name],
+                                                                       pinned_unit_ids, taken_unit_ids)
+                              for territory_name in changed_territories}
+
+        for territory_name, changes in changed_territories.items():
+            fields = list(changes)
+
+            if self.unit_stacks and 'units' in changes:
+                fields.append('stacks')
+
+            changed_territories[territory_name] = {field: stored_territories[territory_name][field]
+                                                   for field in fields}
+
+        removed_territories = [territory_name for territory_name in self._snapshot['territories']
+                               if territory_name not in self.territories]
+
+        if compact:
+            for territory_name, changes in changed_territories.items():
+                if self.territories[territory_name]._snapshot is None:
+                    path, value = encode_territory_change(
+                        territory_name, None, stored_territories[territory_name])
+                    set_fields[path] = value
+                    continue
+
+                for field, value in changes.items():
+                    path, value = encode_territory_change(
+                        territory_name, field, value)
+                    set_fields[path] = value
+
+            unset_fields.extend(encode_territory_change(territory_name, None, {})[0]
+                                for territory_name in removed_territories)
+
+        elif not all(is_path_safe_key(territory_name)
+                     for territory_name in list(changed_territories) + removed_territories):
+            set_fields['territories'] = {territory_name: self.to_stored_territory(territory_name, territory,
+                                                                                  pinned_unit_ids, taken_unit_ids)
+                                         for territory_name, territory in current_territories.items()}
+
+        else:
+            for territory_name, changes in changed_territories.items():
+                path = f"territories.{territory_name}"
+
+                # a new territory is written whole
+                if self.territories[territory_name]._snapshot is None:
+                    set_fields[path] = stored_territories[territory_name]
+                    continue
+
+                for field, value in changes.items():
+                    set_fields[f"{path}.{field}"] = value
+
+            unset_fields.extend(
+                f"territories.{territory_name}" for territory_name in removed_territories)
+
+        for field in ['battles', 'factory_production_counts']:
+            value = getattr(self, field)
+
+            if value != self._snapshot[field]:
+                path, value = encode_field(
+                    field, value) if compact else (field, value)
+                set_fields[path] = value
+
+        return set_fields, unset_fields, current_territories
+
+    def mark_persisted(self, current_territories=None):
+        """
+        Record the game state's current data as the persisted version.
+
+        :param current_territories: Dict of territory name to the territory as a dict,
+            if the territories were already serialized.
+        :return: None
+        """
+        current_territories = current_territories or {}
+
+        for territory_name, territory in self.territories.items():
+            territory.mark_persisted(current_territories.get(territory_name))
+
+        self._take_snapshot()
+
+    def _take_snapshot(self):
+        """
+        Copy the battles and production counts, these are mutated in place.
+        """
+        self._snapshot = {
+            'battles': deepcopy(self.battles),
+            'factory_production_counts': dict(self.factory_production_counts),
+            'territories': set(self.territories),
+            'pinned_unit_ids': self.get_pinned_unit_ids(),
+        }
+
     def backup_game_state(self):
         """
         Backup the game state to a separate collection to allow players to undo.
+
+        The backup is replaced in a single upsert, there is always at most one per session.
         """
-        mongo.db.game_state_backup.delete_many(
-            {'session_id': self.session_id})
+        storage.db.game_state_backup.replace_one(
+            {'session_id': self.session_id},
+            self.to_document(),
+            upsert=True
+        )
+
+    @staticmethod
+    def get_game_state_backup_by_session_id(session_id):
+        """
+        Get the backup of a game state by session ID.
 
-        mongo.db.game_state_backup.insert_one(self.to_dict())
+        :return: The backup as a dict, or None if there is none.
+        """
+        return storage.db.game_state_backup.find_one(
+            {'session_id': session_id}, {'_id': 0})
 
     def restore_game_state(self):
         """
         Restore the game state from a backup.
+
+        The game state is replaced in a single update, so it is never missing
+        from the db while restoring.
         """
-        backup = mongo.db.game_state_backup.find_one(
-            {'session_id': self.session_id})
+        backup = GameState.get_game_state_backup_by_session_id(
+            self.session_id)
 
         if not backup:
             # TODO log error
             return None
 
-        mongo.db.game_state.delete_one({'session_id': self.session_id})
+        # versions only move forward, even when restoring an older state
+        backup['version'] = self.version + 1
+
+        if is_game_state_embedded():
+            result = storage.db.session.update_one(
+                {'session_id': self.session_id,
+                 'game_state.version': version_filter(self.version)},
+                {'$set': {'game_state': backup}})
+        else:
+            result = storage.db.game_state.replace_one(
+                {'session_id': self.session_id,
+                 'version': version_filter(self.version)},
+                backup)
 
-        mongo.db.game_state.insert_one(backup)
+        if not result.matched_count:
+            raise VersionConflictError(
+                f"Game state {self.session_id} was updated by another request.")
 
-        return GameState.from_dict(backup)
+        game_state = GameState.from_dict(backup)
+
+        # any territory may have changed
+        events.publish(self.session_id, {'game_state': game_state.get_event_data()})
+
+        return game_state
 
     @staticmethod
     def initialize_units(territory_data):
@@ -175,6 +755,166 @@ class GameState:
 
         return result
 
+    def get_player_aggregates(self, team_num):
+        """
+        Get the territory, factory, production and income totals of a team.
+
+        :return: PlayerAggregates, all zero if the team controls no territory.
+        """
+        if self._player_aggregates is None:
+            self._player_aggregates = build_player_aggregates(self.territories)
+
+        return self._player_aggregates.get(team_num) or PlayerAggregates()
+
+    def set_territory_team(self, territory_name, team_num):
+        """
+        Transfer control of a territory, keeping the player aggregates up to date.
+        """
+        territory = self.territories[territory_name]
+
+        if territory.team == team_num:
+            return
+
+        if self._player_aggregates is not None:
+            self._player_aggregates[territory.team].add_territory(
+                territory_name, territory.has_factory, sign=-1)
+            self._player_aggregates.setdefault(team_num, PlayerAggregates()).add_territory(
+                territory_name, territory.has_factory)
+
+        territory.team = team_num
+
+    def add_factory(self, territory_name):
+        """
+        Place an industrial complex on a territory, keeping the player aggregates up to date.
+        """
+        territory = self.territories[territory_name]
+
+        if territory.has_factory:
+            return
+
+        if self._player_aggregates is not None:
+            aggregates = self._player_aggregates[territory.team]
+            aggregates.add_territory(territory_name, False, sign=-1)
+            aggregates.add_territory(territory_name, True)
+
+        territory.has_factory = True
+
+    def check_player_aggregates(self):
+        """
+        Compare the player aggregates against a full scan of the territories.
+
+        :return: List of error messages, empty if they match.
+        """
+        if self._player_aggregates is None:
+            return []
+
+        expected = build_player_aggregates(self.territories)
+
+        return [f"Team {team_num}: expected {expected.get(team_num, PlayerAggregates())}, "
+                f"found {self._player_aggregates.get(team_num, PlayerAggregates())}"
+                for team_num in set(expected) | set(self._player_aggregates)
+                if expected.get(team_num, PlayerAggregates()) != self._player_aggregates.get(team_num, PlayerAggregates())]
+
+    def get_unit_index(self):
+        """
+        :return: Dict of unit ID to tuple of (Unit, territory name, transport or None).
+        """
+        if self._unit_index is None:
+            self._unit_index = build_unit_index(self.territories)
+
+        return self._unit_index
+
+    def find_unit(self, unit_id):
+        """
+        Find a unit anywhere in the game, including cargo.
+
+        :return: Tuple of (Unit, territory name, transport or None), or None if not found.
+        """
+        return self.get_unit_index().get(unit_id)
+
+    def add_units(self, territory_name, units):
+        """
+        Add units, with their cargo, to a territory.
+        """
+        index = self.get_unit_index()
+
+        self.territories[territory_name].units.put(units)
+
+        for unit in units:
+            index_unit(index, unit, territory_name)
+
+    def remove_unit(self, unit_id):
+        """
+        Remove a unit, with its cargo, from its territory or transport.
+
+        :return: The removed unit, or None if it is not in the game.
+        """
+        entry = self.get_unit_index().pop(unit_id, None)
+
+        if not entry:
+            return None
+
+        unit, territory_name, transport = entry
+
+        if transport:
+            transport.cargo.remove(unit)
+        else:
+            self.territories[territory_name].units.take([unit_id])
+
+        for cargo_unit in unit.cargo:
+            self._unit_index.pop(cargo_unit.unit_id, None)
+
+        return unit
+
+    def move_units_to(self, territory_name, units):
+        """
+        Move units, with their cargo, from wherever they are to a territory.
+        """
+        for unit in units:
+            self.remove_unit(unit.unit_id)
+
+        self.add_units(territory_name, units)
+
+    def load_units(self, transport, units):
+        """
+        Move units from wherever they are onto a transport or carrier.
+        """
+        transport_territory_name = self.find_unit(transport.unit_id)[1]
+
+        for unit in units:
+            self.remove_unit(unit.unit_id)
+            transport.cargo.append(unit)
+            self._unit_index[unit.unit_id] = (unit, transport_territory_name, transport)
+
+    def unload_units(self, transport, territory_name):
+        """
+        Move all units carried by a transport or carrier to a territory.
+        """
+        units = transport.cargo
+        transport.cargo = []
+
+        self.add_units(territory_name, units)
+
+    def check_unit_index(self):
+        """
+        Compare the unit index against a full scan of the territories.
+
+        :return: List of error messages, empty if they match.
+        """
+        if self._unit_index is None:
+            return []
+
+        expected = build_unit_index(self.territories)
+
+        def location(entry):
+            unit, territory_name, transport = entry
+            return id(unit), territory_name, id(transport) if transport else None
+
+        return [f"Unit {unit_id}: expected {expected.get(unit_id)}, found {self._unit_index.get(unit_id)}"
+                for unit_id in set(expected) | set(self._unit_index)
+                if unit_id not in expected or unit_id not in self._unit_index
+                or location(expected[unit_id]) != location(self._unit_index[unit_id])]
+
     def add_battle(self, attacking_player, territory_name, attacking_from, is_aa_attack=False, air_units=None, is_ocean=False):
         """
         Add a battle to the game state.
@@ -299,5 +1039,5 @@ class GameState:
         self.battles = sorted(
             self.battles,
             key=lambda x: (not x.get('is_aa_attack', False),
-                           not TERRITORY_DATA[x['location']]['is_ocean'])
+                           not MAP_GRAPH.get_is_ocean(x['location']))
         )
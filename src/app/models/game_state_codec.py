@@ -0,0 +1,256 @@
+import base64
+from uuid import UUID
+
+from app.models.territory_data import TERRITORY_DATA
+
+"""
+Compact encoding of stored game states (GAME_STATE_FORMAT 'compact').
+
+The dict shape from GameState.to_dict repeats the keys of every unit and
+stores 36 character UUIDs. The compact format stores:
+
+    session_id, version       unchanged, queries filter on them
+    format                    COMPACT_FORMAT_VERSION
+    T                         {territory index: {'t': team, 'u': units, 'f': has_factory}}
+    B                         battles with short keys and territory indices
+    P                         {territory index: factory production count}
+
+A unit is a list [id, unit type code, team, movement] with its cargo units appended
+as a fifth item when it has any. UUIDs are stored as 22 character base64 strings.
+Unit stacks (see unit_stacks.py) are lists of [unit type code, team, movement, count],
+with the skipped positions as a fifth item when there are any.
+
+Territories are keyed by their index in TERRITORY_DATA, so every territory can be
+updated with a dotted path (names like Ukraine S.S.R. cannot).
+
+Unit type codes and territory indices are positions in UNIT_TYPES and TERRITORY_NAMES.
+Only append to them; any other change needs a new format version.
+
+"""
+
+COMPACT_FORMAT_VERSION = 1
+
+UNIT_TYPES = ['INFANTRY', 'ARTILLERY', 'TANK', 'ANTI-AIRCRAFT', 'INDUSTRIAL-COMPLEX', 'FIGHTER',
+              'BOMBER', 'AIRCRAFT-CARRIER', 'TRANSPORT', 'BATTLESHIP', 'DESTROYER', 'SUBMARINE']
+UNIT_TYPE_CODES = {unit_type: code for code, unit_type in enumerate(UNIT_TYPES)}
+
+TERRITORY_NAMES = list(TERRITORY_DATA)
+TERRITORY_INDICES = {name: str(index)
+                     for index, name in enumerate(TERRITORY_NAMES)}
+
+TERRITORY_KEYS = {'team': 't', 'units': 'u',
+                  'has_factory': 'f', 'stacks': 's'}
+
+BATTLE_KEYS = {
+    'location': 'l',
+    'attack_from': 'af',
+    'attacker': 'a',
+    'turn': 'n',
+    'result': 'r',
+    'attacker_rolls': 'ar',
+    'defender_rolls': 'dr',
+    'is_resolving_turn': 'rt',
+    'hit_battleships': 'hb',
+    'is_aa_attack': 'aa',
+    'air_units': 'au',
+    'is_ocean': 'o',
+    'unloaded_transports': 'ut',
+}
+BATTLE_FIELDS = {key: field for field, key in BATTLE_KEYS.items()}
+
+GAME_STATE_KEYS = {'territories': 'T', 'battles': 'B',
+                   'factory_production_counts': 'P'}
+
+
+def is_compact(data):
+    return data.get('format') is not None
+
+
+def encode_id(unit_id):
+    """
+    Shorten a UUID to 22 characters, other IDs are kept as they are.
+    """
+    try:
+        uuid = UUID(unit_id)
+    except (TypeError, ValueError):
+        return unit_id
+
+    if str(uuid) != unit_id:
+        return unit_id
+
+    return base64.urlsafe_b64encode(uuid.bytes)[:22].decode()
+
+
+def decode_id(unit_id):
+    if not isinstance(unit_id, str) or len(unit_id) != 22:
+        return unit_id
+
+    return str(UUID(bytes=base64.urlsafe_b64decode(unit_id + '==')))
+
+
+def encode_unit(unit):
+    result = [encode_id(unit['unit_id']), UNIT_TYPE_CODES[unit['unit_type']],
+              unit['team'], unit['movement']]
+
+    if unit.get('cargo'):
+        result.append([encode_unit(cargo_unit) for cargo_unit in unit['cargo']])
+
+    return result
+
+
+def decode_unit(data):
+    return {
+        'unit_id': decode_id(data[0]),
+        'team': data[2],
+        'unit_type': UNIT_TYPES[data[1]],
+        'movement': data[3],
+        'cargo': [decode_unit(cargo_unit) for cargo_unit in data[4]] if len(data) > 4 else [],
+    }
+
+
+def encode_territory_field(field, value):
+    if field == 'units':
+        return [encode_unit(unit) for unit in value]
+
+    if field == 'stacks':
+        return [[UNIT_TYPE_CODES[unit_type], *stack]
+                for unit_type, *stack in value]
+
+    return value
+
+
+def encode_territory(territory):
+    return {TERRITORY_KEYS[field]: encode_territory_field(field, value)
+            for field, value in territory.items()}
+
+
+def decode_territory(data):
+    result = {
+        'team': data['t'],
+        'units': [decode_unit(unit) for unit in data['u']],
+        'has_factory': data['f'],
+    }
+
+    if 's' in data:
+        result['stacks'] = [[UNIT_TYPES[code], *stack]
+                            for code, *stack in data['s']]
+
+    return result
+
+
+def encode_battle(battle):
+    result = {}
+
+    for field, value in battle.items():
+        if field in ('location', 'attack_from') and value in TERRITORY_INDICES:
+            value = int(TERRITORY_INDICES[value])
+        elif field == 'air_units':
+            value = [encode_unit(unit) for unit in value]
+        elif field == 'hit_battleships':
+            value = [encode_id(unit_id) for unit_id in value]
+
+        result[BATTLE_KEYS.get(field, field)] = value
+
+    return result
+
+
+def decode_battle(data):
+    result = {}
+
+    for key, value in data.items():
+        field = BATTLE_FIELDS.get(key, key)
+
+        if field in ('location', 'attack_from') and isinstance(value, int):
+            value = TERRITORY_NAMES[value]
+        elif field == 'air_units':
+            value = [decode_unit(unit) for unit in value]
+        elif field == 'hit_battleships':
+            value = [decode_id(unit_id) for unit_id in value]
+
+        result[field] = value
+
+    return result
+
+
+def encode_field(field, value):
+    """
+    Encode a top level game state field.
+
+    :return: Tuple of (compact key, encoded value).
+    """
+    if field == 'territories':
+        return 'T', {TERRITORY_INDICES[name]: encode_territory(territory)
+                     for name, territory in value.items()}
+
+    if field == 'battles':
+        return 'B', [encode_battle(battle) for battle in value]
+
+    if field == 'factory_production_counts':
+        return 'P', {TERRITORY_INDICES[name]: count for name, count in value.items()}
+
+    return field, value
+
+
+def encode_game_state(data):
+    """
+    Encode a game state dict (or some of its fields) in the compact format.
+    """
+    result = dict(encode_field(field, value) for field, value in data.items())
+    result['format'] = COMPACT_FORMAT_VERSION
+
+    return result
+
+
+def decode_game_state(data):
+    """
+    Decode a compact game state to the dict shape, fields that are missing stay missing.
+    """
+    if data['format'] != COMPACT_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported game state format {data['format']}")
+
+    result = {key: value for key, value in data.items()
+              if key not in ('format', 'T', 'B', 'P')}
+
+    if 'T' in data:
+        result['territories'] = {TERRITORY_NAMES[int(index)]: decode_territory(territory)
+                                 for index, territory in data['T'].items()}
+
+    if 'B' in data:
+        result['battles'] = [decode_battle(battle) for battle in data['B']]
+
+    if 'P' in data:
+        result['factory_production_counts'] = {TERRITORY_NAMES[int(index)]: count
+                                               for index, count in data['P'].items()}
+
+    return result
+
+
+def encode_territory_change(territory_name, field, value):
+    """
+    Build the update path and value for a changed territory or territory field.
+
+    :param field: The changed field, or None if the whole territory is set.
+    :return: Tuple of (compact path, encoded value).
+    """
+    path = f"T.{TERRITORY_INDICES[territory_name]}"
+
+    if field is None:
+        return path, encode_territory(value)
+
+    return f"{path}.{TERRITORY_KEYS[field]}", encode_territory_field(field, value)
+
+
+def encode_projection_field(field):
+    """
+    Translate a projected field, ex. territories.Germany to T.<index>.
+    """
+    parts = field.split('.', 1)
+
+    if parts[0] not in GAME_STATE_KEYS:
+        return field
+
+    if len(parts) == 1:
+        return GAME_STATE_KEYS[field]
+
+    return f"T.{TERRITORY_INDICES[parts[1]]}"
@@ -0,0 +1,82 @@
+from pymongo import ASCENDING, IndexModel
+
+"""
+Registry of the indexes each collection needs.
+
+Every query keys on session_id, so it is unique on each collection (with the
+sequence number for the action log and snapshots). Sessions are
+also indexed on status and turn for lobby and cleanup queries.
+
+Indexes are created at app startup (ENSURE_INDEXES) or with `flask ensure-indexes`.
+Creating an index that already exists is a no-op, so this is safe to run on every start.
+
+"""
+
+INDEXES = {
+    'session': [
+        IndexModel([('session_id', ASCENDING)],
+                   name='session_id_unique', unique=True),
+        IndexModel([('status', ASCENDING), ('turn_num', ASCENDING)],
+                   name='status_turn_num'),
+    ],
+    'game_state': [
+        IndexModel([('session_id', ASCENDING)],
+                   name='session_id_unique', unique=True),
+    ],
+    'game_state_backup': [
+        IndexModel([('session_id', ASCENDING)],
+                   name='session_id_unique', unique=True),
+    ],
+    'game_action_log': [
+        IndexModel([('session_id', ASCENDING), ('seq', ASCENDING)],
+                   name='session_id_seq_unique', unique=True),
+    ],
+    'game_state_snapshot': [
+        IndexModel([('session_id', ASCENDING), ('seq', ASCENDING)],
+                   name='session_id_seq_unique', unique=True),
+    ],
+}
+
+
+def ensure_indexes(db):
+    """
+    Create all registered indexes.
+
+    :param db: The database (storage.db).
+    :return: None
+    """
+    for collection_name, indexes in INDEXES.items():
+        db[collection_name].create_indexes(indexes)
+
+
+def get_index_report(db):
+    """
+    Compare the registry against the indexes in the database.
+
+    - missing: registered but not in the database
+    - unregistered: in the database but not in the registry
+    - unused: in the database with no recorded uses since the server started
+
+    :param db: The database (storage.db).
+    :return: Dict of report type to a list of 'collection.index_name' strings.
+    """
+    report = {'missing': [], 'unregistered': [], 'unused': []}
+
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+
+        registered_names = [index.document['name'] for index in indexes]
+        existing_names = list(collection.index_information())
+
+        report['missing'].extend(f"{collection_name}.{name}" for name in registered_names
+                                 if name not in existing_names)
+
+        report['unregistered'].extend(f"{collection_name}.{name}" for name in existing_names
+                                      if name not in registered_names and name != '_id_')
+
+        for index_stats in collection.aggregate([{'$indexStats': {}}]):
+            if index_stats['name'] != '_id_' and not index_stats['accesses']['ops']:
+                report['unused'].append(
+                    f"{collection_name}.{index_stats['name']}")
+
+    return report
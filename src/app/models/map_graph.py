@@ -0,0 +1,104 @@
+from app.models.territory_data import TERRITORY_DATA
+
+"""
+The map compiled from territories.json for rule checks and pathfinding.
+
+Territories get integer IDs, their position in TERRITORY_DATA (the same order
+game_state_codec.py indexes territories by). Per territory data is kept in flat
+tuples indexed by ID, and adjacency as frozensets of IDs and as bitsets, with
+separate views:
+
+    neighbors        every neighbor, as listed in territories.json (air units)
+    land_neighbors   land to land
+    sea_neighbors    ocean to ocean
+    coast_neighbors  land to ocean and ocean to land (loading and unloading transports)
+
+Adjacency is exactly as listed, neighbors are not made symmetric and names that are
+not territories are dropped.
+
+The map is compiled once when the module is imported, from the already loaded
+TERRITORY_DATA (about a millisecond).
+
+"""
+
+
+class MapGraph:
+    """
+    Immutable compiled map. Methods take territory names, the tuples are indexed by ID.
+    """
+
+    __slots__ = ('names', 'ids', 'is_ocean', 'power', 'is_capital', 'original_team',
+                 'neighbors', 'land_neighbors', 'sea_neighbors', 'coast_neighbors', 'neighbor_bits')
+
+    def __init__(self, territory_data):
+        names = tuple(territory_data)
+        ids = {name: territory_id for territory_id, name in enumerate(names)}
+
+        is_ocean = tuple(territory_data[name]['is_ocean'] for name in names)
+
+        neighbors = tuple(frozenset(ids[neighbor] for neighbor in territory_data[name]['neighbors']
+                                    if neighbor in ids)
+                          for name in names)
+
+        def view(keep):
+            return tuple(frozenset(neighbor_id for neighbor_id in neighbor_ids
+                                   if keep(is_ocean[territory_id], is_ocean[neighbor_id]))
+                         for territory_id, neighbor_ids in enumerate(neighbors))
+
+        self._set('names', names)
+        self._set('ids', ids)
+        self._set('is_ocean', is_ocean)
+        self._set('power', tuple(territory_data[name]['power'] for name in names))
+        self._set('is_capital', tuple(territory_data[name]['is_capital'] for name in names))
+        self._set('original_team', tuple(territory_data[name]['team'] for name in names))
+        self._set('neighbors', neighbors)
+        self._set('land_neighbors', view(lambda ocean, neighbor_ocean: not ocean and not neighbor_ocean))
+        self._set('sea_neighbors', view(lambda ocean, neighbor_ocean: ocean and neighbor_ocean))
+        self._set('coast_neighbors', view(lambda ocean, neighbor_ocean: ocean != neighbor_ocean))
+        self._set('neighbor_bits', tuple(sum(1 << neighbor_id for neighbor_id in neighbor_ids)
+                                         for neighbor_ids in neighbors))
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MapGraph is immutable.")
+
+    def __repr__(self):
+        return f"<MapGraph(territories={len(self.names)})>"
+
+    def are_neighbors(self, territory_name, neighbor_name):
+        """
+        :return: Bool, if neighbor_name is listed as a neighbor of territory_name.
+        """
+        territory_id = self.ids.get(territory_name)
+        neighbor_id = self.ids.get(neighbor_name)
+
+        if territory_id is None or neighbor_id is None:
+            return False
+
+        return bool(self.neighbor_bits[territory_id] >> neighbor_id & 1)
+
+    def get_neighbor_names(self, territory_name, view='neighbors'):
+        """
+        :param view: 'neighbors', 'land_neighbors', 'sea_neighbors' or 'coast_neighbors'.
+        :return: List of the neighbor names, in ID order.
+        """
+        neighbor_ids = getattr(self, view)[self.ids[territory_name]]
+
+        return [self.names[neighbor_id] for neighbor_id in sorted(neighbor_ids)]
+
+    def get_power(self, territory_name):
+        return self.power[self.ids[territory_name]]
+
+    def get_is_ocean(self, territory_name):
+        return self.is_ocean[self.ids[territory_name]]
+
+    def get_is_capital(self, territory_name):
+        return self.is_capital[self.ids[territory_name]]
+
+    def get_original_team(self, territory_name):
+        return self.original_team[self.ids[territory_name]]
+
+
+MAP_GRAPH = MapGraph(TERRITORY_DATA)
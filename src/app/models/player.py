@@ -15,12 +15,15 @@ A Player is:
 
 
 class Player:
-    def __init__(self, player_id=None, session_id=None, country=None, ipcs=0, mobilization_units=[]):
+    __slots__ = ('player_id', 'session_id', 'country', 'ipcs', 'mobilization_units')
+
+    def __init__(self, player_id=None, session_id=None, country=None, ipcs=0, mobilization_units=None):
         self.player_id = player_id or str(uuid4())
         self.session_id = str(session_id)
         self.country = country
         self.ipcs = ipcs
-        self.mobilization_units = mobilization_units
+        # a new list per player, a shared default list would be mutated by every player
+        self.mobilization_units = mobilization_units if mobilization_units is not None else []
 
         if country is None or session_id is None:
             raise ValueError(
@@ -37,10 +40,19 @@ class Player:
             f"apcs={self.ipcs}>"
         )
 
-    def to_dict(self):
+    def to_dict(self, sanitize=False):
         """
         Converts the Player object to a dictionary for JSON serialization.
+
+        :param sanitize: Only include the data other players may see.
         """
+        if sanitize:
+            return {
+                'country': self.country,
+                'ipcs': self.ipcs,
+                'mobilization_units': self.mobilization_units,
+            }
+
         return {
             'player_id': self.player_id,
             'session_id': self.session_id,
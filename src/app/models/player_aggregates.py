@@ -0,0 +1,74 @@
+from app.models.map_graph import MAP_GRAPH
+
+"""
+Per player totals over the territories, so purchases and the end of a round do
+not scan the whole map.
+
+The totals are built from the territories once per loaded game state, then kept
+up to date by GameState.set_territory_team and GameState.add_factory. Territories
+must not change team or gain a factory any other way, CHECK_GAME_INDEXES
+compares the totals against a full scan after every action.
+
+"""
+
+
+class PlayerAggregates:
+    """
+    Totals for one team:
+        territory_count: controlled territories, including ocean territories
+        factory_count: controlled territories with an industrial complex
+        production_capacity: power of the controlled territories with an industrial complex
+        income: power of the controlled territories, collected at the end of a round
+    """
+
+    def __init__(self, territory_count=0, factory_count=0, production_capacity=0, income=0):
+        self.territory_count = territory_count
+        self.factory_count = factory_count
+        self.production_capacity = production_capacity
+        self.income = income
+
+    def __repr__(self):
+        return (
+            f"<PlayerAggregates(territory_count={self.territory_count}, factory_count={self.factory_count}, "
+            f"production_capacity={self.production_capacity}, income={self.income})>"
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, PlayerAggregates) and self.to_dict() == other.to_dict()
+
+    def to_dict(self):
+        return {
+            'territory_count': self.territory_count,
+            'factory_count': self.factory_count,
+            'production_capacity': self.production_capacity,
+            'income': self.income,
+        }
+
+    def add_territory(self, territory_name, has_factory, sign=1):
+        """
+        Add a controlled territory to the totals, or remove it with sign=-1.
+        """
+        power = MAP_GRAPH.get_power(territory_name)
+
+        self.territory_count += sign
+        self.income += sign * power
+
+        if has_factory:
+            self.factory_count += sign
+            self.production_capacity += sign * power
+
+
+def build_player_aggregates(territories):
+    """
+    Scan the territories for the totals of every team that controls one.
+
+    :param territories: Dict of territory name to Territory.
+    :return: Dict of team number to PlayerAggregates.
+    """
+    aggregates = {}
+
+    for territory_name, territory in territories.items():
+        aggregates.setdefault(territory.team, PlayerAggregates()).add_territory(
+            territory_name, territory.has_factory)
+
+    return aggregates
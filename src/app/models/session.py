@@ -1,9 +1,11 @@
+from copy import deepcopy
 from uuid import uuid4
 from enum import Enum
 
-from app.extensions import mongo
+from app.extensions import storage, events
 from app.models.player import Player
 from app.models.order_of_play import order_of_play
+from app.models.version import VersionConflictError, version_filter
 
 """
 This is the session object. It tracks the state of a game session
@@ -14,6 +16,7 @@ A Session is:
     List of Player
     SessionStatus
     Current Turn
+    Version (incremented on every update)
 
 A Player is:
     Player ID
@@ -39,14 +42,22 @@ class PhaseNumber(Enum):
     MOBILIZE = 4
 
 
+SESSION_FIELDS = ['session_id', 'players',
+                  'status', 'turn_num', 'phase_num', 'version']
+
+
 class Session:
-    def __init__(self, session_id=None, players=None, status=SessionStatus.TEAM_SELECT, turn_num=0, phase_num=PhaseNumber.PURCHASE_UNITS):
+    def __init__(self, session_id=None, players=None, status=SessionStatus.TEAM_SELECT, turn_num=0, phase_num=PhaseNumber.PURCHASE_UNITS, version=0):
         self.session_id = str(
             session_id) if session_id is not None else str(uuid4())
         self.players = players if players is not None else []
         self.status = status
         self.turn_num = turn_num
         self.phase_num = phase_num
+        self.version = version
+
+        # last persisted session as a dict, None if never saved
+        self._snapshot = None
 
         # if the game is being created for first time, assign a uuid for the session
 
@@ -72,16 +83,21 @@ class Session:
             'status': self.status.name,
             'turn_num': self.turn_num,
             'phase_num': self.phase_num.value,
+            'version': self.version,
         }
 
         if sanitize_players:
-            result['players'] = [{'country': player.country,
-                                  'ipcs': player.ipcs,
-                                  'mobilization_units': player.mobilization_units} for player in self.players
-                                 ]
+            result['players'] = [player.to_dict(sanitize=True)
+                                 for player in self.players]
 
         return result
 
+    def __json__(self):
+        """
+        The session for the app's JSON provider, with sanitized players.
+        """
+        return self.to_dict(sanitize_players=True)
+
     @classmethod
     def from_dict(cls, data):
         """
@@ -92,24 +108,32 @@ class Session:
         If a session is missing values, this will raise an error.
         """
         try:
-            return cls(session_id=data['session_id'],
+            session = cls(session_id=data['session_id'],
                        players=[Player.from_dict(player)
                                 for player in data['players']],
                        status=SessionStatus[data['status']],
                        turn_num=data['turn_num'],
                        phase_num=PhaseNumber(data['phase_num']),
+                       version=data.get('version', 0),
                        )
         except KeyError as e:
             # TODO log error
             raise ValueError(
                 f"Failed to cast Session json to class. Missing required key: {e}")
 
+        # data came from the db, so it is the persisted version
+        session._snapshot = deepcopy(session.get_update_data())
+
+        return session
+
     @staticmethod
     def get_session_by_session_id(session_id, convert_to_class=True):
         """
         Get a session by session ID.
         """
-        result = mongo.db.session.find_one({'session_id': session_id})
+        # the game state may be embedded in the session document
+        result = storage.db.session.find_one(
+            {'session_id': session_id}, {'game_state': 0})
 
         if not result:
             return None
@@ -122,27 +146,116 @@ class Session:
 
         return result
 
+    @staticmethod
+    def get_session_fields_by_session_id(session_id, fields, sanitize_players=False):
+        """
+        Get only some fields of a session by session ID.
+
+        Only the requested fields are sent by the db, ex. ['turn_num', 'phase_num']
+        to check whose turn it is.
+
+        :param fields: List of session field names.
+        :param sanitize_players: Only include the player data other players may see.
+        :return: Dict of session_id, version and the requested fields, or None if not found.
+        """
+        invalid_fields = [field for field in fields if field not in SESSION_FIELDS]
+
+        if invalid_fields:
+            raise ValueError(
+                f"Invalid session fields: {', '.join(invalid_fields)}")
+
+        projection = {field: 1 for field in fields}
+        projection.update({'_id': 0, 'session_id': 1, 'version': 1})
+
+        result = storage.db.session.find_one(
+            {'session_id': session_id}, projection)
+
+        if not result:
+            return None
+
+        if sanitize_players and 'players' in result:
+            result['players'] = [Player.from_dict(player).to_dict(sanitize=True)
+                                 for player in result['players']]
+
+        return result
+
     @staticmethod
     def create_session():
         """
         Create a session.
         """
         session = Session()
-        mongo.db.session.insert_one(session.to_dict())
+        storage.db.session.insert_one(session.to_dict())
         return session
 
     def update(self):
         """
         Update a session.
 
+        The update only applies if the session has not been updated since it was read.
+        Raises VersionConflictError otherwise. Nothing is written if there are no changes.
+
         Returns None.
         """
-        mongo.db.session.update_one(
-            # Filter to find the session by its unique identifier
-            {'session_id': self.session_id},
-            {'$set': self.to_dict()}  # Update the session with the new data
+        query, operations = self.get_update_operations()
+
+        if not operations:
+            return
+
+        result = storage.db.session.update_one(
+            # Filter to find the session by its unique identifier and read version
+            {'session_id': self.session_id, **query},
+            operations  # Update the session with the new data
         )
 
+        if not result.matched_count:
+            raise VersionConflictError(
+                f"Session {self.session_id} was updated by another request.")
+
+        self.mark_updated()
+
+        events.publish(self.session_id, {'session': self.get_event_data()})
+
+    def get_update_operations(self):
+        """
+        Build the versioned update for the session.
+
+        :return: Tuple of (version query, update operations or None if nothing changed).
+        """
+        query = {'version': version_filter(self.version)}
+        data = self.get_update_data()
+
+        if data == self._snapshot:
+            return query, None
+
+        return query, {'$set': data, '$inc': {'version': 1}}
+
+    def get_update_data(self):
+        """
+        The session as a dict, without the version which is only ever incremented.
+        """
+        data = self.to_dict()
+        del data['version']
+        return data
+
+    def mark_updated(self):
+        """
+        Bump the version and record the current data as persisted after a successful update.
+        """
+        self.version += 1
+        self._snapshot = deepcopy(self.get_update_data())
+
+    def get_event_data(self):
+        """
+        The session fields sent to event subscribers when the session is updated.
+        """
+        return {
+            'version': self.version,
+            'status': self.status.name,
+            'turn_num': self.turn_num,
+            'phase_num': self.phase_num.value,
+        }
+
     def get_player_by_id(self, player_id):
         """
         Get the team of a player by their player ID.
@@ -0,0 +1,247 @@
+from copy import deepcopy
+
+from app.extensions import storage, game_cache, events
+from app.models.session import Session
+from app.models.game_state import GameState, EMBEDDED_GAME_STATE_PREFIX, is_game_state_embedded
+from app.models.version import VersionConflictError
+
+"""
+Loads and saves a session together with its game state.
+
+With GAME_STORAGE_MODE 'embedded' the game state is stored inside the session
+document, so both are read with one find and written with one update.
+Otherwise they are separate documents and this falls back to one call each.
+
+With GAME_CACHE_ENABLED the hydrated objects are kept in the worker's game cache
+between requests, see extensions/game_cache.py.
+
+"""
+
+
+def get_session_and_game_state_by_session_id(session_id):
+    """
+    Get a session and its game state by session ID.
+
+    :return: Tuple of (Session, GameState), either is None if not found.
+    """
+    if game_cache.enabled:
+        versions = get_versions_by_session_id(session_id)
+        entry = game_cache.get(session_id, versions) if versions else None
+
+        if entry:
+            return entry.session, entry.game_state
+
+    session, game_state = load_session_and_game_state(session_id)
+
+    if game_cache.enabled and session and game_state:
+        game_cache.put(session_id, session, game_state,
+                       estimate_size(game_state))
+
+    return session, game_state
+
+
+def load_session_and_game_state(session_id):
+    """
+    Load a session and its game state from the db.
+
+    :return: Tuple of (Session, GameState), either is None if not found.
+    """
+    if not is_game_state_embedded():
+        session = Session.get_session_by_session_id(session_id)
+
+        if not session:
+            return None, None
+
+        return session, GameState.get_game_state_by_session_id(session_id)
+
+    result = storage.db.session.find_one({'session_id': session_id}, {'_id': 0})
+
+    if not result:
+        return None, None
+
+    game_state = result.pop('game_state', None)
+
+    return (Session.from_dict(result),
+            GameState.from_dict(game_state) if game_state else None)
+
+
+def get_versions_by_session_id(session_id):
+    """
+    Get only the stored versions of a session and its game state.
+
+    :return: Tuple of (session version, game state version), or None if not found.
+    """
+    if is_game_state_embedded():
+        result = storage.db.session.find_one(
+            {'session_id': session_id}, {'_id': 0, 'version': 1, 'game_state.version': 1})
+        game_state = result.get('game_state') if result else None
+    else:
+        result = Session.get_session_fields_by_session_id(
+            session_id, ['version'])
+        game_state = GameState.get_game_state_fields_by_session_id(
+            session_id, fields=['version'])
+
+    if not result or not game_state:
+        return None
+
+    return result.get('version', 0), game_state.get('version', 0)
+
+
+def update_session_and_game_state(session, game_state):
+    """
+    Update a session and its game state.
+
+    Raises VersionConflictError if either was updated since they were read,
+    neither update is kept in that case (see write_session_and_game_state).
+
+    With a write behind game cache the writes are held by the cache and sent later.
+
+    Returns None.
+    """
+    session_query, session_operations = session.get_update_operations()
+    game_state_query, game_state_operations, current_territories = game_state.get_update_operations(
+        prefix=EMBEDDED_GAME_STATE_PREFIX if is_game_state_embedded() else '')
+
+    # list of (collection name, filter, update operations)
+    writes = []
+
+    if is_game_state_embedded():
+        # merge both updates into one
+        operations = {}
+
+        for update in [session_operations, game_state_operations]:
+            for operator, fields in (update or {}).items():
+                operations.setdefault(operator, {}).update(fields)
+
+        if operations:
+            writes.append(('session', {'session_id': session.session_id, **session_query, **game_state_query},
+                           operations))
+
+    else:
+        if session_operations:
+            writes.append(('session', {'session_id': session.session_id, **session_query},
+                           session_operations))
+
+        if game_state_operations:
+            writes.append(('game_state', {'session_id': game_state.session_id, **game_state_query},
+                           game_state_operations))
+
+    # with a write behind cache, the writes are held by the cache instead
+    if not game_cache.write_behind:
+        if len(writes) > 1:
+            write_session_and_game_state(session, game_state, writes)
+        else:
+            for collection_name, query, operations in writes:
+                result = storage.db[collection_name].update_one(query, operations)
+
+                if not result.matched_count:
+                    raise VersionConflictError(
+                        f"Session {session.session_id} was updated by another request.")
+
+    event = {}
+
+    if session_operations:
+        session.mark_updated()
+        event['session'] = session.get_event_data()
+
+    if game_state_operations:
+        game_state.mark_updated(current_territories)
+        event['game_state'] = game_state.get_event_data()
+
+    if game_cache.enabled:
+        # held writes are sent later, copy them before the objects change again
+        game_cache.commit(session.session_id,
+                          deepcopy(writes) if game_cache.write_behind else None,
+                          (session.version, game_state.version))
+
+    if event:
+        events.publish(session.session_id, event)
+
+
+def write_session_and_game_state(session, game_state, writes):
+    """
+    Write the separate session and game state documents.
+
+    If the game state was updated by another request, the session update is
+    undone so a retried route does not apply its session changes twice. Only the
+    fields this update changed are put back, so concurrent updates of other
+    fields (ex. the action log counter) are kept.
+
+    The two writes are not atomic, another request may read the session in
+    between. Use GAME_STORAGE_MODE 'embedded' where that matters.
+
+    :param writes: The session write then the game state write, as
+        (collection name, filter, update operations).
+    """
+    (_, session_query, session_operations), (_, game_state_query, game_state_operations) = writes
+
+    previous_session = storage.db.session.find_one_and_update(
+        session_query, session_operations,
+        projection={'_id': 0, **{field: 1 for field in session_operations.get('$set', {})}})
+
+    if previous_session is None:
+        raise VersionConflictError(
+            f"Session {session.session_id} was updated by another request.")
+
+    result = storage.db.game_state.update_one(game_state_query, game_state_operations)
+
+    if not result.matched_count:
+        storage.db.session.update_one(
+            {'session_id': session.session_id, 'version': session.version + 1},
+            get_inverse_operations(session_operations, previous_session))
+
+        raise VersionConflictError(
+            f"Game state {game_state.session_id} was updated by another request.")
+
+
+def get_inverse_operations(operations, previous_document):
+    """
+    Build the update that undoes $set and $inc update operations.
+
+    :param previous_document: The document before the update, with at least the $set fields.
+    :return: Update operations.
+    """
+    inverse = {}
+
+    for field in operations.get('$set', {}):
+        if field in previous_document:
+            inverse.setdefault('$set', {})[field] = previous_document[field]
+        else:
+            inverse.setdefault('$unset', {})[field] = ''
+
+    for field, amount in operations.get('$inc', {}).items():
+        inverse.setdefault('$inc', {})[field] = -amount
+
+    return inverse
+
+
+def flush_held_writes(session_id):
+    """
+    Send any writes the game cache holds for a session, before writing to it
+    directly or reading it from the db.
+    """
+    if game_cache.write_behind:
+        game_cache.flush(session_id)
+
+
+def get_held_versions(session_id):
+    """
+    Get the versions of a game whose writes the game cache still holds, the
+    versions in the db are behind these.
+
+    :return: Tuple of (session version, game state version), or None if no writes are held.
+    """
+    if not game_cache.write_behind:
+        return None
+
+    return game_cache.get_held_versions(session_id)
+
+
+def estimate_size(game_state):
+    """
+    Roughly estimate the memory used by a hydrated game, in bytes, for the cache budget.
+    """
+    unit_count = sum(len(territory.units) + sum(len(unit.cargo) for unit in territory.units)
+                     for territory in game_state.territories.values())
+
+    return 20000 + 1000 * len(game_state.territories) + 600 * unit_count
@@ -6,7 +6,7 @@ from app.models.unit import Unit
 
 A Territory is:
     Team ID
-    List of Unit
+    Units (TerritoryUnits, by unit ID)
     has_factory (bool)
 
 A Unit is:
@@ -18,17 +18,121 @@ A Unit is:
 """
 
 
+class TerritoryUnits:
+    """
+    A territory's units keyed by unit ID, in the order they were added.
+
+    Iterates like a list of Unit. Units are found, taken and put by ID in constant
+    time, so moving a stack of units is linear in the number of units moved.
+    """
+
+    __slots__ = ('_units',)
+
+    def __init__(self, units=None):
+        self._units = {unit.unit_id: unit for unit in units or ()}
+
+    def __repr__(self):
+        return f"<TerritoryUnits({list(self._units.values())})>"
+
+    def __iter__(self):
+        return iter(self._units.values())
+
+    def __len__(self):
+        return len(self._units)
+
+    def __contains__(self, unit):
+        return self.find(unit) is not None
+
+    def __eq__(self, other):
+        if not isinstance(other, (TerritoryUnits, list)):
+            return NotImplemented
+
+        return list(self) == list(other)
+
+    def __json__(self):
+        return list(self._units.values())
+
+    def get(self, unit_id):
+        """
+        :return: The unit with the ID, or None if it is not in the territory.
+        """
+        return self._units.get(unit_id)
+
+    def find(self, unit_to_find):
+        """
+        Find the territory's unit equal to the given unit (see Unit.__eq__,
+        the ID, type, team and movement must all match).
+
+        :return: The territory's unit, or None if not found.
+        """
+        unit = self._units.get(unit_to_find.unit_id)
+
+        return unit if unit is not None and unit == unit_to_find else None
+
+    def put(self, units):
+        """
+        Add units after the existing units.
+        """
+        for unit in units:
+            self._units[unit.unit_id] = unit
+
+    def take(self, unit_ids):
+        """
+        Remove units by ID.
+
+        :return: List of the removed units, in the order of the IDs. Raises KeyError
+            if a unit is not in the territory.
+        """
+        return [self._units.pop(unit_id) for unit_id in unit_ids]
+
+    def append(self, unit):
+        self._units[unit.unit_id] = unit
+
+    def extend(self, units):
+        self.put(units)
+
+    def remove(self, unit):
+        """
+        Remove a unit by its ID. Raises KeyError if it is not in the territory.
+        """
+        del self._units[unit.unit_id]
+
+    def pop(self):
+        """
+        Remove the last added unit.
+
+        :return: The unit.
+        """
+        return self._units.popitem()[1]
+
+
 class Territory:
+    __slots__ = ('team', '_units', 'has_factory', '_snapshot')
+
     def __init__(self, team, units=None, has_factory=None):
         self.team = team
-        self.units = units if units is not None else []
+        self.units = units
         self.has_factory = has_factory if has_factory is not None else False
 
+        # last persisted dict of this territory, None if never saved
+        self._snapshot = None
+
     def __repr__(self):
         return (
             f"<Territory(team={self.team}, units={len(self.units)}, has_factory={self.has_factory}>"
         )
 
+    @property
+    def units(self):
+        return self._units
+
+    @units.setter
+    def units(self, units):
+        """
+        :param units: List or iterable of Unit, kept as TerritoryUnits.
+        """
+        self._units = units if isinstance(units, TerritoryUnits) else TerritoryUnits(units)
+
     def to_dict(self):
         """
         Converts the Unit object to a dictionary for JSON serialization.
@@ -39,6 +143,17 @@ class Territory:
             'has_factory': self.has_factory,
         }
 
+    def __json__(self):
+        """
+        The territory for the app's JSON provider, same as to_dict but units are
+        serialized by the provider.
+        """
+        return {
+            'team': self.team,
+            'units': self.units,
+            'has_factory': self.has_factory,
+        }
+
     @classmethod
     def from_dict(cls, data):
         """
@@ -47,7 +162,7 @@ class Territory:
         If a unit is missing values, this will raise an error.
         """
         try:
-            return cls(
+            territory = cls(
                 team=data['team'],
                 units=[Unit.from_dict(unit) for unit in data['units']],
                 has_factory=data['has_factory'],
@@ -56,3 +171,34 @@ class Territory:
             # TODO log error
             raise ValueError(
                 f"Failed to cast Territory json to class: {e}")
+
+        # data came from the db, so it is the persisted version
+        territory._snapshot = data
+
+        return territory
+
+    def get_changes(self, current=None):
+        """
+        Compare the territory against its last persisted version.
+
+        A territory that was never persisted reports every field as changed.
+
+        :param current: The territory as a dict, if it was already serialized.
+        :return: Dict of changed field names to their new values.
+        """
+        current = current if current is not None else self.to_dict()
+
+        if self._snapshot is None:
+            return current
+
+        return {field: value for field, value in current.items()
+                if self._snapshot.get(field) != value}
+
+    def mark_persisted(self, current=None):
+        """
+        Record the territory's current data as the persisted version.
+
+        :param current: The territory as a dict, if it was already serialized.
+        :return: None
+        """
+        self._snapshot = current if current is not None else self.to_dict()
@@ -16,6 +16,9 @@ A Unit is:
 
 
 class Unit:
+    # no per-instance __dict__, a late game hydrates thousands of units
+    __slots__ = ('unit_id', 'team', 'unit_type', 'movement', 'cargo', 'in_combat_this_turn')
+
     def __init__(self, unit_id=None, team=None, unit_type=None, movement=None, cargo=None):
         self.unit_id = unit_id or str(uuid4())
         self.team = team
@@ -64,6 +67,19 @@ class Unit:
             'cargo': [unit.to_dict() for unit in self.cargo],
         }
 
+    def __json__(self):
+        """
+        The unit for the app's JSON provider, same as to_dict but cargo units are
+        serialized by the provider.
+        """
+        return {
+            'unit_id': self.unit_id,
+            'team': self.team,
+            'unit_type': self.unit_type,
+            'movement': self.movement,
+            'cargo': self.cargo,
+        }
+
     @classmethod
     def from_dict(cls, data):
         """
@@ -72,12 +88,15 @@ class Unit:
         If a unit is missing values, this will raise an error.
         """
         try:
+            cargo = data.get('cargo')
+
             return cls(
                 unit_id=data['unit_id'],
                 team=data['team'],
                 unit_type=data['unit_type'],
                 movement=data['movement'],
-                cargo=[Unit.from_dict(unit) for unit in data.get('cargo', [])],
+                # most units carry nothing, skip building a list to copy from
+                cargo=[Unit.from_dict(unit) for unit in cargo] if cargo else [],
             )
         except KeyError as e:
             # TODO log error
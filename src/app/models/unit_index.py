@@ -0,0 +1,38 @@
+"""
+Index of where every unit of a game state is, by unit ID.
+
+The index is built from the territories once per loaded game state, when first used,
+then kept up to date by the GameState unit methods (add_units, remove_unit,
+move_units_to, load_units and unload_units). Units must not be added to or removed from
+a territory or a transport any other way, CHECK_GAME_INDEXES compares the index
+against a full scan after every action.
+
+Stacked unit IDs are assigned again when a game is saved, which rebuilds the index.
+
+"""
+
+
+def build_unit_index(territories):
+    """
+    Scan the territories for every unit, including units carried by transports and carriers.
+
+    :param territories: Dict of territory name to Territory.
+    :return: Dict of unit ID to tuple of (Unit, territory name, transport or None).
+    """
+    index = {}
+
+    for territory_name, territory in territories.items():
+        for unit in territory.units:
+            index_unit(index, unit, territory_name)
+
+    return index
+
+
+def index_unit(index, unit, territory_name, transport=None):
+    """
+    Add a unit and its cargo to the index.
+    """
+    index[unit.unit_id] = (unit, territory_name, transport)
+
+    for cargo_unit in unit.cargo:
+        index[cargo_unit.unit_id] = (cargo_unit, territory_name, unit)
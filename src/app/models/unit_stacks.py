@@ -0,0 +1,196 @@
+from uuid import NAMESPACE_URL, uuid5
+
+"""
+Count based storage of identical units (GAME_STATE_UNIT_STACKS).
+
+A territory's units are stored as individual units plus stacks of
+[unit type, team, movement, count]. Units only need to be stored individually when
+they are told apart from identical units:
+
+    - units carrying cargo, and their cargo
+    - units referenced by a battle (air units under AA fire, hit battleships,
+      unloaded transports and their cargo)
+
+Stacked units do not store an ID. Their ID is derived from the session, territory,
+stack and position in the stack, and is assigned again every time the game is saved,
+so a unit that moves into another stack gets a new ID. Services keep working with
+Unit objects, stacks are expanded when a game state is loaded.
+
+A unit that leaves its stack to be stored individually (ex. an air unit under AA
+fire) keeps its derived ID. Positions whose ID is taken by an individual unit are
+skipped, and stored with the stack as a fifth item so loading a single territory
+gives the same IDs: [unit type, team, movement, count, skipped positions].
+
+"""
+
+
+def get_pinned_unit_ids(battles):
+    """
+    Get the IDs of units referenced by battles, these are never stacked.
+
+    :return: Set of unit IDs.
+    """
+    pinned_unit_ids = set()
+
+    for battle in battles:
+        pinned_unit_ids.update(unit['unit_id']
+                               for unit in battle.get('air_units', []))
+        pinned_unit_ids.update(battle.get('hit_battleships', []))
+
+        # clients match rolls to units by ID
+        pinned_unit_ids.update(roll['unit_id'] for roll in battle.get('attacker_rolls', []))
+        pinned_unit_ids.update(roll['unit_id'] for roll in battle.get('defender_rolls', []))
+
+        for transport in battle.get('unloaded_transports', []):
+            for transport_id, cargo_unit_ids in transport.items():
+                pinned_unit_ids.add(transport_id)
+                pinned_unit_ids.update(cargo_unit_ids)
+
+    return pinned_unit_ids
+
+
+def stacked_unit_id(session_id, territory_name, stack_key, index):
+    unit_type, team, movement = stack_key
+    return str(uuid5(NAMESPACE_URL,
+                     f"ava:{session_id}/{territory_name}/{unit_type}/{team}/{movement}/{index}"))
+
+
+def get_stack_positions(session_id, territory_name, stack_key, count, taken_unit_ids):
+    """
+    The positions a stack's unit IDs are derived from, skipping positions whose ID
+    is taken by an individual unit.
+
+    :param taken_unit_ids: Set of the IDs of the game's individual units.
+    :return: List of count positions.
+    """
+    positions = []
+    index = 0
+
+    while len(positions) < count:
+        if stacked_unit_id(session_id, territory_name, stack_key, index) not in taken_unit_ids:
+            positions.append(index)
+
+        index += 1
+
+    return positions
+
+
+def get_individual_unit_ids(territories, pinned_unit_ids):
+    """
+    Get the IDs of the units stored individually, in any territory.
+
+    :param territories: Dict of territory name to Territory.
+    :return: Set of unit IDs.
+    """
+    individual_unit_ids = set()
+
+    for territory in territories.values():
+        for unit in territory.units:
+            if unit.cargo or unit.unit_id in pinned_unit_ids:
+                individual_unit_ids.add(unit.unit_id)
+                individual_unit_ids.update(cargo_unit.unit_id for cargo_unit in unit.cargo)
+
+    return individual_unit_ids
+
+
+def is_stackable(unit, pinned_unit_ids):
+    """
+    :param unit: The unit as a dict.
+    """
+    return not unit.get('cargo') and unit['unit_id'] not in pinned_unit_ids
+
+
+def get_stack_keys(units):
+    """
+    Group stackable units by (unit type, team, movement), in order of first appearance.
+
+    :param units: List of units as dicts.
+    :return: Dict of stack key to a list of the units' positions.
+    """
+    stacks = {}
+
+    for position, unit in enumerate(units):
+        stack_key = (unit['unit_type'], unit['team'], unit['movement'])
+        stacks.setdefault(stack_key, []).append(position)
+
+    return stacks
+
+
+def assign_stacked_unit_ids(session_id, territory_name, units, pinned_unit_ids, taken_unit_ids):
+    """
+    Put a territory's units in stored order, individual units first and then each
+    stack, and give the stacked units their derived IDs.
+
+    :param units: List of Unit.
+    :param taken_unit_ids: Set of the IDs of the game's individual units, see get_individual_unit_ids.
+    :return: The units in stored order.
+    """
+    individual_units = []
+    stackable_units = []
+
+    for unit in units:
+        if unit.cargo or unit.unit_id in pinned_unit_ids:
+            individual_units.append(unit)
+        else:
+            stackable_units.append(unit)
+
+    stacks = get_stack_keys([{'unit_type': unit.unit_type, 'team': unit.team,
+                              'movement': unit.movement} for unit in stackable_units])
+
+    result = individual_units
+
+    for stack_key, positions in stacks.items():
+        indices = get_stack_positions(session_id, territory_name, stack_key, len(positions), taken_unit_ids)
+
+        for index, position in zip(indices, positions):
+            unit = stackable_units[position]
+            unit.unit_id = stacked_unit_id(
+                session_id, territory_name, stack_key, index)
+            result.append(unit)
+
+    return result
+
+
+def stack_territory(session_id, territory_name, territory, pinned_unit_ids, taken_unit_ids):
+    """
+    Convert a territory dict to its stored shape, with 'units' only holding
+    the individual units and 'stacks' the rest.
+    """
+    individual_units = [unit for unit in territory['units']
+                        if not is_stackable(unit, pinned_unit_ids)]
+    stackable_units = [unit for unit in territory['units']
+                       if is_stackable(unit, pinned_unit_ids)]
+
+    stacks = []
+
+    for stack_key, positions in get_stack_keys(stackable_units).items():
+        indices = get_stack_positions(session_id, territory_name, stack_key, len(positions), taken_unit_ids)
+        skipped = sorted(set(range(indices[-1] + 1)) - set(indices))
+
+        stacks.append([*stack_key, len(positions), skipped] if skipped else [*stack_key, len(positions)])
+
+    return dict(territory, units=individual_units, stacks=stacks)
+
+
+def unstack_territory(session_id, territory_name, territory):
+    """
+    Convert a stored territory back to the territory dict, expanding its stacks.
+    """
+    territory = dict(territory)
+    units = list(territory['units'])
+
+    for unit_type, team, movement, count, *skipped in territory.pop('stacks', []):
+        stack_key = (unit_type, team, movement)
+        skipped = set(skipped[0]) if skipped else set()
+
+        units.extend({
+            'unit_id': stacked_unit_id(session_id, territory_name, stack_key, index),
+            'team': team,
+            'unit_type': unit_type,
+            'movement': movement,
+            'cargo': [],
+        } for index in range(count + len(skipped)) if index not in skipped)
+
+    territory['units'] = units
+
+    return territory
@@ -0,0 +1,29 @@
+"""
+Optimistic concurrency for the session and game_state documents.
+
+Each document has a version that is incremented on every update. Updates only
+apply if the version in the db is still the version that was read, otherwise
+another request changed the document first.
+
+"""
+
+
+class VersionConflictError(Exception):
+    """
+    Raised when a document was updated by another request after it was read.
+    """
+
+
+def version_filter(version):
+    """
+    Build the query value matching a document at the given version.
+
+    Documents saved before versioning have no version field, these count as version 0.
+
+    :param version: The version that was read.
+    :return: The value to filter the version field on.
+    """
+    if version == 0:
+        return {'$in': [0, None]}
+
+    return version
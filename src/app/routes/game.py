@@ -1,12 +1,20 @@
-from flask import Blueprint, jsonify, request
+import json
+import queue
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 
 from app.models.session import Session, PhaseNumber
 from app.models.game_state import GameState
-from app.models.unit import Unit
+from app.models.session_game_state import (get_session_and_game_state_by_session_id, get_versions_by_session_id,
+                                           update_session_and_game_state, flush_held_writes, get_held_versions)
+from app.extensions import game_cache, events
 from app.services.session import validate_player
-from app.services.game import (purchase_unit, mobilize_units, move_units, load_transport_with_units,
-                               unload_transport, combat_attack, combat_select_casualties,
-                               combat_retreat, remove_resolved_battles, end_turn)
+from app.routes.helpers import (retry_on_version_conflict, get_list_arg, get_not_modified_response,
+                               versioned_response, get_game_state_response)
+from app.services.game import remove_resolved_battles
+from app.services.reachability import get_reachable_territories
+from app.services.action_log import perform_action, make_action_record, make_batch_record, log_action
 
 
 game_route = Blueprint('game_route', __name__)
@@ -14,8 +22,35 @@ game_route = Blueprint('game_route', __name__)
 
 @game_route.route('/<string:session_id>', methods=['GET'])
 def handle_get_game_state(session_id):
-    game_state = GameState.get_game_state_by_session_id(
-        session_id, convert_to_class=False)
+    """
+    Get game state by session ID.
+
+    ?fields=battles,version and ?territories=Germany,Russia only load and
+    return those fields and territories.
+
+    Responses have an ETag of the game state version, If-None-Match is answered
+    with a 304 after only reading the version.
+    """
+    not_modified = get_not_modified_response(
+        'game_state', lambda: get_game_state_version(session_id))
+    if not_modified:
+        return not_modified
+
+    # writes held by the game cache go first, so the player sees their own actions
+    flush_held_writes(session_id)
+
+    fields = get_list_arg('fields')
+    territory_names = get_list_arg('territories')
+
+    try:
+        if fields or territory_names:
+            game_state = GameState.get_game_state_fields_by_session_id(
+                session_id, fields=fields, territory_names=territory_names)
+        else:
+            game_state = GameState.get_game_state_by_session_id(
+                session_id, convert_to_class=False)
+    except ValueError as e:
+        return jsonify({'status': str(e)}), 400
 
     if not game_state:
         return jsonify({'status': 'Session ID not found.'}), 404
@@ -25,10 +60,131 @@ def handle_get_game_state(session_id):
         'session_id': game_state['session_id'],
         'game_state': game_state,
     }
+    return versioned_response(response, 'game_state', game_state.get('version', 0)), 200
+
+
+@game_route.route('/<string:session_id>/events', methods=['GET'])
+def handle_game_events(session_id):
+    """
+    Stream updates to a session and its game state as server-sent events.
+
+    Each 'update' event is JSON with the parts that changed:
+        session: version, status, turn_num and phase_num
+        game_state: version and the names of the changed territories (null if unknown)
+
+    Updates from other workers are found by checking the stored versions every
+    EVENTS_HEARTBEAT seconds, and only carry the versions. The stream ends after
+    EVENTS_STREAM_TIMEOUT seconds and the client reconnects.
+
+    Only served with EVENTS_ENABLED, otherwise clients poll.
+    """
+    if not current_app.config.get('EVENTS_ENABLED'):
+        return jsonify({'status': 'Game event streams are disabled.'}), 404
+
+    versions = get_held_versions(session_id) or get_versions_by_session_id(session_id)
+
+    if not versions:
+        return jsonify({'status': 'Session ID not found.'}), 404
+
+    heartbeat = current_app.config.get('EVENTS_HEARTBEAT', 15)
+    timeout = current_app.config.get('EVENTS_STREAM_TIMEOUT', 300)
+
+    # subscribe before responding, so no update is missed
+    subscriber = events.subscribe(session_id)
+
+    def stream(versions):
+        try:
+            yield f"retry: {int(heartbeat * 1000)}\n\n"
+
+            deadline = time.monotonic() + timeout
+
+            while time.monotonic() < deadline:
+                try:
+                    event = subscriber.get(
+                        timeout=max(min(heartbeat, deadline - time.monotonic()), 0))
+                except queue.Empty:
+                    event = get_stored_versions_event(session_id, versions)
+
+                    if not event:
+                        yield ": keepalive\n\n"
+                        continue
+
+                versions = (
+                    max(versions[0], event.get('session', {}).get('version', 0)),
+                    max(versions[1], event.get('game_state', {}).get('version', 0)))
+
+                yield (f"id: {versions[0]}.{versions[1]}\n"
+                       f"event: update\n"
+                       f"data: {json.dumps(event)}\n\n")
+        finally:
+            events.unsubscribe(session_id, subscriber)
+
+    return Response(stream_with_context(stream(versions)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@game_route.route('/cache/stats', methods=['GET'])
+def handle_get_game_cache_stats():
+    """
+    Hit, miss and eviction counters of this worker's game cache.
+    """
+    response = {
+        'status': 'Game cache stats found.',
+        'enabled': game_cache.enabled,
+        'write_behind': game_cache.write_behind,
+        'stats': game_cache.get_stats(),
+    }
+    return jsonify(response), 200
+
+
+@game_route.route('/<string:session_id>/reachable', methods=['GET'])
+def handle_get_reachable_territories(session_id):
+    """
+    Get every territory a stack of units can move to this phase, with the fewest moves
+    needed to reach it, ex. ?pid=...&territory=Russia&units=id1,id2
+
+    Only checks movement, see services/reachability.py, nothing is changed.
+    """
+    session, game_state = fetch_session_and_game_state(session_id)
+    if not session or not game_state:
+        return jsonify({'status': 'Session ID not found.'}), 404
+
+    # only read, keep the cached game
+    game_cache.release(session_id)
+
+    if session.phase_num not in [PhaseNumber.COMBAT_MOVE, PhaseNumber.NON_COMBAT_MOVE]:
+        return jsonify({'status': 'Units can only move in combat and non-combat movement phases.'}), 400
+
+    player_id = request.args.get('pid')
+    player = session.get_player_by_id(player_id)
+
+    if not validate_player(session, player):
+        return jsonify({'status': 'Cannot perform actions outside of your turn.'}), 400
+
+    territory_name = request.args.get('territory')
+    territory = game_state.territories.get(territory_name)
+    if not territory:
+        return jsonify({'status': 'Territory not found.'}), 400
+
+    units = [territory.units.get(unit_id) for unit_id in get_list_arg('units') or []]
+    if not units or not all(units):
+        return jsonify({'status': 'All/some units are not in the territory.'}), 400
+
+    if any(unit.team != player.team_num for unit in units):
+        return jsonify({'status': 'Cannot move units of another player.'}), 400
+
+    response = {
+        'status': 'Reachable territories found.',
+        'session_id': session_id,
+        'territory': territory_name,
+        'reachable': get_reachable_territories(session, game_state, player, territory_name, units),
+    }
     return jsonify(response), 200
 
 
 @game_route.route('/<string:session_id>/purchaseunit', methods=['POST'])
+@retry_on_version_conflict
 def handle_purchase_unit(session_id):
     session, game_state = fetch_session_and_game_state(session_id)
     if not session or not game_state:
@@ -48,12 +204,16 @@ def handle_purchase_unit(session_id):
     data = request.get_json()
     unit_type_to_purchase = data.get('unitType')
 
-    result, message = purchase_unit(game_state, player, unit_type_to_purchase)
+    result, message, action = perform_action(session, game_state, 'purchase_unit', {
+        'team_num': player.team_num,
+        'unit_type': unit_type_to_purchase,
+    })
 
     if not result:
         return jsonify({'status': 'Purchase failed. ' + message}), 400
 
-    session.update()
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, action)
 
     response = {
         'status': 'Unit purchase action handled successfully.',
@@ -64,6 +224,7 @@ def handle_purchase_unit(session_id):
 
 
 @game_route.route('/<string:session_id>/moveunits', methods=['POST'])
+@retry_on_version_conflict
 def handle_move_units(session_id):
     # Fetch the session and game state by session ID
     session, game_state = fetch_session_and_game_state(session_id)
@@ -86,24 +247,43 @@ def handle_move_units(session_id):
     territory_b = data.get('territoryB')
     units_to_move = data.get('units')
 
-    result, message = move_units(session, game_state, player,
-                                 territory_a, territory_b, units_to_move)
+    # ex. 'path': ['Karelia S.S.R.', 'Eastern Europe'] moves through every territory
+    # in one request, instead of territoryB
+    path = data.get('path')
+
+    result, message, action = perform_action(session, game_state, 'move_units', {
+        'team_num': player.team_num,
+        'territory_a': territory_a,
+        'territory_b': territory_b,
+        'units': units_to_move,
+        'path': path,
+    })
 
     if not result:
         message = message or 'Invalid troop movement.'
         return jsonify({'status': message}), 400
 
-    game_state.update()
+    # with a path the result is where the units stopped, and the message why
+    # if it is not the end of the path
+    stop = {}
+    if path:
+        stop['stopped_at'] = result
+        stop['stop_reason'] = message
+
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, action)
 
     response = {
         'status': 'Unit movement action handled successfully.',
         'session_id': game_state.session_id,
-        'game_state': game_state.to_dict(),
+        **stop,
+        **get_game_state_response(game_state),
     }
     return jsonify(response), 200
 
 
 @game_route.route('/<string:session_id>/loadtransport', methods=['POST'])
+@retry_on_version_conflict
 def handle_load_transport(session_id):
     # Fetch the session and game state by session ID
     session, game_state = fetch_session_and_game_state(session_id)
@@ -126,27 +306,30 @@ def handle_load_transport(session_id):
     transport = data.get('transport')
     units_to_load = data.get('units')
 
-    # cast json units to class objects
-    transport = Unit.from_dict(transport)
-
-    result, message = load_transport_with_units(game_state, player,
-                                                territory_name, transport, units_to_load)
+    result, message, action = perform_action(session, game_state, 'load_transport_with_units', {
+        'team_num': player.team_num,
+        'territory_name': territory_name,
+        'transport': transport,
+        'units': units_to_load,
+    })
 
     if not result:
         message = message or 'Invalid transport loading.'
         return jsonify({'status': message}), 400
 
-    game_state.update()
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, action)
 
     response = {
         'status': 'Transport loading action handled successfully.',
         'session_id': game_state.session_id,
-        'game_state': game_state.to_dict(),
+        **get_game_state_response(game_state),
     }
     return jsonify(response), 200
 
 
 @game_route.route('/<string:session_id>/unloadtransport', methods=['POST'])
+@retry_on_version_conflict
 def handle_unload_transport(session_id):
     # Fetch the session and game state by session ID
     session, game_state = fetch_session_and_game_state(session_id)
@@ -169,27 +352,30 @@ def handle_unload_transport(session_id):
     selected_territory_name = data.get('selectedTerritory')
     transport = data.get('transport')
 
-    # cast json unit to class objects
-    transport = Unit.from_dict(transport)
-
-    result, message = unload_transport(game_state, player,
-                                       sea_territory_name, selected_territory_name, transport)
+    result, message, action = perform_action(session, game_state, 'unload_transport', {
+        'team_num': player.team_num,
+        'sea_territory': sea_territory_name,
+        'selected_territory': selected_territory_name,
+        'transport': transport,
+    })
 
     if not result:
         message = message or 'Invalid transport unloading.'
         return jsonify({'status': message}), 400
 
-    game_state.update()
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, action)
 
     response = {
         'status': 'Transport loading action handled successfully.',
         'session_id': game_state.session_id,
-        'game_state': game_state.to_dict(),
+        **get_game_state_response(game_state),
     }
     return jsonify(response), 200
 
 
 @game_route.route('/<string:session_id>/attack', methods=['POST'])
+@retry_on_version_conflict
 def handle_combat_attack(session_id):
     # Fetch the session and game state by session ID
     session, game_state = fetch_session_and_game_state(session_id)
@@ -211,23 +397,27 @@ def handle_combat_attack(session_id):
     data = request.get_json()
     selected_territory = data.get('selectedTerritory')
 
-    result, message = combat_attack(session, game_state, selected_territory)
+    result, message, action = perform_action(session, game_state, 'combat_attack', {
+        'territory_name': selected_territory,
+    })
 
     if not result:
         message = message or 'Invalid combat attack.'
         return jsonify({'status': message}), 400
 
-    game_state.update()
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, action)
 
     response = {
         'status': 'Combat attack successful.',
         'session_id': game_state.session_id,
-        'game_state': game_state.to_dict(),
+        **get_game_state_response(game_state),
     }
     return jsonify(response), 200
 
 
 @game_route.route('/<string:session_id>/casualties', methods=['POST'])
+@retry_on_version_conflict
 def handle_combat_casualties(session_id):
     # Fetch the session and game state by session ID
     session, game_state = fetch_session_and_game_state(session_id)
@@ -250,24 +440,28 @@ def handle_combat_casualties(session_id):
     selected_territory = data.get('selectedTerritory')
     selected_units = data.get('selectedUnits')
 
-    result, message = combat_select_casualties(
-        game_state, selected_territory, selected_units)
+    result, message, action = perform_action(session, game_state, 'combat_select_casualties', {
+        'territory_name': selected_territory,
+        'units': selected_units,
+    })
 
     if not result:
         message = message or 'Invalid casualty selection.'
         return jsonify({'status': message}), 400
 
-    game_state.update()
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, action)
 
     response = {
         'status': 'Combat turn ended successfully.',
         'session_id': game_state.session_id,
-        'game_state': game_state.to_dict(),
+        **get_game_state_response(game_state),
     }
     return jsonify(response), 200
 
 
 @game_route.route('/<string:session_id>/retreat', methods=['POST'])
+@retry_on_version_conflict
 def handle_combat_retreat(session_id):
     # Fetch the session and game state by session ID
     session, game_state = fetch_session_and_game_state(session_id)
@@ -289,23 +483,27 @@ def handle_combat_retreat(session_id):
     data = request.get_json()
     selected_territory = data.get('selectedTerritory')
 
-    result, message = combat_retreat(game_state, selected_territory)
+    result, message, action = perform_action(session, game_state, 'combat_retreat', {
+        'territory_name': selected_territory,
+    })
 
     if not result:
         message = message or 'Invalid combat retreat.'
         return jsonify({'status': message}), 400
 
-    game_state.update()
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, action)
 
     response = {
         'status': 'Combat retreat successful.',
         'session_id': game_state.session_id,
-        'game_state': game_state.to_dict(),
+        **get_game_state_response(game_state),
     }
     return jsonify(response), 200
 
 
 @game_route.route('/<string:session_id>/mobilizeunits', methods=['POST'])
+@retry_on_version_conflict
 def handle_mobilize_units(session_id):
     # Fetch the session and game state by session ID
     session, game_state = fetch_session_and_game_state(session_id)
@@ -326,26 +524,143 @@ def handle_mobilize_units(session_id):
     units_to_mobilize = data.get('units')
     selected_territory = data.get('selectedTerritory')
 
-    result, message = mobilize_units(
-        game_state, player, units_to_mobilize, selected_territory)
+    result, message, action = perform_action(session, game_state, 'mobilize_units', {
+        'team_num': player.team_num,
+        'territory_name': selected_territory,
+        'units': units_to_mobilize,
+    })
 
     if not result:
         message = message or 'Mobilization failed. Invalid units or territory selected.'
         return jsonify({'status': message}), 400
 
-    session.update()
-    game_state.update()
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, action)
 
     response = {
         'status': 'Unit purchase action handled successfully.',
         'session_id': session.session_id,
         'session': session.to_dict(sanitize_players=True),
-        'game_state': game_state.to_dict(),
+        **get_game_state_response(game_state),
+    }
+    return jsonify(response), 200
+
+
+# Actions accepted by the batch route by type, with the phases they are allowed in
+# and their params from the same request body as the action's own route.
+BATCH_ACTIONS = {
+    'purchaseunit': ('purchase_unit', [PhaseNumber.PURCHASE_UNITS], lambda player, data: {
+        'team_num': player.team_num,
+        'unit_type': data.get('unitType'),
+    }),
+    'moveunits': ('move_units', [PhaseNumber.COMBAT_MOVE, PhaseNumber.NON_COMBAT_MOVE], lambda player, data: {
+        'team_num': player.team_num,
+        'territory_a': data.get('territoryA'),
+        'territory_b': data.get('territoryB'),
+        'units': data.get('units'),
+        'path': data.get('path'),
+    }),
+    'loadtransport': ('load_transport_with_units', [PhaseNumber.COMBAT_MOVE, PhaseNumber.NON_COMBAT_MOVE],
+                      lambda player, data: {
+                          'team_num': player.team_num,
+                          'territory_name': data.get('territoryName'),
+                          'transport': data.get('transport'),
+                          'units': data.get('units'),
+                      }),
+    'unloadtransport': ('unload_transport', [PhaseNumber.COMBAT_MOVE, PhaseNumber.NON_COMBAT_MOVE],
+                        lambda player, data: {
+                            'team_num': player.team_num,
+                            'sea_territory': data.get('seaTerritory'),
+                            'selected_territory': data.get('selectedTerritory'),
+                            'transport': data.get('transport'),
+                        }),
+    'mobilizeunits': ('mobilize_units', [PhaseNumber.MOBILIZE], lambda player, data: {
+        'team_num': player.team_num,
+        'territory_name': data.get('selectedTerritory'),
+        'units': data.get('units'),
+    }),
+}
+
+
+@game_route.route('/<string:session_id>/actions', methods=['POST'])
+@retry_on_version_conflict
+def handle_batch_actions(session_id):
+    """
+    Perform a list of actions in order and save them together, all or nothing.
+
+    The body is {'actions': [{'type': 'moveunits', 'territoryA': ..., ...}, ...]},
+    each action has a type from BATCH_ACTIONS and the body of its own route.
+
+    If an action fails nothing is saved, and the response has the index of
+    the failed action and the results of the actions before it.
+    """
+    session, game_state = fetch_session_and_game_state(session_id)
+    if not session or not game_state:
+        return jsonify({'status': 'Session ID not found.'}), 404
+
+    # Must be the player's turn
+    player_id = request.args.get('pid')
+    player = session.get_player_by_id(player_id)
+
+    if not validate_player(session, player):
+        return jsonify({'status': 'Cannot perform actions outside of your turn.'}), 400
+
+    data = request.get_json()
+    actions = data.get('actions') if isinstance(data, dict) else None
+
+    if not isinstance(actions, list) or not actions:
+        return jsonify({'status': 'No actions provided.'}), 400
+
+    max_actions = current_app.config.get('BATCH_ACTIONS_MAX', 100)
+    if len(actions) > max_actions:
+        return jsonify({'status': f'Cannot perform more than {max_actions} actions at once.'}), 400
+
+    results = []
+    action_records = []
+
+    for index, action_data in enumerate(actions):
+        action_type = action_data.get('type') if isinstance(action_data, dict) else None
+
+        if action_type not in BATCH_ACTIONS:
+            message = f'Unknown action type {action_type}.'
+        else:
+            action, phases, get_params = BATCH_ACTIONS[action_type]
+
+            # actions in a batch do not change the phase
+            if session.phase_num not in phases:
+                message = f'Action {action_type} is not allowed in this phase.'
+            else:
+                result, message, action_record = perform_action(
+                    session, game_state, action, get_params(player, action_data))
+
+                if result:
+                    results.append({'type': action_type, 'result': True})
+                    action_records.append(action_record)
+                    continue
+
+        # the loaded game has unsaved changes and is not saved, the game cache evicts it
+        response = {
+            'status': f'Action {index} failed. ' + (message or 'Invalid action.'),
+            'failed_index': index,
+            'results': results,
+        }
+        return jsonify(response), 400
+
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, make_batch_record(action_records))
+
+    response = {
+        'status': 'Actions handled successfully.',
+        'session_id': session.session_id,
+        'results': results,
+        'session': session.to_dict(sanitize_players=True),
+        **get_game_state_response(game_state),
     }
     return jsonify(response), 200
 
 
 @game_route.route('/<string:session_id>/undophase', methods=['POST'])
+@retry_on_version_conflict
 def handle_undo_phase(session_id):
     # Fetch the session and game state by session ID
     session, game_state = fetch_session_and_game_state(session_id)
@@ -363,17 +678,25 @@ def handle_undo_phase(session_id):
     if not validate_player(session, player):
         return jsonify({'status': 'Cannot perform actions outside of your turn.'}), 400
 
+    # the restore is written directly, any writes held by the game cache go first
+    flush_held_writes(session_id)
+
     game_state = game_state.restore_game_state()
+    if not game_state:
+        return jsonify({'status': 'No backup found to undo the phase to.'}), 404
+
+    log_action(session, game_state, make_action_record('undo_phase', {}))
 
     response = {
         'status': 'Phase reset successfully.',
         'session_id': game_state.session_id,
-        'game_state': game_state.to_dict(),
+        'game_state': game_state,
     }
     return jsonify(response), 200
 
 
 @game_route.route('/<string:session_id>/endphase', methods=['POST'])
+@retry_on_version_conflict
 def handle_end_phase(session_id):
     session, game_state = fetch_session_and_game_state(session_id)
     if not session or not game_state:
@@ -388,8 +711,6 @@ def handle_end_phase(session_id):
 
     session.increment_phase()
 
-    session.update()
-
     # Backup game state for undoing movement
     if session.phase_num in [PhaseNumber.COMBAT_MOVE, PhaseNumber.NON_COMBAT_MOVE]:
         game_state.backup_game_state()
@@ -399,9 +720,13 @@ def handle_end_phase(session_id):
     if session.phase_num == PhaseNumber.NON_COMBAT_MOVE:
         result, message = remove_resolved_battles(game_state)
         if not result:
+            update_session_and_game_state(session, game_state)
+            log_action(session, game_state,
+                       make_action_record('end_phase', {}))
             return jsonify({'status': message}), 400
 
-    game_state.update()
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, make_action_record('end_phase', {}))
 
     response = {
         'status': 'Phase ended successfully.',
@@ -412,6 +737,7 @@ def handle_end_phase(session_id):
 
 
 @game_route.route('/<string:session_id>/endturn', methods=['POST'])
+@retry_on_version_conflict
 def handle_end_turn(session_id):
     session, game_state = fetch_session_and_game_state(session_id)
     if not session or not game_state:
@@ -426,16 +752,16 @@ def handle_end_turn(session_id):
 
     # TODO validate player has no forces waiting to mobilize
 
-    end_turn(session, game_state)
+    _, _, action = perform_action(session, game_state, 'end_turn', {})
 
-    session.update()
-    game_state.update()
+    update_session_and_game_state(session, game_state)
+    log_action(session, game_state, action)
 
     response = {
         'status': 'Turn ended successfully.',
         'session_id': game_state.session_id,
         'session': session.to_dict(sanitize_players=True),
-        'game_state': game_state.to_dict(),
+        **get_game_state_response(game_state),
     }
     return jsonify(response), 200
 
@@ -446,16 +772,45 @@ def fetch_session_and_game_state(session_id):
 
     Fetch the session and game state by session ID.
     """
-    session = Session.get_session_by_session_id(
-        session_id, convert_to_class=True)
+    session, game_state = get_session_and_game_state_by_session_id(session_id)
 
-    if not session:
+    if not session or not game_state:
         return None, None
 
-    game_state = GameState.get_game_state_by_session_id(
-        session_id, convert_to_class=True)
+    return session, game_state
 
-    if not game_state:
-        return None, None
 
-    return session, game_state
+def get_game_state_version(session_id):
+    """
+    :return: The stored game state version, or None if not found.
+    """
+    held_versions = get_held_versions(session_id)
+    if held_versions:
+        return held_versions[1]
+
+    result = GameState.get_game_state_fields_by_session_id(
+        session_id, fields=['version'])
+    return result.get('version', 0) if result else None
+
+
+def get_stored_versions_event(session_id, versions):
+    """
+    Build an event for updates committed since the given versions, ex. by another worker.
+
+    :param versions: Tuple of (session version, game state version) already sent.
+    :return: The event, or None if nothing changed.
+    """
+    stored_versions = get_versions_by_session_id(session_id)
+
+    if not stored_versions:
+        return None
+
+    event = {}
+
+    if stored_versions[0] > versions[0]:
+        event['session'] = {'version': stored_versions[0]}
+
+    if stored_versions[1] > versions[1]:
+        event['game_state'] = {'version': stored_versions[1], 'territories': None}
+
+    return event or None
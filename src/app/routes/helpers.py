@@ -0,0 +1,132 @@
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, jsonify, request
+
+from app.models.version import VersionConflictError
+from app.extensions.compression import ENCODING_ETAG_SUFFIXES
+
+
+def retry_on_version_conflict(view):
+    """
+    Decorator for routes that read, modify and update the session or game state.
+
+    If another request updated the documents first, the whole route is run again
+    against the fresh documents. After VERSION_CONFLICT_RETRIES attempts the
+    request is rejected with a 409 and the client may try again.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        attempts = current_app.config.get('VERSION_CONFLICT_RETRIES', 3)
+
+        for attempt in range(1, attempts + 1):
+            try:
+                return view(*args, **kwargs)
+            except VersionConflictError as e:
+                current_app.logger.info(
+                    f"Version conflict in {view.__name__}, attempt {attempt} of {attempts}: {e}")
+
+        return jsonify({'status': 'Game was updated by another request. Please try again.'}), 409
+
+    return wrapper
+
+
+def get_list_arg(name):
+    """
+    Read a comma separated query parameter, ex. ?fields=turn_num,phase_num
+
+    :param name: The query parameter name.
+    :return: List of values, or None if the parameter is not provided.
+    """
+    value = request.args.get(name)
+
+    if not value:
+        return None
+
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def make_etag(name, version):
+    """
+    Build a strong ETag from a document version and the query parameters,
+    which select what part of the document is returned.
+
+    :param name: The document type, ex. 'session'.
+    :param version: The document version.
+    :return: The ETag, unquoted.
+    """
+    query = urlencode(sorted(request.args.items(multi=True)))
+    digest = hashlib.sha1(query.encode()).hexdigest()[:12]
+
+    return f"{name}-{version}-{digest}"
+
+
+def get_not_modified_response(name, get_version):
+    """
+    Answer If-None-Match before loading the document.
+
+    :param name: The document type, ex. 'session'.
+    :param get_version: Function returning the stored document version, or None if not found.
+        Only called when the request has an If-None-Match header.
+    :return: A 304 response if the client has the current version, otherwise None.
+    """
+    if not request.if_none_match:
+        return None
+
+    version = get_version()
+
+    if version is None:
+        return None
+
+    etag = make_etag(name, version)
+
+    # compressed responses have the ETag of their encoding
+    matches = [candidate for candidate in [etag, *(etag + suffix for suffix in ENCODING_ETAG_SUFFIXES.values())]
+               if request.if_none_match.contains(candidate)]
+
+    if not matches:
+        return None
+
+    etag = matches[0]
+
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+
+    return response
+
+
+def versioned_response(body, name, version):
+    """
+    Build a JSON response with an ETag for the document version. Clients must
+    revalidate, so polling with If-None-Match gets a 304 while nothing changed.
+
+    :return: The response.
+    """
+    response = jsonify(body)
+    response.set_etag(make_etag(name, version))
+    response.headers['Cache-Control'] = 'no-cache'
+
+    return response
+
+
+def get_game_state_response(game_state):
+    """
+    The game state part of a mutation response, after the game state was saved.
+
+    Clients that send ?base_version=<the game state version they have> get a
+    'game_state_delta' with only the changed territories and fields (see GameState.get_delta),
+    if they are known. Otherwise the full 'game_state' is returned.
+
+    :return: Dict to add to the response.
+    """
+    base_version = request.args.get('base_version', type=int)
+
+    delta = game_state.get_delta(base_version) if base_version is not None else None
+
+    # models are serialized by the app's JSON provider
+    if delta is None:
+        return {'game_state': game_state}
+
+    return {'game_state_delta': delta}
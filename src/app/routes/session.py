@@ -1,8 +1,12 @@
 from flask import Blueprint, jsonify, request
 
 from app.services.session import join_session
-from app.models.session import Session
+from app.models.session import Session, SessionStatus
 from app.models.game_state import GameState
+from app.models.session_game_state import flush_held_writes, get_held_versions
+from app.services.action_log import start_action_log
+from app.routes.helpers import (retry_on_version_conflict, get_list_arg, get_not_modified_response,
+                               versioned_response)
 
 
 session_route = Blueprint('session_route', __name__)
@@ -12,7 +16,39 @@ session_route = Blueprint('session_route', __name__)
 def handle_get_session(session_id):
     """
     Get session by session ID.
+
+    ?fields=turn_num,phase_num only loads and returns those fields.
+    Player data (?pid) is only included with the full session.
+
+    Responses have an ETag of the session version, If-None-Match is answered
+    with a 304 after only reading the version.
     """
+    not_modified = get_not_modified_response('session', lambda: get_session_version(session_id))
+    if not_modified:
+        return not_modified
+
+    # writes held by the game cache go first, so the player sees their own actions
+    flush_held_writes(session_id)
+
+    fields = get_list_arg('fields')
+
+    if fields:
+        try:
+            session = Session.get_session_fields_by_session_id(
+                session_id, fields, sanitize_players=True)
+        except ValueError as e:
+            return jsonify({'status': str(e)}), 400
+
+        if not session:
+            return jsonify({'status': 'Session not found.'}), 404
+
+        response = {
+            'status': 'Session found.',
+            'session_id': session['session_id'],
+            'session': session,
+        }
+        return versioned_response(response, 'session', session.get('version', 0)), 200
+
     session = Session.get_session_by_session_id(
         session_id, convert_to_class=True)
 
@@ -28,14 +64,26 @@ def handle_get_session(session_id):
     # add player data if a valid player ID is provided
     player_id = request.args.get('pid')
     if not player_id:
-        return jsonify(response), 200
+        return versioned_response(response, 'session', session.version), 200
 
     player = session.get_player_by_id(player_id)
 
     if player:
         response['player'] = player.to_dict()
 
-    return jsonify(response), 200
+    return versioned_response(response, 'session', session.version), 200
+
+
+def get_session_version(session_id):
+    """
+    :return: The stored session version, or None if not found.
+    """
+    held_versions = get_held_versions(session_id)
+    if held_versions:
+        return held_versions[0]
+
+    result = Session.get_session_fields_by_session_id(session_id, ['version'])
+    return result.get('version', 0) if result else None
 
 
 @session_route.route('/create', methods=['POST'])
@@ -55,6 +103,7 @@ def handle_create_session():
 
 
 @session_route.route('/join/<string:session_id>', methods=['POST'])
+@retry_on_version_conflict
 def handle_join_session(session_id):
     """
     Join a session and handles player selection.
@@ -82,6 +131,10 @@ def handle_join_session(session_id):
 
     session.update()
 
+    # the last player joined and the game started
+    if session.status == SessionStatus.ACTIVE:
+        start_action_log(session)
+
     response = {'status': 'Player joined.',
                 'session_id': session_id,
                 'session': session.to_dict(sanitize_players=True),
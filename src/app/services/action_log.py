@@ -0,0 +1,269 @@
+from copy import deepcopy
+
+from flask import current_app, has_app_context
+from pymongo.errors import PyMongoError
+
+from app.models.session import Session, PhaseNumber
+from app.models.game_state import GameState
+from app.models.unit import Unit
+from app.models.action_log import append_action, save_snapshot, get_latest_snapshot, get_actions
+from app.models.session_game_state import flush_held_writes
+from app.services.outcomes import record_outcomes, replay_outcomes
+from app.services.game import (purchase_unit, mobilize_units, move_units, move_units_along_path,
+                               load_transport_with_units, unload_transport, combat_attack,
+                               combat_select_casualties, combat_retreat, remove_resolved_battles, end_turn)
+
+"""
+Game actions by name, so they can be logged and replayed.
+
+Each action takes the session, game state and the action's params (plain json)
+and calls the matching service function.
+
+"""
+
+
+def _purchase_unit(session, game_state, params):
+    player = session.get_player_by_team_num(params['team_num'])
+    return purchase_unit(game_state, player, params['unit_type'])
+
+
+def _move_units(session, game_state, params):
+    player = session.get_player_by_team_num(params['team_num'])
+
+    if params.get('path'):
+        return move_units_along_path(session, game_state, player,
+                                     params['territory_a'], params['path'], params['units'])
+
+    return move_units(session, game_state, player,
+                      params['territory_a'], params['territory_b'], params['units'])
+
+
+def _load_transport(session, game_state, params):
+    player = session.get_player_by_team_num(params['team_num'])
+    return load_transport_with_units(game_state, player, params['territory_name'],
+                                     Unit.from_dict(params['transport']), params['units'])
+
+
+def _unload_transport(session, game_state, params):
+    player = session.get_player_by_team_num(params['team_num'])
+    return unload_transport(game_state, player, params['sea_territory'],
+                            params['selected_territory'], Unit.from_dict(params['transport']))
+
+
+def _combat_attack(session, game_state, params):
+    return combat_attack(session, game_state, params['territory_name'])
+
+
+def _combat_select_casualties(session, game_state, params):
+    return combat_select_casualties(game_state, params['territory_name'], params['units'])
+
+
+def _combat_retreat(session, game_state, params):
+    return combat_retreat(game_state, params['territory_name'])
+
+
+def _mobilize_units(session, game_state, params):
+    player = session.get_player_by_team_num(params['team_num'])
+    return mobilize_units(game_state, player, params['units'], params['territory_name'])
+
+
+def _end_turn(session, game_state, params):
+    end_turn(session, game_state)
+    return True, None
+
+
+ACTIONS = {
+    'purchase_unit': _purchase_unit,
+    'move_units': _move_units,
+    'load_transport_with_units': _load_transport,
+    'unload_transport': _unload_transport,
+    'combat_attack': _combat_attack,
+    'combat_select_casualties': _combat_select_casualties,
+    'combat_retreat': _combat_retreat,
+    'mobilize_units': _mobilize_units,
+    'end_turn': _end_turn,
+}
+
+
+def perform_action(session, game_state, action, params):
+    """
+    Perform a game action and record its random outcomes.
+
+    With CHECK_GAME_INDEXES the game state's player aggregates and unit index are
+    checked against a full scan afterwards.
+
+    :param action: The action name, see ACTIONS.
+    :param params: The action's params (plain json).
+    :return: Tuple of (bool if successful, message, action record for the log).
+    """
+    with record_outcomes() as outcomes:
+        result, message = ACTIONS[action](session, game_state, params)
+
+    if has_app_context() and current_app.config.get('CHECK_GAME_INDEXES'):
+        errors = game_state.check_player_aggregates() + game_state.check_unit_index()
+
+        if errors:
+            raise AssertionError(
+                f"Game indexes out of date after {action}: {'; '.join(errors)}")
+
+    return result, message, make_action_record(action, params, outcomes)
+
+
+def make_action_record(action, params, outcomes=None):
+    """
+    Create an action record for the log.
+    """
+    return {'action': action, 'params': params, 'outcomes': outcomes or {}}
+
+
+def make_batch_record(action_records):
+    """
+    Create one action record for the actions of a batch, they are saved together.
+
+    Stacked units get new IDs when a game is saved, so the batch is replayed as one
+    action, with the IDs of its actions as they were within the batch.
+    """
+    return make_action_record('batch', {'actions': action_records})
+
+
+def log_action(session, game_state, action_record):
+    """
+    Append a successful action to the session's action log, after it has been saved.
+
+    Every ACTION_LOG_SNAPSHOT_INTERVAL actions a snapshot of the game is saved.
+    Logging never fails the request, the action is already saved.
+
+    :return: None
+    """
+    if not current_app.config.get('ACTION_LOG_ENABLED'):
+        return
+
+    try:
+        seq = append_action(session.session_id, action_record['action'],
+                            action_record['params'], action_record['outcomes'])
+
+        if seq % current_app.config['ACTION_LOG_SNAPSHOT_INTERVAL'] == 0:
+            save_game_snapshot(session, game_state, seq)
+
+    except PyMongoError as e:
+        current_app.logger.warning(
+            f"Failed to log action {action_record['action']} for session {session.session_id}: {e}")
+
+
+def start_action_log(session):
+    """
+    Save the first snapshot (sequence 0) of a game that just started.
+
+    :return: None
+    """
+    if not current_app.config.get('ACTION_LOG_ENABLED'):
+        return
+
+    game_state = GameState.get_game_state_by_session_id(session.session_id)
+
+    save_game_snapshot(session, game_state, 0)
+
+
+def save_game_snapshot(session, game_state, seq):
+    """
+    Save a snapshot of the session, game state and phase backup as of an action.
+    """
+    backup = GameState.get_game_state_backup_by_session_id(session.session_id)
+
+    save_snapshot(session.session_id, seq, session.to_dict(),
+                  game_state.to_document(), backup)
+
+
+class ActionReplayError(Exception):
+    """
+    Raised when a logged action cannot be replayed, the log does not match the saved game.
+    """
+
+
+def rebuild_game_from_action_log(session_id):
+    """
+    Rebuild a game from its latest snapshot and the actions logged after it.
+
+    Document versions are not replayed, the rebuilt objects keep the snapshot's versions.
+
+    Actions are logged when they are committed. With a write behind game cache their
+    writes may still be held, they are sent first so the db matches the log.
+
+    Raises ActionReplayError if a logged action fails when replayed.
+
+    :return: Tuple of (Session, GameState), both None if the game has no snapshot.
+    """
+    flush_held_writes(session_id)
+
+    snapshot = get_latest_snapshot(session_id)
+
+    if not snapshot:
+        return None, None
+
+    session = Session.from_dict(snapshot['session'])
+    game_state = GameState.from_dict(snapshot['game_state'])
+    backup = snapshot.get('game_state_backup')
+
+    for action_record in get_actions(session_id, after_seq=snapshot['seq']):
+        action = action_record['action']
+        seq = action_record['seq']
+
+        if action == 'end_phase':
+            backup = replay_end_phase(session, game_state, backup)
+
+        elif action == 'undo_phase':
+            if not backup:
+                raise ActionReplayError(
+                    f"Action {seq} (undo_phase) of session {session_id} has no backup.")
+
+            game_state = GameState.from_dict(deepcopy(backup))
+
+        elif action == 'batch':
+            for index, batch_record in enumerate(action_record['params']['actions']):
+                replay_action(session, game_state, batch_record, f"{seq}.{index}")
+
+        else:
+            replay_action(session, game_state, action_record, seq)
+
+        # stacked units got new IDs when the action was saved
+        if game_state.unit_stacks:
+            game_state.assign_stacked_unit_ids()
+
+    return session, game_state
+
+
+def replay_action(session, game_state, action_record, seq):
+    """
+    Replay one of the ACTIONS with its recorded outcomes.
+
+    Raises ActionReplayError if it fails.
+
+    :param seq: The action's sequence number, for the error.
+    :return: None
+    """
+    action = action_record['action']
+
+    with replay_outcomes(action_record.get('outcomes', {})):
+        result, message = ACTIONS[action](session, game_state, action_record['params'])
+
+    if not result:
+        raise ActionReplayError(
+            f"Action {seq} ({action}) of session {session.session_id} "
+            f"failed when replayed: {message}")
+
+
+def replay_end_phase(session, game_state, backup):
+    """
+    Replay ending a phase, see handle_end_phase.
+
+    :return: The phase backup (as dict) after the phase ended.
+    """
+    session.increment_phase()
+
+    if session.phase_num in [PhaseNumber.COMBAT_MOVE, PhaseNumber.NON_COMBAT_MOVE]:
+        backup = game_state.to_document()
+
+    if session.phase_num == PhaseNumber.NON_COMBAT_MOVE:
+        remove_resolved_battles(game_state)
+
+    return backup
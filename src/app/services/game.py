@@ -1,9 +1,8 @@
-from random import randint
-
-from app.models.territory_data import TERRITORY_DATA
+from app.models.map_graph import MAP_GRAPH
 from app.models.unit_data import UNIT_DATA
 from app.models.session import Session, PhaseNumber, SessionStatus
 from app.models.unit import Unit
+from app.services.outcomes import randint, new_unit_id
 
 from app.services.game_helpers import (
     get_hostile_team_nums_for_player,
@@ -101,13 +100,10 @@ def move_units(session, game_state, player, territory_a_name, territory_b_name,
     territory_a = game_state.territories[territory_a_name]
     territory_b = game_state.territories[territory_b_name]
 
-    territory_a_generic_data = TERRITORY_DATA[territory_a_name]
-    territory_b_generic_data = TERRITORY_DATA[territory_b_name]
-
-    territory_b_is_ocean = territory_b_generic_data['is_ocean']
+    territory_b_is_ocean = MAP_GRAPH.get_is_ocean(territory_b_name)
 
     # territories are neighbors
-    if not territory_b_name in territory_a_generic_data['neighbors']:
+    if not MAP_GRAPH.are_neighbors(territory_a_name, territory_b_name):
         return False, "Territories are not neighbors."
 
     # fetch units from game_state and validate they are in territory A
@@ -119,21 +115,12 @@ def move_units(session, game_state, player, territory_a_name, territory_b_name,
     is_enemy_territory = is_hostile_territory(
         territory_b, player.team_num, is_ocean=territory_b_is_ocean)
 
-    for unit in units_to_move:
-        if unit.movement < 1:
-            return False, "Unit does not have enough movement."
-        if is_land_unit(unit.unit_type) and territory_b_is_ocean:
-            return False, "Land units cannot enter ocean territories."
-        if is_sea_unit(unit.unit_type) and not territory_b_is_ocean:
-            return False, "Sea units cannot enter land territories."
-        if unit.unit_type == "ANTI-AIRCRAFT" and session.phase_num != PhaseNumber.NON_COMBAT_MOVE:
-            return False, "Anti-aircraft units can only move in non-combat phase."
-        if not is_air_unit(unit.unit_type) and is_enemy_territory and session.phase_num == PhaseNumber.NON_COMBAT_MOVE:
-            return False, "Land and sea units cannot move into hostile territories in the non-combat phase."
-        if unit.in_combat_this_turn and unit.unit_type == "ANTI-AIRCRAFT":
-            return False, "Anti-aircraft units cannot move after firing in combat."
+    message = get_move_step_error(session, units_to_move, [unit.movement for unit in units_to_move],
+                                  territory_b_is_ocean, is_enemy_territory)
+    if message:
+        return False, message
 
-        """Validation Passed"""
+    """Validation Passed"""
 
     # If entering an enemy territory, either capture it (no enemy units) or create a battle
     has_enemy_units = territory_has_hostile_units(territory_b, player.team_num)
@@ -156,10 +143,6 @@ def move_units(session, game_state, player, territory_a_name, territory_b_name,
 
     if is_enemy_territory:
 
-        # Not allowed for any units during non-combat phase
-        if session.phase_num != PhaseNumber.COMBAT_MOVE:
-            return False, "Units cannot move into hostile territories in non-combat phase."
-
         if not has_enemy_units and moving_force_has_land_unit:
             capture_territory(game_state, territory_b_name, player)
 
@@ -179,8 +162,9 @@ def move_units(session, game_state, player, territory_a_name, territory_b_name,
     # Air units and submarines can uniquely move out of a combat zone
     # if the last territory had a battle but there are no longer fighting units,
     # remove the battle
+    moving_unit_ids = {unit.unit_id for unit in units_to_move}
     prev_territory_has_friendly_units = any(
-        unit for unit in territory_a.units if unit.team == player.team_num and unit not in units_to_move)
+        unit for unit in territory_a.units if unit.team == player.team_num and unit.unit_id not in moving_unit_ids)
     prev_territory_has_enemy_units = territory_has_hostile_units(
         territory_a, player.team_num)
 
@@ -189,40 +173,136 @@ def move_units(session, game_state, player, territory_a_name, territory_b_name,
 
     # Adjust movement of all moving units
     for unit in units_to_move:
-        unit.movement -= 1
-
-        # Land and sea units must stop once they enter a hostile territory
-        # Tanks lose movement only if there are hostile units in the territory
-        # Submarines lose movement only if there is a destroyer in the territory
-        if (
-            is_enemy_territory
-            and not is_air_unit(unit.unit_type)
-            and (
-                not unit.unit_type == "TANK"
-                or (unit.unit_type == "TANK" and has_enemy_units)
-            )
-            and (
-                not unit.unit_type == "SUBMARINE"
-                or (unit.unit_type == "SUBMARINE" and defending_force_has_destroyer)
-            )
-        ):
-            unit.movement = 0
+        unit.movement = get_movement_after_step(unit.unit_type, unit.movement, is_enemy_territory,
+                                                has_enemy_units, defending_force_has_destroyer)
 
         # Air units in cargo lose movement for aircraft carrier movement
         if unit.unit_type == "AIRCRAFT-CARRIER":
             for cargo_unit in unit.cargo:
                 cargo_unit.movement -= 1
 
-    # remove units from territory A
-    territory_a.units = [
-        unit for unit in territory_a.units if unit not in units_to_move]
-
-    # add units to territory B
-    territory_b.units.extend(units_to_move)
+    # move units from territory A to territory B
+    game_state.move_units_to(territory_b_name, units_to_move)
 
     return True, None
 
 
+def move_units_along_path(session, game_state, player, territory_a_name, path, units_to_move):
+    """
+    Move units through a list of territories, one move_units step per territory,
+    with the same validation, captures, battles and movement.
+
+    The units stop before a step that is not allowed (ex. out of movement) and
+    after entering a territory with hostile units, where they fight.
+
+    :territory_a_name: The name of the territory to move from
+    :path: The names of the territories to move through in order, the last is the destination.
+    :units_to_move: The list of units to move (as dict).
+    :return: Tuple of (name of the territory the units stopped in, or None if they did
+        not move, message). If they moved, the message is why they stopped before the
+        end of the path, or None.
+    """
+    if not isinstance(path, list) or not path or not all(isinstance(name, str) for name in path):
+        return None, "Path must be a list of territory names."
+
+    if not isinstance(units_to_move, list) or not units_to_move:
+        return None, "No units provided."
+
+    # the path itself must be valid, only the rules can stop the units on the way
+    for territory_name, next_territory_name in zip([territory_a_name] + path, path):
+        if not MAP_GRAPH.are_neighbors(territory_name, next_territory_name):
+            return None, "Territories in the path are not neighbors."
+
+    unit_ids = [unit['unit_id'] for unit in units_to_move]
+
+    for step, territory_b_name in enumerate(path):
+        result, message = move_units(session, game_state, player, territory_a_name,
+                                     territory_b_name, units_to_move)
+
+        if not result:
+            return (territory_a_name if step > 0 else None), message
+
+        territory_b = game_state.territories[territory_b_name]
+
+        if step < len(path) - 1 and is_move_stopped_in(territory_b, player.team_num):
+            return territory_b_name, "Units stopped to fight hostile units."
+
+        # movement changed, the next step matches the units as they are now
+        units_to_move = [territory_b.units.get(unit_id).to_dict() for unit_id in unit_ids]
+        territory_a_name = territory_b_name
+
+    return territory_a_name, None
+
+
+def get_move_step_error(session, units, movements, territory_b_is_ocean, is_enemy_territory):
+    """
+    Check if units can move one step into a territory, see move_units.
+
+    :param units: The moving units.
+    :param movements: The remaining movement of each unit, in the same order.
+    :param territory_b_is_ocean: If the territory entered is an ocean.
+    :param is_enemy_territory: If the territory entered is hostile, see is_hostile_territory.
+    :return: The reason the move is invalid, or None if it is valid.
+    """
+    for unit, movement in zip(units, movements):
+        if movement < 1:
+            return "Unit does not have enough movement."
+        if is_land_unit(unit.unit_type) and territory_b_is_ocean:
+            return "Land units cannot enter ocean territories."
+        if is_sea_unit(unit.unit_type) and not territory_b_is_ocean:
+            return "Sea units cannot enter land territories."
+        if unit.unit_type == "ANTI-AIRCRAFT" and session.phase_num != PhaseNumber.NON_COMBAT_MOVE:
+            return "Anti-aircraft units can only move in non-combat phase."
+        if not is_air_unit(unit.unit_type) and is_enemy_territory and session.phase_num == PhaseNumber.NON_COMBAT_MOVE:
+            return "Land and sea units cannot move into hostile territories in the non-combat phase."
+        if unit.in_combat_this_turn and unit.unit_type == "ANTI-AIRCRAFT":
+            return "Anti-aircraft units cannot move after firing in combat."
+
+    # Not allowed for any units during non-combat phase
+    if is_enemy_territory and session.phase_num != PhaseNumber.COMBAT_MOVE:
+        return "Units cannot move into hostile territories in non-combat phase."
+
+    return None
+
+
+def get_movement_after_step(unit_type, movement, is_enemy_territory, has_enemy_units, has_destroyer):
+    """
+    The movement a unit has left after moving one step, see move_units.
+
+    Land and sea units must stop once they enter a hostile territory
+    Tanks lose movement only if there are hostile units in the territory
+    Submarines lose movement only if there is a destroyer in the territory
+
+    :return: The remaining movement.
+    """
+    if (
+        is_enemy_territory
+        and not is_air_unit(unit_type)
+        and (
+            not unit_type == "TANK"
+            or (unit_type == "TANK" and has_enemy_units)
+        )
+        and (
+            not unit_type == "SUBMARINE"
+            or (unit_type == "SUBMARINE" and has_destroyer)
+        )
+    ):
+        return 0
+
+    return movement - 1
+
+
+def is_move_stopped_in(territory, team_num):
+    """
+    Units moving through several territories stop in a territory with hostile
+    units, where they fight, whatever movement they have left.
+    Used by move_units_along_path and the reachable territories search.
+
+    :return: Bool, if the units cannot move on from territory.
+    """
+    return territory_has_hostile_units(territory, team_num)
+
+
 def load_transport_with_units(game_state, player, territory_name, transport, units_to_load):
     """
     Moves selected units from a neighboring territory onto a transport ship.
@@ -245,9 +325,8 @@ def load_transport_with_units(game_state, player, territory_name, transport, uni
     """
     # get sea territory
     sea_territory = game_state.territories[territory_name]
-    sea_territory_generic_data = TERRITORY_DATA[territory_name]
 
-    if not sea_territory_generic_data["is_ocean"]:
+    if not MAP_GRAPH.get_is_ocean(territory_name):
         return False, "Selected territory is not an ocean."
 
     # load transport from game_state, also ensures it exists in territory
@@ -275,7 +354,7 @@ def load_transport_with_units(game_state, player, territory_name, transport, uni
             return False, "Unit is not in a friendly territory."
 
         # each unit is in a territory that neighbors the sea territory
-        if unit_territory_name not in sea_territory_generic_data['neighbors']:
+        if not MAP_GRAPH.are_neighbors(territory_name, unit_territory_name):
             return False, "Unit is not in a neighboring territory."
 
         # units must have movement available
@@ -292,8 +371,7 @@ def load_transport_with_units(game_state, player, territory_name, transport, uni
             return False, "Carrier can only load air units."
 
         # move unit to transport
-        transport.cargo.append(unit)
-        unit_territory.units.remove(unit)
+        game_state.load_units(transport, [unit])
 
     # final validation, transport can only have 2 units and 1 must be infantry if max
     if len(transport.cargo) > 2:
@@ -320,9 +398,8 @@ def unload_transport(game_state, player, sea_territory_name, selected_territory_
     """
     # get sea territory
     sea_territory = game_state.territories[sea_territory_name]
-    sea_territory_generic_data = TERRITORY_DATA[sea_territory_name]
 
-    if not sea_territory_generic_data["is_ocean"]:
+    if not MAP_GRAPH.get_is_ocean(sea_territory_name):
         return False, "Sea territory is not an ocean?"
 
     # load transport from game_state, also ensures it exists in territory
@@ -336,7 +413,7 @@ def unload_transport(game_state, player, sea_territory_name, selected_territory_
 
     # Aircraft Carriers launch units into the same territory
     if transport.unit_type == "AIRCRAFT-CARRIER":
-        sea_territory.units.extend(transport.cargo)
+        game_state.unload_units(transport, sea_territory_name)
 
     # Transports unload to adjacent land territories
     if transport.unit_type == "TRANSPORT":
@@ -346,13 +423,12 @@ def unload_transport(game_state, player, sea_territory_name, selected_territory_
 
         # selected territory is land
         selected_territory = game_state.territories[selected_territory_name]
-        selected_territory_generic_data = TERRITORY_DATA[selected_territory_name]
 
-        if selected_territory_generic_data["is_ocean"]:
+        if MAP_GRAPH.get_is_ocean(selected_territory_name):
             return False, "Selected territory is not land."
 
         # selected territory neighbors the sea territory
-        if selected_territory_name not in sea_territory_generic_data['neighbors']:
+        if not MAP_GRAPH.are_neighbors(sea_territory_name, selected_territory_name):
             return False, "Selected territory is not a neighbor of the sea territory."
 
         """Validation Passed"""
@@ -367,7 +443,7 @@ def unload_transport(game_state, player, sea_territory_name, selected_territory_
         if is_enemy_territory:
 
             if not has_enemy_units:
-                selected_territory.team = player.team_num
+                game_state.set_territory_team(selected_territory_name, player.team_num)
 
             if has_enemy_units:
                 battle = game_state.add_or_find_battle(
@@ -384,9 +460,7 @@ def unload_transport(game_state, player, sea_territory_name, selected_territory_
             unit.movement = 0
 
         # move units to land territory
-        selected_territory.units.extend(transport.cargo)
-
-    transport.cargo = []
+        game_state.unload_units(transport, selected_territory_name)
 
     return True, None
 
@@ -424,7 +498,7 @@ def combat_opening_fire(session, game_state, territory_name):
 
     Each bomber rolls a die up to the territory's income value and the defender loses that many IPCs.
     """
-    current_territory_is_land = not TERRITORY_DATA[territory_name]['is_ocean']
+    current_territory_is_land = not MAP_GRAPH.get_is_ocean(territory_name)
     current_territory = game_state.territories[territory_name]
 
     # the territory must have an industrial complex
@@ -435,7 +509,7 @@ def combat_opening_fire(session, game_state, territory_name):
                              "BOMBER" and unit.team == attacker_team_num]
 
         # get the territory's income value
-        territory_power = TERRITORY_DATA[territory_name]['power']
+        territory_power = MAP_GRAPH.get_power(territory_name)
 
         income_loss = sum([randint(1, territory_power)
                           for _ in attacking_bombers])
@@ -452,11 +526,11 @@ def combat_opening_fire(session, game_state, territory_name):
     """
 
     # if this is land and the attack from is sea
-    current_territory_is_land = not TERRITORY_DATA[territory_name]['is_ocean']
+    current_territory_is_land = not MAP_GRAPH.get_is_ocean(territory_name)
 
     attack_from_territory_name = battle.get('attack_from')
 
-    attack_from_territory_is_ocean = TERRITORY_DATA[attack_from_territory_name]['is_ocean']
+    attack_from_territory_is_ocean = MAP_GRAPH.get_is_ocean(attack_from_territory_name)
 
     # and there was no sea battle there
     sea_battle_occurred = game_state.get_battle(
@@ -483,15 +557,15 @@ def combat_opening_fire(session, game_state, territory_name):
             current_territory, battle, defending_team_numbers, defender_casualty_count)
 
         # Remove casualties from game
-        current_territory.units = [
-            unit for unit in current_territory.units if unit not in defender_casualties]
+        for unit in defender_casualties:
+            game_state.remove_unit(unit.unit_id)
 
     """
     Submarine attack
     
     Submarines get a free attack to start, but only if the other side doesn't have destroyers.
     """
-    current_territory_is_ocean = TERRITORY_DATA[territory_name]['is_ocean']
+    current_territory_is_ocean = MAP_GRAPH.get_is_ocean(territory_name)
 
     if current_territory_is_ocean:
 
@@ -541,8 +615,8 @@ def combat_opening_fire(session, game_state, territory_name):
             current_territory, battle, defending_team_numbers, defender_casualty_count)
 
         # Remove casualties from game
-        current_territory.units = [
-            unit for unit in current_territory.units if unit not in attacker_casualties + defender_casualties]
+        for unit in attacker_casualties + defender_casualties:
+            game_state.remove_unit(unit.unit_id)
 
 
 def combat_attack(session, game_state, territory_name):
@@ -740,8 +814,8 @@ def combat_select_casualties(game_state, territory_name, casualty_units):
             territory, battle, defending_team_numbers, defender_casualty_count)
 
         # Remove casualties from game
-        territory.units = [
-            unit for unit in territory.units if unit not in attacker_casualties + defender_casualties]
+        for unit in attacker_casualties + defender_casualties:
+            game_state.remove_unit(unit.unit_id)
 
         attacking_units = [
             unit for unit in territory.units if unit.team == attacker_team_num]
@@ -802,7 +876,7 @@ def combat_select_casualties(game_state, territory_name, casualty_units):
 
         # territories cannot be captured by air units
         if any(not is_air_unit(unit.unit_type) for unit in attacking_units):
-            territory.team = attacker_team_num
+            game_state.set_territory_team(territory_name, attacker_team_num)
 
             # also transfer any anti-aircraft units to the attacker
             for unit in territory.units:
@@ -877,7 +951,7 @@ def combat_retreat(game_state, territory_name):
     :return: Bool, if the retreat was successful.
     """
     battle_territory = game_state.territories[territory_name]
-    battle_territory_generic_data = TERRITORY_DATA[territory_name]
+    battle_territory_is_ocean = MAP_GRAPH.get_is_ocean(territory_name)
 
     # fetch ongoing battle
     battle = next((battle for battle in game_state.battles if battle.get(
@@ -888,7 +962,7 @@ def combat_retreat(game_state, territory_name):
 
     retreat_territory_name = battle.get('attack_from')
     retreat_territory = game_state.territories[retreat_territory_name]
-    retreat_territory_generic_data = TERRITORY_DATA[retreat_territory_name]
+    retreat_territory_is_ocean = MAP_GRAPH.get_is_ocean(retreat_territory_name)
 
     # get retreating units
     attacker_team_num = battle.get('attacker')
@@ -896,7 +970,7 @@ def combat_retreat(game_state, territory_name):
         unit for unit in battle_territory.units if unit.team == attacker_team_num]
 
     # if a transport is retreating from an amphibious assault, landed units need to be reloaded
-    if battle_territory_generic_data['is_ocean']:
+    if battle_territory_is_ocean:
 
         # Check if there is an amphibious assault originating from this territory
         ampibious_assault_land_battle = find_amphibious_assault_land_battle(
@@ -914,7 +988,7 @@ def combat_retreat(game_state, territory_name):
                         game_state, transport_id, unit_ids)
 
     # if land units are retreating during an amphibious assault, they need to be reloaded onto transports
-    if not battle_territory_generic_data['is_ocean'] and retreat_territory_generic_data['is_ocean']:
+    if not battle_territory_is_ocean and retreat_territory_is_ocean:
 
         # This means the attacker is retreating during an amphibious assault
 
@@ -924,10 +998,7 @@ def combat_retreat(game_state, territory_name):
 
     # else just move the units
     else:
-        battle_territory.units = [
-            unit for unit in battle_territory.units if unit not in retreating_units]
-
-        retreat_territory.units.extend(retreating_units)
+        game_state.move_units_to(retreat_territory_name, retreating_units)
 
     # finally mark the battle as a loss for the attacker
     battle['result'] = 'defender'
@@ -974,8 +1045,7 @@ def load_retreating_units_onto_transports(game_state, battle_territory, sea_terr
             (unit for unit in retreating_units if unit.unit_type == "INFANTRY"), None)
 
         if infantry_unit:
-            transport.cargo.append(infantry_unit)
-            battle_territory.units.remove(infantry_unit)
+            game_state.load_units(transport, [infantry_unit])
             retreating_units.remove(infantry_unit)
 
     # now iterate again...
@@ -987,15 +1057,14 @@ def load_retreating_units_onto_transports(game_state, battle_territory, sea_terr
         land_unit = next((unit for unit in retreating_units), None)
 
         if land_unit:
-            transport.cargo.append(land_unit)
-            battle_territory.units.remove(land_unit)
+            game_state.load_units(transport, [land_unit])
             retreating_units.remove(land_unit)
 
     # TODO this should never happen, log it if it does
     # if there are any remaining units, they are destroyed
     if retreating_units:
         for unit in retreating_units:
-            battle_territory.units.remove(unit)
+            game_state.remove_unit(unit.unit_id)
 
     return True
 
@@ -1028,16 +1097,15 @@ def mobilize_units(game_state, player, units_to_mobilize, selected_territory):
 
     :return bool: if the units were successfully placed.
     """
-    selected_territory_generic_data = TERRITORY_DATA[selected_territory]
     selected_territory_data = game_state.territories[selected_territory]
 
     # Player cannot place more units than the territory's production value
-    territory_production = selected_territory_generic_data['power']
+    territory_production = MAP_GRAPH.get_power(selected_territory)
     units_placed_this_turn = game_state.factory_production_counts.get(
         selected_territory, 0)
 
     # Sloppy
-    is_ocean = selected_territory_generic_data['is_ocean']
+    is_ocean = MAP_GRAPH.get_is_ocean(selected_territory)
 
     if not is_ocean and units_placed_this_turn + len(units_to_mobilize) > territory_production:
         remaining_capacity = territory_production - units_placed_this_turn
@@ -1052,7 +1120,7 @@ def mobilize_units(game_state, player, units_to_mobilize, selected_territory):
         units_to_mobilize)
 
     is_controlled_by_player = player.team_num == selected_territory_data.team
-    is_ocean = selected_territory_generic_data['is_ocean']
+    is_ocean = MAP_GRAPH.get_is_ocean(selected_territory)
     has_factory = selected_territory_data.has_factory
     has_adjacent_industrial_complex = check_territory_has_adjacent_industrial_complex(
         game_state, player, selected_territory)
@@ -1106,14 +1174,15 @@ def mobilize_units(game_state, player, units_to_mobilize, selected_territory):
         # industrial complex is a special building that never moves,
         # instead of creating a "unit", update the territory data
         if unit_type == "INDUSTRIAL-COMPLEX":
-            selected_territory_data.has_factory = True
+            game_state.add_factory(selected_territory)
         else:
             # add unit to territory
             new_unit = Unit(
+                unit_id=new_unit_id(),
                 unit_type=unit_type,
                 team=player.team_num,
             )
-            selected_territory_data.units.append(new_unit)
+            game_state.add_units(selected_territory, [new_unit])
 
     # Finally ensure there are not too many air units in a sea territory
     # for the available aircraft carrier cargo space
@@ -1123,17 +1192,15 @@ def mobilize_units(game_state, player, units_to_mobilize, selected_territory):
     return True, None
 
 
-def add_territory_power_to_player_ipcs(session, territory_name, territory):
+def add_territory_power_to_player_ipcs(session, game_state):
     """
-    Adds the IPC value of the territory to the session's IPCS.
+    Adds the IPC value of each player's territories to their IPCs.
 
     :param session: The current game session.
-    :param:
+    :param game_state: The current game state.
     """
-    # get player associated with the territory
-    player = session.get_player_by_team_num(territory.team)
-    territory_power = TERRITORY_DATA[territory_name]['power']
-    player.ipcs += territory_power
+    for player in session.players:
+        player.ipcs += game_state.get_player_aggregates(player.team_num).income
 
 
 def end_turn(session, game_state):
@@ -1156,33 +1223,35 @@ def end_turn(session, game_state):
     Validation:
     - air units over water with no aircraft carrier are destroyed, otherwise load them automatically
     """
-    for territory_name, territory in game_state.territories.items():
-        territory_is_ocean = TERRITORY_DATA[territory_name]["is_ocean"]
+    # if end of a full turn, add IPCs to players
+    if session.turn_num % 5 == 4:
+        add_territory_power_to_player_ipcs(session, game_state)
 
-        # if end of a full turn, add IPCs to players
-        if session.turn_num % 5 == 4:
-            add_territory_power_to_player_ipcs(
-                session, territory_name, territory)
+    for territory_name, territory in game_state.territories.items():
+        territory_is_ocean = MAP_GRAPH.get_is_ocean(territory_name)
 
         # reset unit movement, remove air units from ocean
+        air_units_on_ocean = []
         units_to_remove = []
 
         for unit in territory.units:
             unit.movement = UNIT_DATA[unit.unit_type]['movement']
 
-            # if a fighter or bomber is on the ocean with no carrier, destroy it
+            # if a fighter or bomber is on the ocean, load it onto a carrier or destroy it
             if is_air_unit(unit.unit_type) and territory_is_ocean:
+                air_units_on_ocean.append(unit)
 
-                attempt_to_load_air_unit_on_carrier(territory, unit)
-                # unit is removed from territory regardless
+            # if a fighter or bomber ends in a non-friendly territory, destroy it
+            elif is_air_unit(unit.unit_type) and territory.team != unit.team:
                 units_to_remove.append(unit)
 
-            # if a fighter or bomber ends in a non-friendly territory, destroy it
-            if is_air_unit(unit.unit_type) and territory.team != unit.team:
+        for unit in air_units_on_ocean:
+            # unit is removed from territory regardless
+            if not attempt_to_load_air_unit_on_carrier(game_state, territory_name, unit):
                 units_to_remove.append(unit)
 
-        if units_to_remove:
-            [territory.units.remove(unit) for unit in units_to_remove]
+        for unit in units_to_remove:
+            game_state.remove_unit(unit.unit_id)
 
     # Reset production counts for all territories
     game_state.factory_production_counts = {}
@@ -1200,20 +1269,21 @@ def end_turn(session, game_state):
     session.phase_num = PhaseNumber.PURCHASE_UNITS
 
 
-def attempt_to_load_air_unit_on_carrier(territory, air_unit):
+def attempt_to_load_air_unit_on_carrier(game_state, territory_name, air_unit):
     """
     Check if there are any aircraft carriers in the territory and load the unit onto it.
 
-    :territory: The territory (class) to check.
+    :game_state: The current game state.
+    :territory_name: The name of the territory to check.
     :unit: The unit (class) to find.
     :return bool: True if the unit was loaded onto a carrier, False otherwise.
     """
-    for unit in territory.units:
+    for unit in game_state.territories[territory_name].units:
         if unit.unit_type == "AIRCRAFT-CARRIER":
             if len(unit.cargo) >= 2:
                 continue
 
-            unit.cargo.append(air_unit)
+            game_state.load_units(unit, [air_unit])
             return True
 
     return False
@@ -1262,16 +1332,14 @@ def capture_territory(game_state, territory_name, player):
     :param player: The player to transfer control to.
     :return: Bool, if the territory was successfully captured.
     """
-    territory = game_state.territories[territory_name]
-
     # if this is a capital and the player is on a team with the capital
     # transfer control to the original player
-    is_capital_city = TERRITORY_DATA[territory_name]['is_capital']
-    original_team_num = TERRITORY_DATA[territory_name]['team']
+    is_capital_city = MAP_GRAPH.get_is_capital(territory_name)
+    original_team_num = MAP_GRAPH.get_original_team(territory_name)
 
     if is_capital_city and original_team_num not in get_hostile_team_nums_for_player(player.team_num):
-        territory.team = original_team_num
+        game_state.set_territory_team(territory_name, original_team_num)
 
     else:
         # transfer control of the territory
-        territory.team = player.team_num
+        game_state.set_territory_team(territory_name, player.team_num)
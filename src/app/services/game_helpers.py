@@ -1,4 +1,4 @@
-from app.models.territory_data import TERRITORY_DATA
+from app.models.map_graph import MAP_GRAPH
 from app.models.unit import Unit
 
 """
@@ -78,12 +78,12 @@ def retrieve_unit_from_game_state_by_id(game_state, unit_id):
     :unit_id: The ID of the unit to retrieve.
     :return: The unit if found, otherwise None.
     """
-    for territory in game_state.territories.values():
-        for unit in territory.units:
-            if unit.unit_id == unit_id:
-                return unit
+    found = game_state.find_unit(unit_id)
 
-    return None
+    if not found or found[2] is not None:
+        return None
+
+    return found[0]
 
 
 def reload_units_onto_transport_from_anywhere(game_state, transport_id, units_to_load_ids):
@@ -100,20 +100,12 @@ def reload_units_onto_transport_from_anywhere(game_state, transport_id, units_to
     if not transport:
         return None
 
-    found_units_to_load = []
-
-    for territory in game_state.territories.values():
-        for unit in territory.units:
-            if unit.unit_id in units_to_load_ids:
-                found_units_to_load.append(unit)
-
-        # remove the units from the territory
-        territory.units = [
-            unit for unit in territory.units if unit.unit_id not in units_to_load_ids
-        ]
+    # only units in territories, not already on a transport
+    found_units_to_load = [found[0] for found in map(game_state.find_unit, units_to_load_ids)
+                           if found and found[2] is None]
 
-    # Add units to the transport
-    transport.cargo.extend(found_units_to_load)
+    # Move the units onto the transport
+    game_state.load_units(transport, found_units_to_load)
 
 
 # endregion units
@@ -138,11 +130,7 @@ def retrieve_unit_from_territory(territory, unit_to_find):
     if isinstance(unit_to_find, dict):
         unit_to_find = Unit.from_dict(unit_to_find)
 
-    for unit in territory.units:
-        if unit == unit_to_find:
-            return unit
-
-    return False
+    return territory.units.find(unit_to_find) or False
 
 
 def check_territory_has_adjacent_industrial_complex(game_state, player, selected_territory):
@@ -152,13 +140,11 @@ def check_territory_has_adjacent_industrial_complex(game_state, player, selected
 
     :return bool:
     """
-    selected_territory_generic_data = TERRITORY_DATA[selected_territory]
-    neighbors = selected_territory_generic_data['neighbors']
+    for neighbor in MAP_GRAPH.get_neighbor_names(selected_territory):
+        # neutral territories are not in the game state
+        neighbor_data = game_state.territories.get(neighbor)
 
-    for neighbor in neighbors:
-        neighbor_data = game_state.territories[neighbor]
-
-        if player.team_num == neighbor_data.team and neighbor_data.has_factory:
+        if neighbor_data and player.team_num == neighbor_data.team and neighbor_data.has_factory:
             return True
 
     return False
@@ -210,13 +196,7 @@ def number_of_controlled_territories_for_player(game_state, player):
     :player: The player to check.
     :return int: The number of controlled territories.
     """
-    count = 0
-
-    for territory in game_state.territories.values():
-        if territory.team == player.team_num:
-            count += 1
-
-    return count
+    return game_state.get_player_aggregates(player.team_num).territory_count
 
 
 def number_of_industrial_complexes_owned_by_player(game_state, player):
@@ -227,13 +207,7 @@ def number_of_industrial_complexes_owned_by_player(game_state, player):
     :player: The player to check.
     :return int: The number of industrial complexes.
     """
-    count = 0
-
-    for territory in game_state.territories.values():
-        if territory.team == player.team_num and territory.has_factory:
-            count += 1
-
-    return count
+    return game_state.get_player_aggregates(player.team_num).factory_count
 
 
 def get_total_production_capacity_for_player(game_state, player):
@@ -245,14 +219,7 @@ def get_total_production_capacity_for_player(game_state, player):
     :player: The player to check.
     :return int: The total production capacity.
     """
-    total_capacity = 0
-
-    for territory_name, territory in game_state.territories.items():
-        if territory.team == player.team_num and territory.has_factory:
-            territory_power = TERRITORY_DATA[territory_name]['power']
-            total_capacity += territory_power
-
-    return total_capacity
+    return game_state.get_player_aggregates(player.team_num).production_capacity
 
 
 def player_can_purchase_industrial_complex(game_state, player):
@@ -369,10 +336,7 @@ def find_and_remove_unit_from_game(game_state, unit):
     """
     unit_id = unit['unit_id'] if isinstance(unit, dict) else unit.unit_id
 
-    for territory in game_state.territories.values():
-        territory.units = [
-            territory_unit for territory_unit in territory.units if territory_unit.unit_id != unit_id
-        ]
+    game_state.remove_unit(unit_id)
 
 
 def find_amphibious_assault_land_battle(game_state, territory_name):
@@ -0,0 +1,81 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from uuid import uuid4
+
+"""
+Random outcomes of game actions: dice rolls and the IDs of newly created units.
+
+Services get their randomness from here so an action's outcomes can be recorded
+for the action log, and fed back in the same order when the action is replayed.
+
+"""
+
+_recording = ContextVar('recording', default=None)
+_replaying = ContextVar('replaying', default=None)
+
+
+def randint(low, high):
+    """
+    Roll a random integer between low and high, inclusive.
+    """
+    replaying = _replaying.get()
+    if replaying is not None:
+        return replaying['rolls'].pop(0)
+
+    roll = random.randint(low, high)
+
+    recording = _recording.get()
+    if recording is not None:
+        recording['rolls'].append(roll)
+
+    return roll
+
+
+def new_unit_id():
+    """
+    Create an ID for a new unit.
+    """
+    replaying = _replaying.get()
+    if replaying is not None:
+        return replaying['unit_ids'].pop(0)
+
+    unit_id = str(uuid4())
+
+    recording = _recording.get()
+    if recording is not None:
+        recording['unit_ids'].append(unit_id)
+
+    return unit_id
+
+
+@contextmanager
+def record_outcomes():
+    """
+    Record all outcomes within the block.
+
+    :return: Dict of 'rolls' and 'unit_ids', filled as outcomes happen.
+    """
+    outcomes = {'rolls': [], 'unit_ids': []}
+    token = _recording.set(outcomes)
+
+    try:
+        yield outcomes
+    finally:
+        _recording.reset(token)
+
+
+@contextmanager
+def replay_outcomes(outcomes):
+    """
+    Use recorded outcomes, in order, instead of new random ones within the block.
+
+    :param outcomes: Dict of 'rolls' and 'unit_ids' as recorded.
+    """
+    token = _replaying.set({'rolls': list(outcomes.get('rolls', [])),
+                            'unit_ids': list(outcomes.get('unit_ids', []))})
+
+    try:
+        yield
+    finally:
+        _replaying.reset(token)
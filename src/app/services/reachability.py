@@ -0,0 +1,138 @@
+import threading
+from collections import OrderedDict, deque
+
+from app.models.map_graph import MAP_GRAPH
+from app.services.game import get_move_step_error, get_movement_after_step, is_move_stopped_in
+from app.services.game_helpers import is_land_unit, is_sea_unit, is_hostile_territory, territory_has_hostile_units
+
+"""
+The territories a stack of units can reach this phase, for highlighting moves.
+
+A breadth first search over MAP_GRAPH, one step at a time with the same rules as
+move_units (see get_move_step_error and get_movement_after_step), bounded by the
+movement the stack has left. Like a path move, it does not go on from a territory
+with hostile units (see is_move_stopped_in). The game state is read as it is now,
+battles and captures the stack would cause on the way are not played out.
+
+Results are memoized per game state version and stack, so clients asking again for
+the same stack (ex. on every selection change) do not search again until the game changes.
+
+"""
+
+REACHABLE_CACHE_MAX_ENTRIES = 256
+
+_reachable_cache = OrderedDict()
+_reachable_cache_lock = threading.Lock()
+
+
+def get_stack_signature(units):
+    """
+    The parts of the units the search depends on, units with the same signature reach
+    the same territories.
+
+    :return: Tuple of sorted (unit type, movement, in combat this turn).
+    """
+    return tuple(sorted((unit.unit_type, unit.movement, unit.in_combat_this_turn) for unit in units))
+
+
+def get_neighbor_view(units):
+    """
+    :return: The MAP_GRAPH adjacency the stack moves along, or None if it cannot move together.
+    """
+    has_land_unit = any(is_land_unit(unit.unit_type) for unit in units)
+    has_sea_unit = any(is_sea_unit(unit.unit_type) for unit in units)
+
+    if has_land_unit and has_sea_unit:
+        return None
+
+    if has_land_unit:
+        return MAP_GRAPH.land_neighbors
+
+    if has_sea_unit:
+        return MAP_GRAPH.sea_neighbors
+
+    return MAP_GRAPH.neighbors
+
+
+def get_reachable_territories(session, game_state, player, territory_name, units):
+    """
+    Find every territory the units can move to together from territory_name this phase.
+
+    :param units: The units to move, all in territory_name.
+    :return: Dict of territory name to the fewest moves needed to reach it,
+        not including territory_name.
+    """
+    key = (game_state.session_id, game_state.version, session.phase_num, player.team_num,
+           territory_name, get_stack_signature(units))
+
+    with _reachable_cache_lock:
+        reachable = _reachable_cache.get(key)
+
+        if reachable is not None:
+            _reachable_cache.move_to_end(key)
+            return dict(reachable)
+
+    reachable = search_reachable_territories(session, game_state, player, territory_name, units)
+
+    with _reachable_cache_lock:
+        _reachable_cache[key] = reachable
+
+        while len(_reachable_cache) > REACHABLE_CACHE_MAX_ENTRIES:
+            _reachable_cache.popitem(last=False)
+
+    return dict(reachable)
+
+
+def search_reachable_territories(session, game_state, player, territory_name, units):
+    """
+    The search behind get_reachable_territories, without memoization.
+    """
+    neighbor_view = get_neighbor_view(units)
+
+    if not units or neighbor_view is None:
+        return {}
+
+    territories = game_state.territories
+    start_id = MAP_GRAPH.ids[territory_name]
+
+    # a territory is only searched again if reached with more movement left
+    best_movements = {start_id: min(unit.movement for unit in units)}
+    distances = {}
+
+    queue = deque([(start_id, tuple(unit.movement for unit in units), 0)])
+
+    while queue:
+        territory_id, movements, distance = queue.popleft()
+
+        for neighbor_id in neighbor_view[territory_id]:
+            neighbor_name = MAP_GRAPH.names[neighbor_id]
+            neighbor = territories.get(neighbor_name)
+
+            if neighbor is None:
+                continue
+
+            is_ocean = MAP_GRAPH.is_ocean[neighbor_id]
+            is_enemy_territory = is_hostile_territory(neighbor, player.team_num, is_ocean=is_ocean)
+
+            if get_move_step_error(session, units, movements, is_ocean, is_enemy_territory):
+                continue
+
+            has_enemy_units = territory_has_hostile_units(neighbor, player.team_num)
+            has_destroyer = any(unit.unit_type == "DESTROYER" for unit in neighbor.units)
+
+            next_movements = tuple(
+                get_movement_after_step(unit.unit_type, movement, is_enemy_territory,
+                                        has_enemy_units, has_destroyer)
+                for unit, movement in zip(units, movements))
+
+            if neighbor_id != start_id:
+                distances.setdefault(neighbor_name, distance + 1)
+
+            if is_move_stopped_in(neighbor, player.team_num):
+                continue
+
+            if min(next_movements) > best_movements.get(neighbor_id, 0):
+                best_movements[neighbor_id] = min(next_movements)
+                queue.append((neighbor_id, next_movements, distance + 1))
+
+    return distances
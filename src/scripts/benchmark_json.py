@@ -0,0 +1,76 @@
+"""
+Compare JSON encoding of a late game state: the stdlib encoder on to_dict (Flask's
+default provider) against the app's GameJSONProvider serializing the models directly.
+
+Run from src/:
+    python -m scripts.benchmark_json
+"""
+import json
+import timeit
+
+from app.extensions.json_provider import GameJSONProvider, orjson
+from app.models.game_state import GameState
+from app.models.territory_data import TERRITORY_DATA
+from app.models.unit import Unit
+
+
+def build_late_game_state():
+    """
+    A game state with large armies on every owned territory, loaded transports and battles.
+    """
+    game_state = GameState(session_id='benchmark')
+
+    for territory_name, territory in game_state.territories.items():
+        if TERRITORY_DATA[territory_name]['is_ocean']:
+            territory.units.extend(
+                Unit(team=territory.team, unit_type='TRANSPORT',
+                     cargo=[Unit(team=territory.team, unit_type='INFANTRY'),
+                            Unit(team=territory.team, unit_type='TANK')])
+                for _ in range(2))
+            continue
+
+        territory.units.extend(Unit(team=territory.team, unit_type='INFANTRY')
+                               for _ in range(20))
+        territory.units.extend(Unit(team=territory.team, unit_type='TANK')
+                               for _ in range(5))
+
+    for territory_name in ['Germany', 'Russia', 'Eastern Europe', 'Japan']:
+        battle = game_state.add_battle(1, territory_name, 'Germany')
+        battle['attacker_rolls'] = [{'unit_id': unit.unit_id, 'roll': 3, 'result': True}
+                                    for unit in game_state.territories[territory_name].units]
+
+    return game_state
+
+
+def main(number=50):
+    game_state = build_late_game_state()
+
+    unit_count = sum(len(territory.units) for territory in game_state.territories.values())
+
+    cases = {
+        'stdlib json.dumps(to_dict(), sort_keys=True)':
+            lambda: json.dumps(game_state.to_dict(), sort_keys=True),
+        'stdlib json.dumps(game_state, default=provider)':
+            lambda: json.dumps(game_state, default=GameJSONProvider.default),
+    }
+
+    if orjson is not None:
+        cases['orjson.dumps(to_dict())'] = lambda: orjson.dumps(
+            game_state.to_dict())
+        cases['orjson.dumps(game_state, default=provider)'] = lambda: orjson.dumps(
+            game_state, default=GameJSONProvider.default)
+    else:
+        print('orjson is not installed, only the stdlib encoder is compared.')
+
+    print(f"{len(game_state.territories)} territories, {unit_count} units, "
+          f"{len(json.dumps(game_state.to_dict())) // 1024} KB")
+
+    baseline = None
+    for name, encode in cases.items():
+        seconds = min(timeit.repeat(encode, number=number, repeat=3)) / number
+        baseline = baseline or seconds
+        print(f"{name:50} {seconds * 1000:8.2f} ms  {baseline / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
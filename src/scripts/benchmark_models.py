@@ -0,0 +1,62 @@
+"""
+Measure hydrating a late game state with GameState.from_dict: the time taken and
+the memory held by the hydrated Territory and Unit objects, and by the session's Players.
+
+Run from src/:
+    python -m scripts.benchmark_models
+"""
+import gc
+import timeit
+import tracemalloc
+
+from app.models.game_state import GameState
+from app.models.order_of_play import order_of_play
+from app.models.player import Player
+from app.models.session import Session
+from scripts.benchmark_json import build_late_game_state
+
+
+def measure_memory(build):
+    """
+    :return: Tuple of (bytes held by the built objects, number of allocated blocks).
+    """
+    gc.collect()
+    tracemalloc.start()
+
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+
+    tracemalloc.stop()
+    del result
+
+    return current, blocks
+
+
+def main(number=20):
+    game_state_data = build_late_game_state().to_dict()
+
+    session_data = Session(session_id='benchmark').to_dict()
+    session_data['players'] = [Player(session_id='benchmark', country=country,
+                                      mobilization_units=['INFANTRY'] * 5).to_dict()
+                               for country in order_of_play]
+
+    unit_count = sum(len(territory['units']) + sum(len(unit['cargo']) for unit in territory['units'])
+                     for territory in game_state_data['territories'].values())
+
+    print(f"{len(game_state_data['territories'])} territories, {unit_count} units")
+
+    cases = {
+        'GameState.from_dict': lambda: GameState.from_dict(game_state_data),
+        'Session.from_dict': lambda: Session.from_dict(session_data),
+    }
+
+    for name, hydrate in cases.items():
+        seconds = min(timeit.repeat(hydrate, number=number, repeat=7)) / number
+        memory, blocks = measure_memory(hydrate)
+
+        print(f"{name:25} {seconds * 1000:8.2f} ms  {memory // 1024:6} KB  {blocks:7} blocks")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Write .gz and .br (if brotli is installed) siblings of the static files, so
+serve_vue_app can send them without compressing on every request.
+
+Run at build time on the built UI:
+    python scripts/precompress_static.py /app/static
+"""
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.html', '.js', '.mjs', '.css', '.json', '.geojson',
+                           '.svg', '.txt', '.map', '.ico', '.wasm')
+MIN_SIZE = 1024
+
+
+def precompress_file(file_path):
+    """
+    :return: List of the written file paths.
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    compressed_files = {file_path + '.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+
+    if brotli is not None:
+        compressed_files[file_path + '.br'] = brotli.compress(data, quality=11)
+
+    written = []
+
+    for compressed_path, compressed in compressed_files.items():
+        # only keep compressed files that are smaller
+        if len(compressed) >= len(data):
+            continue
+
+        with open(compressed_path, 'wb') as f:
+            f.write(compressed)
+
+        written.append(compressed_path)
+
+    return written
+
+
+if __name__ == '__main__':
+    static_path = sys.argv[1] if len(sys.argv) > 1 else 'static'
+
+    if brotli is None:
+        print('brotli is not installed, only writing .gz files.')
+
+    for directory, _, file_names in os.walk(static_path):
+        for file_name in file_names:
+            file_path = os.path.join(directory, file_name)
+
+            if not file_name.endswith(COMPRESSIBLE_EXTENSIONS) or os.path.getsize(file_path) < MIN_SIZE:
+                continue
+
+            for compressed_path in precompress_file(file_path):
+                print(f"{compressed_path}: {os.path.getsize(compressed_path) // 1024} KB")
+
+    print('Finished operation.')
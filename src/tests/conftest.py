@@ -0,0 +1,82 @@
+import pytest
+
+from app import create_app
+from app.models.order_of_play import order_of_play
+
+
+def make_client(**config):
+    """
+    Create an app on the memory backend and return its test client.
+
+    :param config: Config to add or override.
+    """
+    app = create_app({'TESTING': True, 'STORAGE_BACKEND': 'memory', **config})
+    return app.test_client()
+
+
+def start_game(client):
+    """
+    Create a session and join all five players.
+
+    :return: Tuple of (session ID, dict of country to player ID).
+    """
+    session_id = client.post('/session/create').json['session_id']
+
+    players = {}
+    for country in order_of_play:
+        response = client.post(f'/session/join/{session_id}',
+                               json={'countryName': country})
+        players[country] = response.json['player']['player_id']
+
+    return session_id, players
+
+
+def get_units(game_state, territory_name, unit_type):
+    """
+    :param game_state: A game state as returned by the routes.
+    :return: The units of a type in a territory, as dicts.
+    """
+    return [unit for unit in game_state['territories'][territory_name]['units']
+            if unit['unit_type'] == unit_type]
+
+
+def move_infantry_to_archangel(client, session_id, pid):
+    """
+    End the Soviet purchase phase and move one infantry from Russia to Archangel.
+
+    :return: Tuple of (game state before the move, the moved units, move response).
+    """
+    client.post(f'/game/{session_id}/endphase', query_string={'pid': pid})
+
+    game_state = client.get(f'/game/{session_id}').json['game_state']
+    infantry = get_units(game_state, 'Russia', 'INFANTRY')[:1]
+
+    response = client.post(f'/game/{session_id}/moveunits', query_string={'pid': pid},
+                           json={'territoryA': 'Russia', 'territoryB': 'Archangel', 'units': infantry})
+
+    return game_state, infantry, response
+
+
+@pytest.fixture(name='make_client')
+def make_client_fixture():
+    return make_client
+
+
+@pytest.fixture
+def client():
+    return make_client(CHECK_GAME_INDEXES=True)
+
+
+@pytest.fixture(name='start_game')
+def start_game_fixture():
+    return start_game
+
+
+@pytest.fixture(name='get_units')
+def get_units_fixture():
+    return get_units
+
+
+@pytest.fixture(name='move_infantry_to_archangel')
+def move_infantry_to_archangel_fixture():
+    return move_infantry_to_archangel
@@ -0,0 +1,123 @@
+import pytest
+
+from app.extensions import storage
+from app.models.session import Session
+from app.models.player import Player
+from app.models.game_state import GameState
+from app.models.order_of_play import order_of_play
+from app.services.game import end_turn
+from app.services.outcomes import randint, record_outcomes, replay_outcomes
+from app.models.session_game_state import load_session_and_game_state
+from app.services.action_log import ACTIONS, ActionReplayError, perform_action, rebuild_game_from_action_log
+
+
+def create_started_game():
+    """
+    A started game with all five players.
+    """
+    session = Session()
+    session.players = [Player(session_id=session.session_id, country=country)
+                       for country in order_of_play]
+    game_state = GameState(session_id=session.session_id)
+
+    session.turn_num = -1
+    end_turn(session, game_state)
+
+    return session, game_state
+
+
+def test_recorded_outcomes_are_replayed():
+    with record_outcomes() as outcomes:
+        rolls = [randint(1, 6) for _ in range(10)]
+
+    with replay_outcomes(outcomes):
+        assert [randint(1, 6) for _ in range(10)] == rolls
+
+
+def test_replaying_action_records_rebuilds_the_game():
+    session, game_state = create_started_game()
+    snapshot = (session.to_dict(), game_state.to_dict())
+
+    records = []
+
+    _, _, action = perform_action(session, game_state, 'purchase_unit', {
+        'team_num': 0, 'unit_type': 'INFANTRY'})
+    records.append(action)
+
+    _, _, action = perform_action(session, game_state, 'mobilize_units', {
+        'team_num': 0, 'territory_name': 'Russia', 'units': [{'unit_type': 'INFANTRY'}]})
+    records.append(action)
+
+    # new unit ids are outcomes too
+    assert len(action['outcomes']['unit_ids']) == 1
+
+    replayed_session = Session.from_dict(snapshot[0])
+    replayed_game_state = GameState.from_dict(snapshot[1])
+
+    for action in records:
+        with replay_outcomes(action['outcomes']):
+            ACTIONS[action['action']](
+                replayed_session, replayed_game_state, action['params'])
+
+    assert replayed_game_state.to_dict() == game_state.to_dict()
+    assert replayed_session.to_dict() == session.to_dict()
+
+
+def test_rebuild_matches_the_saved_game_with_held_writes(make_client, start_game, move_infantry_to_archangel):
+    client = make_client(GAME_CACHE_ENABLED=True, GAME_CACHE_WRITE_BEHIND=True,
+                         GAME_CACHE_MAX_STALENESS=60)
+    session_id, players = start_game(client)
+    pid = players['Soviet Union']
+
+    client.post(f'/game/{session_id}/purchaseunit', query_string={'pid': pid}, json={'unitType': 'INFANTRY'})
+    move_infantry_to_archangel(client, session_id, pid)
+
+    with client.application.test_request_context():
+        rebuilt_session, rebuilt_game_state = rebuild_game_from_action_log(session_id)
+
+        # the held writes were sent before rebuilding
+        session, game_state = load_session_and_game_state(session_id)
+
+        assert rebuilt_game_state.to_dict()['territories'] == game_state.to_dict()['territories']
+        assert rebuilt_session.players[0].ipcs == session.players[0].ipcs
+        assert rebuilt_session.phase_num == session.phase_num
+
+
+def test_failed_replay_raises_with_the_action(make_client, start_game, move_infantry_to_archangel):
+    client = make_client()
+    session_id, players = start_game(client)
+    pid = players['Soviet Union']
+
+    move_infantry_to_archangel(client, session_id, pid)
+
+    with client.application.test_request_context():
+        storage.db.game_action_log.update_one({'session_id': session_id, 'seq': 2},
+                                              {'$set': {'params.territory_b': 'Japan'}})
+
+        with pytest.raises(ActionReplayError, match='Action 2 '):
+            rebuild_game_from_action_log(session_id)
+
+
+def test_rebuild_matches_a_batched_game_with_unit_stacks(make_client, start_game, get_units):
+    client = make_client(GAME_STATE_UNIT_STACKS=True)
+    session_id, players = start_game(client)
+    pid = players['Soviet Union']
+
+    client.post(f'/game/{session_id}/endphase', query_string={'pid': pid})
+
+    # the infantry move one at a time, by their IDs within the batch
+    game_state = client.get(f'/game/{session_id}').json['game_state']
+    infantry = get_units(game_state, 'Russia', 'INFANTRY')[:3]
+    assert len(infantry) == 3
+
+    response = client.post(f'/game/{session_id}/actions', query_string={'pid': pid}, json={'actions': [
+        {'type': 'moveunits', 'territoryA': 'Russia', 'territoryB': 'Archangel', 'units': [unit]}
+        for unit in infantry
+    ]})
+    assert response.status_code == 200
+
+    with client.application.test_request_context():
+        rebuilt_session, rebuilt_game_state = rebuild_game_from_action_log(session_id)
+        session, game_state = load_session_and_game_state(session_id)
+
+        assert rebuilt_game_state.to_dict()['territories'] == game_state.to_dict()['territories']
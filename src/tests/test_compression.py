@@ -0,0 +1,49 @@
+import gzip
+
+import pytest
+
+
+
+@pytest.fixture
+def static_folder(tmp_path, monkeypatch):
+    (tmp_path / 'index.html').write_text('<html></html>')
+    (tmp_path / 'map.geojson').write_text('{}')
+    (tmp_path / 'map.geojson.gz').write_bytes(gzip.compress(b'{}'))
+
+    monkeypatch.setenv('STATIC_PATH', str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def client(static_folder, make_client):
+    return make_client()
+
+
+def test_large_responses_are_compressed(client, start_game):
+    session_id, _ = start_game(client)
+
+    response = client.get(f'/game/{session_id}', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'].endswith('-gz"')
+    assert b'territories' in gzip.decompress(response.data)
+
+    # the compressed ETag is revalidated too
+    response = client.get(f'/game/{session_id}', headers={'Accept-Encoding': 'gzip',
+                                                          'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+    response = client.get(f'/game/{session_id}')
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_precompressed_static_files_are_served(client):
+    response = client.get('/map.geojson', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == b'{}'
+    response.close()
+
+    response = client.get('/map.geojson')
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'{}'
+    response.close()
@@ -0,0 +1,314 @@
+import pytest
+
+from app.extensions import storage
+from app.models.map_graph import MAP_GRAPH
+from app.models.session_game_state import load_session_and_game_state
+from app.models.session import PhaseNumber
+from app.models.unit import Unit
+from app.services.game_helpers import territory_has_hostile_units
+from app.services.reachability import get_reachable_territories, search_reachable_territories
+
+
+def test_get_game_state_fields_and_territories(client, start_game):
+    session_id, _ = start_game(client)
+
+    response = client.get(f'/game/{session_id}?fields=battles')
+    assert response.status_code == 200
+    assert set(response.json['game_state']) == {'session_id', 'version', 'battles'}
+
+    # names with dots cannot be projected by the db and are filtered after loading
+    for territory_names in [['Germany', 'Russia'], ['Germany', 'Ukraine S.S.R.']]:
+        response = client.get(f'/game/{session_id}', query_string={'territories': ','.join(territory_names)})
+        assert response.status_code == 200
+        assert set(response.json['game_state']['territories']) == set(territory_names)
+
+    response = client.get(f'/game/{session_id}?fields=battles,secrets')
+    assert response.status_code == 400
+
+
+def test_move_units_returns_delta_against_base_version(client, start_game, get_units):
+    session_id, players = start_game(client)
+    pid = players['Soviet Union']
+
+    client.post(f'/game/{session_id}/endphase', query_string={'pid': pid})
+
+    game_state = client.get(f'/game/{session_id}').json['game_state']
+    infantry = get_units(game_state, 'Russia', 'INFANTRY')[:1]
+
+    response = client.post(f'/game/{session_id}/moveunits',
+                           query_string={'pid': pid,
+                                         'base_version': game_state['version']},
+                           json={'territoryA': 'Russia', 'territoryB': 'Archangel',
+                                 'units': infantry})
+    assert response.status_code == 200
+
+    delta = response.json['game_state_delta']
+    assert 'game_state' not in response.json
+    assert delta['base_version'] == game_state['version']
+    assert delta['version'] == game_state['version'] + 1
+    assert set(delta['territories']) == {'Russia', 'Archangel'}
+
+    # an outdated base version gets the full game state
+    infantry = get_units(delta, 'Russia', 'INFANTRY')[:1]
+
+    response = client.post(f'/game/{session_id}/moveunits',
+                           query_string={'pid': pid,
+                                         'base_version': game_state['version']},
+                           json={'territoryA': 'Russia', 'territoryB': 'Archangel',
+                                 'units': infantry})
+    assert response.status_code == 200
+    assert 'game_state_delta' not in response.json
+    assert len(response.json['game_state']['territories']) == len(
+        game_state['territories'])
+
+
+def test_undo_phase_restores_the_backup(client, start_game, move_infantry_to_archangel):
+    session_id, players = start_game(client)
+    pid = players['Soviet Union']
+
+    game_state, _, response = move_infantry_to_archangel(client, session_id, pid)
+    assert response.status_code == 200
+
+    response = client.post(f'/game/{session_id}/undophase', query_string={'pid': pid})
+    assert response.status_code == 200
+
+    restored = client.get(f'/game/{session_id}').json['game_state']
+    assert restored['territories'] == game_state['territories']
+
+    # versions only move forward, past the move
+    assert restored['version'] == game_state['version'] + 2
+
+    with client.application.app_context():
+        # the backup is replaced on every movement phase, never duplicated
+        for _ in range(2):
+            client.post(f'/game/{session_id}/endphase', query_string={'pid': pid})
+        assert len(storage.db.game_state_backup.find({'session_id': session_id})) == 1
+
+        storage.db.game_state_backup.delete_many({'session_id': session_id})
+
+    response = client.post(f'/game/{session_id}/undophase', query_string={'pid': pid})
+    assert response.status_code == 404
+
+
+def test_batch_actions_are_saved_together(client, start_game, get_units):
+    session_id, players = start_game(client)
+    pid = players['Soviet Union']
+
+    client.post(f'/game/{session_id}/endphase', query_string={'pid': pid})
+
+    game_state = client.get(f'/game/{session_id}').json['game_state']
+    infantry = get_units(game_state, 'Russia', 'INFANTRY')[:2]
+
+    def move(units, territory_b='Archangel'):
+        return {'type': 'moveunits', 'territoryA': 'Russia', 'territoryB': territory_b, 'units': units}
+
+    # a failed action saves none of the batch
+    response = client.post(f'/game/{session_id}/actions', query_string={'pid': pid},
+                           json={'actions': [move(infantry[:1]), move(infantry[1:], 'Japan')]})
+    assert response.status_code == 400
+    assert response.json['failed_index'] == 1
+    assert len(response.json['results']) == 1
+
+    unchanged = client.get(f'/game/{session_id}').json['game_state']
+    assert unchanged['version'] == game_state['version']
+    assert unchanged['territories']['Russia'] == game_state['territories']['Russia']
+
+    response = client.post(f'/game/{session_id}/actions', query_string={'pid': pid},
+                           json={'actions': [move(infantry[:1]), move(infantry[1:])]})
+    assert response.status_code == 200
+    assert [result['result'] for result in response.json['results']] == [True, True]
+
+    # both moves are one update
+    updated = response.json['game_state']
+    assert updated['version'] == game_state['version'] + 1
+
+    archangel_ids = {unit['unit_id'] for unit in updated['territories']['Archangel']['units']}
+    assert {unit['unit_id'] for unit in infantry} <= archangel_ids
+
+    # actions must be allowed in the current phase
+    response = client.post(f'/game/{session_id}/actions', query_string={'pid': pid},
+                           json={'actions': [{'type': 'purchaseunit', 'unitType': 'INFANTRY'}]})
+    assert response.status_code == 400
+
+
+def test_reachable_territories_match_moves(client, start_game, get_units):
+    session_id, players = start_game(client)
+    pid = players['Soviet Union']
+
+    client.post(f'/game/{session_id}/endphase', query_string={'pid': pid})
+
+    game_state = client.get(f'/game/{session_id}').json['game_state']
+    infantry = get_units(game_state, 'Russia', 'INFANTRY')[:1]
+    fighter = get_units(game_state, 'Russia', 'FIGHTER')[:1]
+
+    def get_reachable(units):
+        return client.get(f'/game/{session_id}/reachable',
+                          query_string={'pid': pid, 'territory': 'Russia',
+                                        'units': ','.join(unit['unit_id'] for unit in units)})
+
+    response = get_reachable(infantry)
+    assert response.status_code == 200
+
+    reachable = response.json['reachable']
+    assert 'Archangel' in reachable
+    assert set(reachable.values()) == {1}
+    assert not any(MAP_GRAPH.get_is_ocean(name) for name in reachable)
+
+    # a fighter flies further, over oceans
+    reachable_by_fighter = get_reachable(fighter).json['reachable']
+    assert set(reachable) <= set(reachable_by_fighter)
+    assert max(reachable_by_fighter.values()) > 1
+
+    # like a path move, the fighter does not fly on from territories with hostile units
+    with client.application.test_request_context():
+        _, loaded_game_state = load_session_and_game_state(session_id)
+
+    def can_move_on_from(name):
+        return not territory_has_hostile_units(loaded_game_state.territories[name], 0)
+
+    assert not can_move_on_from('West Russia')
+    for name, distance in reachable_by_fighter.items():
+        if distance > 1:
+            assert any(reachable_by_fighter.get(neighbor_name) == distance - 1 and can_move_on_from(neighbor_name)
+                       for neighbor_name in MAP_GRAPH.get_neighbor_names(name)), name
+
+    # reachable territories are valid moves
+    response = client.post(f'/game/{session_id}/moveunits', query_string={'pid': pid},
+                           json={'territoryA': 'Russia', 'territoryB': 'Archangel', 'units': infantry})
+    assert response.status_code == 200
+
+    # units must be in the territory
+    assert get_reachable(infantry).status_code == 400
+
+
+@pytest.fixture
+def combat_move(client, start_game):
+    """
+    Start a game, end the Soviet purchase phase and load it, for service level tests.
+
+    :return: Tuple of (Session, GameState, Soviet player).
+    """
+    session_id, players = start_game(client)
+    client.post(f'/game/{session_id}/endphase', query_string={'pid': players['Soviet Union']})
+
+    with client.application.test_request_context():
+        session, game_state = load_session_and_game_state(session_id)
+
+    return session, game_state, session.get_player_by_team_num(0)
+
+
+def get_unit_objects(game_state, territory_name, unit_type):
+    return [unit for unit in game_state.territories[territory_name].units if unit.unit_type == unit_type]
+
+
+def test_reachable_tank_blitzes_through_empty_enemy_territory(combat_move):
+    session, game_state, player = combat_move
+    tank = get_unit_objects(game_state, 'Russia', 'TANK')[:1]
+    infantry = get_unit_objects(game_state, 'Russia', 'INFANTRY')[:1]
+
+    # West Russia has German units, the tank stops there to fight
+    assert 'Belorussia' not in search_reachable_territories(session, game_state, player, 'Russia', tank)
+
+    for unit in list(game_state.territories['West Russia'].units):
+        game_state.remove_unit(unit.unit_id)
+
+    assert search_reachable_territories(session, game_state, player, 'Russia', tank)['Belorussia'] == 2
+
+    # other land units stop when they enter the enemy territory
+    reachable = search_reachable_territories(session, game_state, player, 'Russia', infantry)
+    assert reachable['West Russia'] == 1
+    assert 'Belorussia' not in reachable
+
+
+def test_reachable_submarine_is_stopped_by_a_destroyer(combat_move):
+    session, game_state, player = combat_move
+    submarine = get_unit_objects(game_state, 'ocean_tile_4', 'SUBMARINE')
+
+    reachable = search_reachable_territories(session, game_state, player, 'ocean_tile_4', submarine)
+    assert reachable == {'ocean_tile_3': 1, 'ocean_tile_2': 2, 'ocean_tile_6': 2}
+
+    game_state.add_units('ocean_tile_3', [Unit(team=1, unit_type='DESTROYER')])
+
+    reachable = search_reachable_territories(session, game_state, player, 'ocean_tile_4', submarine)
+    assert reachable == {'ocean_tile_3': 1}
+
+
+def test_reachable_anti_aircraft_only_moves_in_non_combat(combat_move):
+    session, game_state, player = combat_move
+    anti_aircraft = get_unit_objects(game_state, 'Russia', 'ANTI-AIRCRAFT')
+
+    assert search_reachable_territories(session, game_state, player, 'Russia', anti_aircraft) == {}
+
+    session.phase_num = PhaseNumber.NON_COMBAT_MOVE
+    assert search_reachable_territories(session, game_state, player, 'Russia', anti_aircraft)['Archangel'] == 1
+
+
+def test_reachable_excludes_hostile_territories_in_non_combat(combat_move):
+    session, game_state, player = combat_move
+    session.phase_num = PhaseNumber.NON_COMBAT_MOVE
+
+    for unit_type in ['INFANTRY', 'TANK', 'FIGHTER']:
+        units = get_unit_objects(game_state, 'Russia', unit_type)[:1]
+        reachable = search_reachable_territories(session, game_state, player, 'Russia', units)
+
+        assert 'Archangel' in reachable
+        assert 'West Russia' not in reachable
+
+
+def test_reachable_territories_are_searched_again_for_a_new_version(combat_move):
+    session, game_state, player = combat_move
+    tank = get_unit_objects(game_state, 'Russia', 'TANK')[:1]
+
+    assert 'Belorussia' not in get_reachable_territories(session, game_state, player, 'Russia', tank)
+
+    for unit in list(game_state.territories['West Russia'].units):
+        game_state.remove_unit(unit.unit_id)
+
+    # memoized for the same version
+    assert 'Belorussia' not in get_reachable_territories(session, game_state, player, 'Russia', tank)
+
+    game_state.version += 1
+    assert 'Belorussia' in get_reachable_territories(session, game_state, player, 'Russia', tank)
+
+
+def test_move_units_along_path_is_one_update(client, start_game, get_units):
+    session_id, players = start_game(client)
+    pid = players['Soviet Union']
+
+    client.post(f'/game/{session_id}/endphase', query_string={'pid': pid})
+
+    game_state = client.get(f'/game/{session_id}').json['game_state']
+    fighter = get_units(game_state, 'Russia', 'FIGHTER')[:1]
+    tank = get_units(game_state, 'Russia', 'TANK')[:1]
+
+    def move(units, path):
+        return client.post(f'/game/{session_id}/moveunits', query_string={'pid': pid},
+                           json={'territoryA': 'Russia', 'units': units, 'path': path})
+
+    # the path must be connected
+    response = move(fighter, ['Archangel', 'Belorussia'])
+    assert response.status_code == 400
+
+    # and a list of territories, with units to move
+    assert move(fighter, 'Archangel').status_code == 400
+    assert move(fighter, [['Archangel']]).status_code == 400
+    assert move([], ['Archangel']).status_code == 400
+
+    # the fighter has 4 movement, it stops one territory short
+    response = move(fighter, ['Archangel', 'Karelia S.S.R.', 'Archangel', 'Karelia S.S.R.', 'Archangel'])
+    assert response.status_code == 200
+    assert response.json['stopped_at'] == 'Karelia S.S.R.'
+    assert response.json['stop_reason'] == 'Unit does not have enough movement.'
+
+    game_state_after = response.json['game_state']
+    assert game_state_after['version'] == game_state['version'] + 1
+
+    fighter_after = next(unit for unit in game_state_after['territories']['Karelia S.S.R.']['units']
+                         if unit['unit_id'] == fighter[0]['unit_id'])
+    assert fighter_after['movement'] == 0
+
+    # the tank stops to fight in West Russia
+    response = move(tank, ['West Russia', 'Belorussia'])
+    assert response.status_code == 200
+    assert response.json['stopped_at'] == 'West Russia'
+    assert 'West Russia' in [battle['location'] for battle in response.json['game_state']['battles']]
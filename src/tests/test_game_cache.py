@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from app.extensions import game_cache
+from app.extensions.game_cache import GameCache
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update({'GAME_CACHE_ENABLED': True,
+                       'GAME_CACHE_MAX_ENTRIES': 2})
+    return app
+
+
+@pytest.fixture
+def cache(app):
+    cache = GameCache()
+    cache.init_app(app, storage=None)
+    return cache
+
+
+def make_game(version=0):
+    return SimpleNamespace(version=version), SimpleNamespace(version=version)
+
+
+def test_committed_game_is_a_hit_while_versions_match(app, cache):
+    with app.test_request_context():
+        cache.put('a', *make_game(), size=1)
+        cache.commit('a')
+
+    with app.test_request_context():
+        assert cache.get('a', (0, 0)) is not None
+        cache.commit('a')
+
+    with app.test_request_context():
+        # another worker updated the game
+        assert cache.get('a', (1, 0)) is None
+
+    assert cache.stats['hits'] == 1
+    assert cache.stats['stale'] == 1
+
+
+def test_uncommitted_game_is_evicted_after_the_request(app, cache):
+    with app.test_request_context():
+        cache.put('a', *make_game(), size=1)
+        app.do_teardown_request()
+
+    assert 'a' not in cache.entries
+    assert cache.stats['evictions'] == 1
+
+
+def test_least_recently_used_game_is_evicted(app, cache):
+    with app.test_request_context():
+        for session_id in ['a', 'b', 'c']:
+            cache.put(session_id, *make_game(), size=1)
+            cache.commit(session_id)
+
+    assert list(cache.entries) == ['b', 'c']
+
+
+def test_reads_see_held_writes(make_client, start_game, move_infantry_to_archangel):
+    client = make_client(GAME_CACHE_ENABLED=True, GAME_CACHE_WRITE_BEHIND=True,
+                         GAME_CACHE_MAX_STALENESS=60)
+    session_id, players = start_game(client)
+    pid = players['Soviet Union']
+
+    etag = client.get(f'/session/{session_id}').headers['ETag']
+
+    response = client.post(f'/game/{session_id}/purchaseunit', query_string={'pid': pid},
+                           json={'unitType': 'INFANTRY'})
+    ipcs = response.json['session']['players'][0]['ipcs']
+    assert game_cache.get_held_versions(session_id)
+
+    # the held version is newer than the client's
+    assert client.get(f'/session/{session_id}', headers={'If-None-Match': etag}).status_code == 200
+
+    response = client.get(f'/session/{session_id}')
+    assert response.json['session']['players'][0]['ipcs'] == ipcs
+    assert game_cache.get_held_versions(session_id) is None
+
+    game_etag = client.get(f'/game/{session_id}').headers['ETag']
+    _, infantry, _ = move_infantry_to_archangel(client, session_id, pid)
+
+    assert client.get(f'/game/{session_id}', headers={'If-None-Match': game_etag}).status_code == 200
+
+    archangel = client.get(f'/game/{session_id}?territories=Archangel').json['game_state']['territories']['Archangel']
+    assert infantry[0]['unit_id'] in [unit['unit_id'] for unit in archangel['units']]
+
+
+def test_flush_between_update_and_commit_keeps_the_new_writes(monkeypatch, make_client, start_game):
+    client = make_client(GAME_CACHE_ENABLED=True, GAME_CACHE_WRITE_BEHIND=True,
+                         GAME_CACHE_MAX_STALENESS=60)
+    session_id, players = start_game(client)
+    pid = players['Soviet Union']
+
+    # the background flush runs after the objects are updated, before their writes are held
+    commit = game_cache.commit
+
+    def flush_then_commit(session_id, *args, **kwargs):
+        game_cache.flush(session_id)
+        commit(session_id, *args, **kwargs)
+
+    monkeypatch.setattr(game_cache, 'commit', flush_then_commit)
+
+    for unit_type in ['INFANTRY', 'TANK', 'ARTILLERY']:
+        response = client.post(f'/game/{session_id}/purchaseunit', query_string={'pid': pid},
+                               json={'unitType': unit_type})
+        assert response.status_code == 200
+
+    assert game_cache.stats['conflicts'] == 0
+
+    response = client.get(f'/session/{session_id}')
+    assert response.json['session']['players'][0]['mobilization_units'] == ['INFANTRY', 'TANK', 'ARTILLERY']
@@ -0,0 +1,82 @@
+import http.client
+import json
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+from app.models.order_of_play import order_of_play
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(EVENTS_ENABLED=True, EVENTS_HEARTBEAT=0.05, EVENTS_STREAM_TIMEOUT=0.2)
+
+
+def read_events(response):
+    """
+    The 'update' events of a finished stream.
+    """
+    body = b''.join(response.response).decode()
+
+    return [json.loads(line[len('data: '):]) for line in body.splitlines()
+            if line.startswith('data: ')]
+
+
+def test_updates_are_streamed_to_subscribers(client):
+    session_id = client.post('/session/create').json['session_id']
+
+    response = client.get(f'/game/{session_id}/events')
+    assert response.status_code == 404
+
+    players = {}
+    for country in order_of_play:
+        response = client.post(f'/session/join/{session_id}',
+                               json={'countryName': country})
+        players[country] = response.json['player']['player_id']
+
+    stream = client.get(f'/game/{session_id}/events')
+    assert stream.mimetype == 'text/event-stream'
+
+    client.post(f'/game/{session_id}/endphase',
+                query_string={'pid': players[order_of_play[0]]})
+
+    events = read_events(stream)
+
+    assert len(events) == 1
+    assert events[0]['session']['phase_num'] == 1
+
+
+def test_streams_are_disabled_by_default(make_client):
+    client = make_client()
+    session_id = client.post('/session/create').json['session_id']
+
+    response = client.get(f'/game/{session_id}/events')
+    assert response.status_code == 404
+    assert response.json['status'] == 'Game event streams are disabled.'
+
+
+def test_requests_are_served_while_a_stream_is_open(make_client, start_game):
+    client = make_client(EVENTS_ENABLED=True, EVENTS_HEARTBEAT=0.05, EVENTS_STREAM_TIMEOUT=2)
+    session_id, _ = start_game(client)
+
+    server = make_server('127.0.0.1', 0, client.application, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        stream = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+        stream.request('GET', f'/game/{session_id}/events')
+        stream_response = stream.getresponse()
+        assert stream_response.readline().startswith(b'retry:')
+
+        connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=1)
+        connection.request('GET', f'/session/{session_id}')
+        response = connection.getresponse()
+
+        assert response.status == 200
+        assert json.loads(response.read())['session_id'] == session_id
+
+        connection.close()
+        stream.close()
+    finally:
+        server.shutdown()
@@ -0,0 +1,145 @@
+from app.models.game_state import GameState
+from app.models.unit import Unit
+
+
+def load_game_state():
+    """
+    A game state as it would be loaded from the db.
+    """
+    return GameState.from_dict(GameState(session_id='test').to_dict())
+
+
+def test_unchanged_game_state_has_no_changes():
+    game_state = load_game_state()
+
+    set_fields, unset_fields, _ = game_state.get_changes()
+
+    assert set_fields == {}
+    assert unset_fields == []
+
+
+def test_changes_only_include_touched_territories():
+    game_state = load_game_state()
+
+    unit = game_state.territories['Germany'].units.pop()
+    game_state.territories['Eastern Europe'].units.append(unit)
+    game_state.territories['Eastern Europe'].team = 0
+
+    set_fields, unset_fields, _ = game_state.get_changes()
+
+    assert set(set_fields) == {'territories.Germany.units',
+                               'territories.Eastern Europe.units',
+                               'territories.Eastern Europe.team'}
+    assert unset_fields == []
+
+
+def test_territory_name_with_dots_sets_all_territories():
+    game_state = load_game_state()
+
+    game_state.territories['Ukraine S.S.R.'].team = 0
+
+    set_fields, _, _ = game_state.get_changes()
+
+    assert list(set_fields) == ['territories']
+    assert set_fields['territories']['Ukraine S.S.R.']['team'] == 0
+
+
+def test_battles_and_production_counts_are_tracked():
+    game_state = load_game_state()
+
+    game_state.add_battle(1, 'Eastern Europe', 'Germany')
+    game_state.factory_production_counts['Germany'] = 2
+
+    set_fields, _, current_territories = game_state.get_changes()
+    assert set(set_fields) == {'battles', 'factory_production_counts'}
+
+    game_state.mark_persisted(current_territories)
+
+    # battles are mutated in place during combat
+    game_state.battles[0]['turn'] += 1
+
+    set_fields, _, _ = game_state.get_changes()
+    assert set(set_fields) == {'battles'}
+
+
+def test_version_is_not_part_of_changes():
+    game_state = GameState.from_dict(
+        dict(GameState(session_id='test').to_dict(), version=4))
+
+    assert game_state.version == 4
+
+    game_state._snapshot = None
+    set_fields, _, _ = game_state.get_changes()
+
+    # the version is incremented by the update, never set
+    assert 'version' not in set_fields
+
+
+def test_player_aggregates_follow_captures_and_factories():
+    game_state = load_game_state()
+
+    germany = game_state.get_player_aggregates(1)
+    territory_count, income = germany.territory_count, germany.income
+
+    game_state.set_territory_team('Eastern Europe', 0)
+    game_state.set_territory_team('Karelia S.S.R.', 1)
+    game_state.add_factory('Karelia S.S.R.')
+
+    assert game_state.check_player_aggregates() == []
+    assert game_state.get_player_aggregates(1).territory_count == territory_count
+
+    # changing a territory directly is found by the checker
+    game_state.territories['Germany'].team = 0
+    assert game_state.check_player_aggregates()
+
+    assert load_game_state().get_player_aggregates(1).income == income
+
+
+def test_unit_index_follows_moves_loads_and_removals():
+    game_state = load_game_state()
+
+    infantry = next(unit for unit in game_state.territories['Germany'].units
+                    if unit.unit_type == 'INFANTRY')
+    transport = next(unit for territory in game_state.territories.values()
+                     for unit in territory.units if unit.unit_type == 'TRANSPORT' and unit.team == 1)
+    transport_territory_name = game_state.find_unit(transport.unit_id)[1]
+
+    game_state.move_units_to('Eastern Europe', [infantry])
+    assert game_state.find_unit(infantry.unit_id) == (infantry, 'Eastern Europe', None)
+
+    game_state.load_units(transport, [infantry])
+    assert game_state.find_unit(infantry.unit_id) == (infantry, transport_territory_name, transport)
+    assert infantry not in game_state.territories['Eastern Europe'].units
+
+    # cargo is removed with its transport
+    game_state.remove_unit(transport.unit_id)
+    assert game_state.find_unit(transport.unit_id) is None
+    assert game_state.find_unit(infantry.unit_id) is None
+
+    assert game_state.check_unit_index() == []
+
+    # changing a territory's units directly is found by the checker
+    game_state.territories['Germany'].units.pop()
+    assert game_state.check_unit_index()
+
+
+def test_territory_units_are_found_by_id_and_equality():
+    game_state = load_game_state()
+    units = game_state.territories['Germany'].units
+
+    unit = next(iter(units))
+    client_unit = Unit.from_dict(unit.to_dict())
+
+    assert units.find(client_unit) is unit
+
+    # a stale movement does not match
+    client_unit.movement += 1
+    assert units.find(client_unit) is None
+    assert client_unit not in units
+
+    count = len(units)
+    taken = units.take([unit.unit_id])
+    assert taken == [unit] and len(units) == count - 1
+
+    units.put(taken)
+    assert list(units)[-1] is unit
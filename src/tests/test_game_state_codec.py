@@ -0,0 +1,44 @@
+from app.models.game_state import GameState
+from app.models.game_state_codec import decode_game_state, encode_game_state
+from app.models.unit import Unit
+
+
+def load_compact_game_state():
+    """
+    A compact game state as it would be loaded from the db.
+    """
+    game_state = GameState(session_id='test')
+    game_state.storage_format = 'compact'
+    return GameState.from_dict(game_state.to_document())
+
+
+def test_compact_format_round_trips():
+    game_state = GameState(session_id='test')
+    transport = Unit(team=1, unit_type='TRANSPORT',
+                     cargo=[Unit(team=1, unit_type='TANK')])
+    game_state.territories['Germany'].units.append(transport)
+    game_state.add_battle(1, 'Ukraine S.S.R.', 'Germany')
+    game_state.battles[0]['hit_battleships'].append(transport.unit_id)
+    game_state.factory_production_counts['Germany'] = 2
+
+    data = game_state.to_dict()
+    encoded = encode_game_state(data)
+
+    assert decode_game_state(encoded) == data
+    assert len(str(encoded)) < len(str(data)) / 2
+
+
+def test_compact_changes_use_territory_indices():
+    game_state = load_compact_game_state()
+
+    assert game_state.storage_format == 'compact'
+
+    game_state.territories['Ukraine S.S.R.'].team = 0
+    game_state.factory_production_counts['Germany'] = 2
+
+    set_fields, unset_fields, _ = game_state.get_changes()
+
+    # names with dots are updated with a path like any other territory
+    assert set(set_fields) == {'T.71.t', 'P'}
+    assert set_fields['T.71.t'] == 0
+    assert unset_fields == []
@@ -0,0 +1,38 @@
+import pytest
+from pymongo.errors import DuplicateKeyError, ServerSelectionTimeoutError
+
+from app import apply_indexes
+from app.extensions import storage
+from app.models.indexes import INDEXES
+
+
+@pytest.fixture
+def app(make_client):
+    return make_client().application
+
+
+def test_registered_indexes_are_created_at_startup(app):
+    with app.app_context():
+        for collection_name, indexes in INDEXES.items():
+            existing_names = storage.db[collection_name].index_information()
+            assert all(index.document['name'] in existing_names for index in indexes)
+
+        # creating them again is a no-op
+        report = apply_indexes(app)
+        assert report['missing'] == []
+        assert report['unregistered'] == []
+
+        storage.db.session.insert_one({'session_id': 'a'})
+        with pytest.raises(DuplicateKeyError):
+            storage.db.session.insert_one({'session_id': 'a'})
+
+
+def test_unreachable_database_does_not_stop_the_app(app, monkeypatch, caplog):
+    def create_indexes(indexes):
+        raise ServerSelectionTimeoutError('localhost:27017: connection refused')
+
+    with app.app_context():
+        monkeypatch.setattr(storage.db.session, 'create_indexes', create_indexes)
+
+        assert apply_indexes(app) == {}
+        assert 'Could not apply database indexes' in caplog.text
@@ -0,0 +1,27 @@
+import json
+
+from flask import Flask
+
+from app.extensions.json_provider import GameJSONProvider
+from app.models.game_state import GameState
+from app.models.session import Session
+from app.models.player import Player
+from app.models.unit import Unit
+
+
+def test_models_are_serialized_like_to_dict():
+    app = Flask(__name__)
+    app.json = GameJSONProvider(app)
+
+    game_state = GameState(session_id='test')
+    game_state.territories['Germany'].units.append(
+        Unit(team=1, unit_type='TRANSPORT', cargo=[Unit(team=1, unit_type='TANK')]))
+
+    session = Session()
+    session.players = [Player(session_id=session.session_id, country='Germany')]
+
+    data = json.loads(app.json.dumps({'game_state': game_state, 'session': session}))
+
+    assert data['game_state'] == game_state.to_dict()
+    # players are sanitized, their IDs are secret
+    assert data['session'] == session.to_dict(sanitize_players=True)
@@ -0,0 +1,31 @@
+import pytest
+
+from app.models.map_graph import MAP_GRAPH
+from app.models.territory_data import TERRITORY_DATA
+
+
+def test_adjacency_matches_territory_data():
+    for territory_name, territory_data in TERRITORY_DATA.items():
+        for neighbor_name in TERRITORY_DATA:
+            assert MAP_GRAPH.are_neighbors(territory_name, neighbor_name) == (
+                neighbor_name in territory_data['neighbors'])
+
+    assert not MAP_GRAPH.are_neighbors('Germany', 'Atlantis')
+
+
+def test_views_split_land_and_sea():
+    assert MAP_GRAPH.get_neighbor_names('Germany', 'land_neighbors') == [
+        name for name in MAP_GRAPH.get_neighbor_names('Germany')
+        if not TERRITORY_DATA[name]['is_ocean']]
+
+    for territory_id, neighbor_ids in enumerate(MAP_GRAPH.sea_neighbors):
+        assert all(MAP_GRAPH.is_ocean[territory_id] and MAP_GRAPH.is_ocean[neighbor_id]
+                   for neighbor_id in neighbor_ids)
+
+    assert MAP_GRAPH.get_power('Germany') == TERRITORY_DATA['Germany']['power']
+    assert MAP_GRAPH.get_is_capital('Germany') == TERRITORY_DATA['Germany']['is_capital']
+    assert MAP_GRAPH.get_original_team('Germany') == TERRITORY_DATA['Germany']['team']
+
+    with pytest.raises(AttributeError):
+        MAP_GRAPH.power = ()
+
@@ -1,18 +1,24 @@
+import os
+
 import pytest
 from app import create_app
-from app.extensions import mongo
+from app.extensions import storage
+from app.models.player import Player
 
 
 @pytest.fixture
 def app():
+    # set TEST_STORAGE_BACKEND=mongo to run against a local MongoDB
     app = create_app({
         "TESTING": True,
+        "STORAGE_BACKEND": os.environ.get("TEST_STORAGE_BACKEND", "memory"),
         "MONGO_URI": "mongodb://localhost:27017/test_db"
     })
 
     with app.app_context():
         yield app
-        mongo.db.client.drop_database("test_db")
+        if storage.backend == "mongo":
+            storage.db.client.drop_database("test_db")
 
 
 @pytest.fixture
@@ -32,7 +38,7 @@ def test_create_session(client):
     session_id = response.json['session_id']
 
     # Verify data was inserted into the test database
-    session = mongo.db.session.find_one(
+    session = storage.db.session.find_one(
         {"session_id": session_id})
     assert session is not None
     assert "session_id" in session
@@ -58,3 +64,57 @@ def test_handle_join_session(client):
     assert response.status_code == 200
     assert "session_id" in response.json
     assert len(response.json['session']['players']) == 1
+
+
+def test_get_session_answers_if_none_match(client):
+    session_id = client.post("/session/create").json['session_id']
+
+    response = client.get(f"/session/{session_id}")
+    etag = response.headers['ETag']
+
+    response = client.get(f"/session/{session_id}",
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+    # other query parameters return other data
+    response = client.get(f"/session/{session_id}?fields=turn_num",
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+    client.post(f"/session/join/{session_id}",
+                json={'countryName': 'United States'})
+
+    response = client.get(f"/session/{session_id}",
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_get_session_fields_hides_player_ids(client):
+    session_id = client.post("/session/create").json['session_id']
+    player_id = client.post(f"/session/join/{session_id}",
+                            json={'countryName': 'United States'}).json['player']['player_id']
+
+    response = client.get(f"/session/{session_id}?fields=turn_num,players")
+    assert response.status_code == 200
+    assert set(response.json['session']) == {'session_id', 'version', 'turn_num', 'players'}
+    assert response.json['session']['players'] == [
+        {'country': 'United States', 'ipcs': 0, 'mobilization_units': []}]
+
+    # the full session is sanitized too, the player's own data is only sent with ?pid
+    response = client.get(f"/session/{session_id}?pid={player_id}")
+    assert 'player_id' not in response.json['session']['players'][0]
+    assert response.json['player']['player_id'] == player_id
+
+    response = client.get(f"/session/{session_id}?fields=turn_num,password")
+    assert response.status_code == 400
+
+
+def test_players_have_their_own_mobilization_units():
+    player_a = Player(session_id='test', country='Germany')
+    player_b = Player(session_id='test', country='Japan')
+
+    player_a.mobilization_units.append('INFANTRY')
+
+    assert player_b.mobilization_units == []
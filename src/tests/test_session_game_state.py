@@ -0,0 +1,115 @@
+import pytest
+
+from app.extensions import storage
+from app.models.session import PhaseNumber
+from app.models.session_game_state import load_session_and_game_state, update_session_and_game_state
+from app.models.version import VersionConflictError
+from app.routes.helpers import retry_on_version_conflict
+
+
+def test_game_state_conflict_leaves_session_unchanged(make_client, start_game):
+    client = make_client()
+    app = client.application
+    session_id, _ = start_game(client)
+
+    with app.test_request_context():
+        session, game_state = load_session_and_game_state(session_id)
+        stored_session = storage.db.session.find_one({'session_id': session_id}, {'_id': 0})
+
+        session.increment_phase()
+        game_state.set_territory_team('Eastern Europe', 0)
+
+        # another request logs an action and updates the game state after the session is written
+        session_collection = storage.db.session
+        find_one_and_update = session_collection.find_one_and_update
+
+        def update_then_conflict(*args, **kwargs):
+            result = find_one_and_update(*args, **kwargs)
+            find_one_and_update({'session_id': session_id}, {'$inc': {'action_seq': 1}})
+            storage.db.game_state.update_one({'session_id': session_id}, {'$inc': {'version': 1}})
+            return result
+
+        session_collection.find_one_and_update = update_then_conflict
+
+        try:
+            with pytest.raises(VersionConflictError):
+                update_session_and_game_state(session, game_state)
+        finally:
+            del session_collection.find_one_and_update
+
+        # the session write was undone, so a retry does not advance the phase twice,
+        # and the other request's update is kept
+        assert storage.db.session.find_one({'session_id': session_id}, {'_id': 0}) == {
+            **stored_session, 'action_seq': stored_session.get('action_seq', 0) + 1}
+
+        session, game_state = load_session_and_game_state(session_id)
+        assert session.phase_num == PhaseNumber.PURCHASE_UNITS
+
+
+def test_outdated_game_state_leaves_session_version(make_client, start_game):
+    client = make_client()
+    app = client.application
+    session_id, _ = start_game(client)
+
+    with app.test_request_context():
+        session, game_state = load_session_and_game_state(session_id)
+        version = session.version
+
+        session.increment_phase()
+        game_state.set_territory_team('Eastern Europe', 0)
+        storage.db.game_state.update_one({'session_id': session_id}, {'$inc': {'version': 1}})
+
+        with pytest.raises(VersionConflictError):
+            update_session_and_game_state(session, game_state)
+
+        assert storage.db.session.find_one({'session_id': session_id})['version'] == version
+
+
+def test_embedded_game_state_is_stored_in_the_session(make_client, start_game):
+    client = make_client(GAME_STORAGE_MODE='embedded')
+    app = client.application
+    session_id, players = start_game(client)
+
+    with app.test_request_context():
+        assert storage.db.game_state.find_one({'session_id': session_id}) is None
+
+        stored = storage.db.session.find_one({'session_id': session_id})
+        assert stored['game_state']['session_id'] == session_id
+
+        session, game_state = load_session_and_game_state(session_id)
+        session.increment_phase()
+        game_state.set_territory_team('Eastern Europe', 0)
+
+        update_session_and_game_state(session, game_state)
+
+        session, game_state = load_session_and_game_state(session_id)
+        assert session.phase_num == PhaseNumber.COMBAT_MOVE
+        assert game_state.territories['Eastern Europe'].team == 0
+        assert (session.version, game_state.version) == (stored['version'] + 1,
+                                                         stored['game_state']['version'] + 1)
+
+        # an outdated copy conflicts and writes neither
+        session.version -= 1
+        session.increment_phase()
+
+        with pytest.raises(VersionConflictError):
+            update_session_and_game_state(session, game_state)
+
+    # the routes read and write the embedded documents
+    response = client.get(f'/game/{session_id}')
+    assert response.status_code == 200
+    assert response.json['game_state']['territories']['Eastern Europe']['team'] == 0
+
+
+def test_conflicts_are_logged_and_retried(caplog, make_client):
+    app = make_client(VERSION_CONFLICT_RETRIES=2).application
+
+    @retry_on_version_conflict
+    def conflicting_view():
+        raise VersionConflictError("Session a was updated by another request.")
+
+    with app.test_request_context(), caplog.at_level('INFO'):
+        response, status_code = conflicting_view()
+
+    assert status_code == 409
+    assert 'Version conflict in conflicting_view, attempt 2 of 2' in caplog.text
@@ -0,0 +1,44 @@
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    (tmp_path / 'index.html').write_text('<html></html>')
+    (tmp_path / 'map.geojson').write_text('{}')
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'assets' / 'index-BxZ1a9_f.js').write_text('console.log(1)')
+
+    monkeypatch.setenv('STATIC_PATH', str(tmp_path))
+    app = create_app({'TESTING': True, 'STORAGE_BACKEND': 'memory'})
+
+    # the manifest is built once, files added later are not served
+    (tmp_path / 'later.txt').write_text('later')
+
+    return app.test_client()
+
+
+def test_static_files_cache_headers(client):
+    response = client.get('/assets/index-BxZ1a9_f.js')
+    assert response.data == b'console.log(1)'
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    response.close()
+
+    response = client.get('/map.geojson')
+    assert response.headers['Cache-Control'] == 'public, max-age=86400'
+
+    # revalidated with the ETag
+    etag = response.headers['ETag']
+    response.close()
+    response = client.get('/map.geojson', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    response.close()
+
+
+@pytest.mark.parametrize('path', ['', 'lobby/abc', 'later.txt'])
+def test_unknown_paths_get_index(client, path):
+    response = client.get(f'/{path}')
+    assert response.data == b'<html></html>'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    response.close()
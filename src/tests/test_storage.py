@@ -0,0 +1,107 @@
+import pytest
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app import create_app
+from app.extensions import storage
+from app.extensions.document_store import MemoryDatabase, SQLiteDatabase
+from app.models.order_of_play import order_of_play
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def db(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryDatabase()
+
+    return SQLiteDatabase(str(tmp_path / 'test.sqlite3'))
+
+
+def test_updates_and_projections(db):
+    db.session.insert_one({'session_id': 'a', 'version': 0,
+                           'game_state': {'version': 0, 'territories': {}}})
+
+    result = db.session.update_one(
+        {'session_id': 'a', 'game_state.version': {'$in': [0, None]}},
+        {'$set': {'game_state.territories.Germany': {'team': 1}},
+         '$inc': {'version': 1, 'game_state.version': 1}})
+    assert result.matched_count == 1
+
+    # the version moved on, so the same update no longer matches
+    result = db.session.update_one(
+        {'session_id': 'a', 'game_state.version': 0}, {'$inc': {'version': 1}})
+    assert result.matched_count == 0
+
+    assert db.session.find_one({'session_id': 'a'}, {'_id': 0, 'game_state.version': 1}) == {
+        'game_state': {'version': 1}}
+    assert db.session.find_one({'session_id': 'a'}, {'_id': 0, 'game_state': 0}) == {
+        'session_id': 'a', 'version': 1}
+
+    counter = db.session.find_one_and_update(
+        {'session_id': 'a'}, {'$inc': {'action_seq': 1}},
+        projection={'_id': 0, 'action_seq': 1}, return_document=ReturnDocument.AFTER)
+    assert counter == {'action_seq': 1}
+
+
+def test_sort_range_and_unique_index(db):
+    db.log.create_indexes([IndexModel([('session_id', ASCENDING), ('seq', ASCENDING)],
+                                      name='session_id_seq_unique', unique=True)])
+
+    for seq in [2, 3, 1]:
+        db.log.insert_one({'session_id': 'a', 'seq': seq})
+
+    with pytest.raises(DuplicateKeyError):
+        db.log.insert_one({'session_id': 'a', 'seq': 2})
+
+    found = db.log.find({'session_id': 'a', 'seq': {'$gt': 1}}, {'_id': 0},
+                        sort=[('seq', DESCENDING)])
+    assert [record['seq'] for record in found] == [3, 2]
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_bulk_update_stops_at_the_first_miss(backend, tmp_path):
+    app = create_app({'TESTING': True, 'STORAGE_BACKEND': backend,
+                      'SQLITE_PATH': str(tmp_path / 'test.sqlite3')})
+
+    with app.app_context():
+        storage.db.session.insert_one({'session_id': 'a', 'version': 0})
+        storage.db.game_state.insert_one({'session_id': 'a', 'version': 1})
+
+        # held writes of two commits, the game state was updated by another worker
+        assert not storage.bulk_update([
+            ('session', {'session_id': 'a', 'version': 0}, {'$inc': {'version': 1}}),
+            ('game_state', {'session_id': 'a', 'version': 0}, {'$inc': {'version': 1}}),
+            ('session', {'session_id': 'a', 'version': 1}, {'$inc': {'version': 1}}),
+            ('game_state', {'session_id': 'a', 'version': 1}, {'$inc': {'version': 1}}),
+        ])
+
+        # the writes after the miss were not sent
+        assert storage.db.session.find_one({'session_id': 'a'})['version'] == 1
+        assert storage.db.game_state.find_one({'session_id': 'a'})['version'] == 1
+
+
+@pytest.mark.parametrize('storage_mode', ['split', 'embedded'])
+@pytest.mark.parametrize('game_state_format', ['dict', 'compact'])
+def test_game_is_played_on_sqlite_backend(tmp_path, storage_mode, game_state_format):
+    app = create_app({'TESTING': True,
+                      'STORAGE_BACKEND': 'sqlite',
+                      'SQLITE_PATH': str(tmp_path / 'ava.sqlite3'),
+                      'GAME_STORAGE_MODE': storage_mode,
+                      'GAME_STATE_FORMAT': game_state_format})
+    client = app.test_client()
+
+    session_id = client.post('/session/create').json['session_id']
+
+    players = {}
+    for country in order_of_play:
+        response = client.post(f'/session/join/{session_id}',
+                               json={'countryName': country})
+        assert response.status_code == 201
+        players[country] = response.json['player']['player_id']
+
+    response = client.post(f'/game/{session_id}/endphase',
+                           query_string={'pid': players[order_of_play[0]]})
+    assert response.status_code == 200
+
+    response = client.get(f'/game/{session_id}')
+    assert response.status_code == 200
+    assert response.json['game_state']['version'] == 1
@@ -0,0 +1,105 @@
+from app.models.game_state import GameState
+from app.models.unit import Unit
+from app.models.unit_stacks import unstack_territory
+
+
+def new_stacked_game_state(storage_format='dict'):
+    game_state = GameState(session_id='test')
+    game_state.storage_format = storage_format
+    game_state.unit_stacks = True
+    return game_state
+
+
+def test_stacked_game_state_round_trips():
+    game_state = new_stacked_game_state()
+    transport = Unit(team=1, unit_type='TRANSPORT',
+                     cargo=[Unit(team=1, unit_type='INFANTRY')])
+    game_state.territories['Germany'].units.append(transport)
+
+    document = game_state.to_document()
+    germany = document['territories']['Germany']
+
+    # only the loaded transport is stored with its ID
+    assert [unit['unit_id'] for unit in germany['units']] == [transport.unit_id]
+    assert ['INFANTRY', 1, 1, 3] in germany['stacks']
+
+    loaded = GameState.from_dict(document)
+
+    assert loaded.unit_stacks
+    assert loaded.to_dict() == game_state.to_dict()
+
+
+def test_compact_stacked_game_state_round_trips():
+    game_state = new_stacked_game_state('compact')
+
+    loaded = GameState.from_dict(game_state.to_document())
+
+    assert loaded.to_dict() == game_state.to_dict()
+
+
+def test_units_in_battles_are_not_stacked():
+    game_state = GameState.from_dict(new_stacked_game_state().to_document())
+
+    fighter = next(unit for unit in game_state.territories['Germany'].units
+                   if unit.unit_type == 'FIGHTER')
+    game_state.add_battle(1, 'Eastern Europe', 'Germany',
+                          is_aa_attack=True, air_units=[fighter.to_dict()])
+
+    set_fields, _, _ = game_state.get_changes()
+
+    # the fighter moved from its stack to the individual units
+    assert set(set_fields) == {'battles', 'territories.Germany.units',
+                               'territories.Germany.stacks'}
+    assert [unit['unit_id'] for unit in set_fields['territories.Germany.units']] == [
+        fighter.unit_id]
+
+
+def test_unit_leaving_its_stack_keeps_a_unique_id():
+    game_state = new_stacked_game_state()
+    game_state.territories['Germany'].units.append(Unit(team=1, unit_type='FIGHTER'))
+    game_state = GameState.from_dict(game_state.to_document())
+
+    fighters = [unit for unit in game_state.territories['Germany'].units if unit.unit_type == 'FIGHTER']
+    assert len(fighters) == 2
+
+    # the first fighter of the stack flies into AA fire, the battle keeps its derived ID
+    fighter = fighters[0]
+    game_state.move_units_to('Eastern Europe', [fighter])
+    fighter.movement -= 1
+    game_state.add_battle(1, 'Eastern Europe', 'Germany',
+                          is_aa_attack=True, air_units=[fighter.to_dict()])
+
+    # a defender's roll keeps its unit's ID for the client
+    infantry = next(unit for unit in game_state.territories['Eastern Europe'].units
+                    if unit.unit_type == 'INFANTRY')
+    game_state.battles[0]['defender_rolls'] = [{'unit_id': infantry.unit_id, 'roll': 2, 'result': True}]
+
+    document = game_state.to_document()
+    loaded = GameState.from_dict(document)
+
+    unit_ids = [unit.unit_id for territory in loaded.territories.values() for unit in territory.units]
+    assert len(unit_ids) == len(set(unit_ids))
+
+    assert loaded.find_unit(fighter.unit_id)[1] == 'Eastern Europe'
+    assert loaded.find_unit(infantry.unit_id)[1] == 'Eastern Europe'
+    assert loaded.to_dict() == game_state.to_dict()
+
+    # a territory loaded on its own gets the same IDs
+    germany = unstack_territory('test', 'Germany', document['territories']['Germany'])
+    assert [unit['unit_id'] for unit in germany['units']] == [
+        unit.unit_id for unit in loaded.territories['Germany'].units]
+
+
+def test_compact_stacks_keep_skipped_positions():
+    game_state = new_stacked_game_state('compact')
+    game_state.territories['Germany'].units.append(Unit(team=1, unit_type='FIGHTER'))
+    game_state = GameState.from_dict(game_state.to_document())
+
+    fighter = next(unit for unit in game_state.territories['Germany'].units if unit.unit_type == 'FIGHTER')
+    game_state.move_units_to('Eastern Europe', [fighter])
+    game_state.add_battle(1, 'Eastern Europe', 'Germany',
+                          is_aa_attack=True, air_units=[fighter.to_dict()])
+
+    loaded = GameState.from_dict(game_state.to_document())
+
+    assert loaded.to_dict() == game_state.to_dict()
@@ -22,6 +22,9 @@ export const useWorldStore = defineStore("world", {
 		territories: {},
 		threeGlobeAndCountries: null,
 		battles: [],
+		// version of the game state last received, sent as base_version
+		// so mutations only return what changed
+		gameStateVersion: null,
 		sprites: {},
 		textureCache: new Map(),
 		materialCache: new Map(),
@@ -331,6 +334,10 @@ export const useWorldStore = defineStore("world", {
 			}
 		},
 		async updateGameWorld(gameState) {
+			if (gameState?.version !== undefined) {
+				this.gameStateVersion = gameState.version;
+			}
+
 			const newTerritories = gameState?.territories || this.territories;
 
 			// First pass: identify changed territories without expensive operations
@@ -410,6 +417,12 @@ export const useWorldStore = defineStore("world", {
 			// Apply visibility settings once at the end
 			this.toggleSpriteVisibility();
 		},
+		baseVersionQuery() {
+			// mutation responses then only hold the changed territories
+			return this.gameStateVersion === null
+				? ""
+				: `&base_version=${this.gameStateVersion}`;
+		},
 		handleApiError(error, defaultMessage = "An error occurred") {
 			const toastStore = useToastStore();
 			let errorMessage = defaultMessage;
@@ -439,7 +452,9 @@ export const useWorldStore = defineStore("world", {
 			try {
 				const response = await API.get(`/game/${this.getSessionId}`);
 
-				await this.updateGameWorld(response.data.game_state);
+				await this.updateGameWorld(
+					response.data.game_state ?? response.data.game_state_delta
+				);
 
 				// Initialize all sprites if this is the first load
 				if (Object.keys(this.sprites).length === 0) {
@@ -493,12 +508,14 @@ export const useWorldStore = defineStore("world", {
 				};
 
 				const response = await API.post(
-					`/game/${this.getSessionId}/mobilizeunits?pid=${playerId}`,
+					`/game/${this.getSessionId}/mobilizeunits?pid=${playerId}${this.baseVersionQuery()}`,
 					data
 				);
 
 				sessionStore.setSession(response.data.session);
-				await this.updateGameWorld(response.data.game_state);
+				await this.updateGameWorld(
+					response.data.game_state ?? response.data.game_state_delta
+				);
 
 				// Show success message
 				const toastStore = useToastStore();
@@ -525,11 +542,13 @@ export const useWorldStore = defineStore("world", {
 				};
 
 				const response = await API.post(
-					`/game/${this.getSessionId}/moveunits?pid=${playerId}`,
+					`/game/${this.getSessionId}/moveunits?pid=${playerId}${this.baseVersionQuery()}`,
 					data
 				);
 
-				await this.updateGameWorld(response.data.game_state);
+				await this.updateGameWorld(
+					response.data.game_state ?? response.data.game_state_delta
+				);
 			} catch (error) {
 				this.handleApiError(error, "Failed to move units");
 			} finally {
@@ -550,11 +569,13 @@ export const useWorldStore = defineStore("world", {
 				};
 
 				const response = await API.post(
-					`/game/${this.getSessionId}/loadtransport?pid=${playerId}`,
+					`/game/${this.getSessionId}/loadtransport?pid=${playerId}${this.baseVersionQuery()}`,
 					data
 				);
 
-				await this.updateGameWorld(response.data.game_state);
+				await this.updateGameWorld(
+					response.data.game_state ?? response.data.game_state_delta
+				);
 			} catch (error) {
 				this.handleApiError(error, "Failed to load transport");
 			} finally {
@@ -575,11 +596,13 @@ export const useWorldStore = defineStore("world", {
 				};
 
 				const response = await API.post(
-					`/game/${this.getSessionId}/unloadtransport?pid=${playerId}`,
+					`/game/${this.getSessionId}/unloadtransport?pid=${playerId}${this.baseVersionQuery()}`,
 					data
 				);
 
-				await this.updateGameWorld(response.data.game_state);
+				await this.updateGameWorld(
+					response.data.game_state ?? response.data.game_state_delta
+				);
 			} catch (error) {
 				this.handleApiError(error, "Failed to unload transport");
 			} finally {
@@ -597,11 +620,13 @@ export const useWorldStore = defineStore("world", {
 				};
 
 				const response = await API.post(
-					`/game/${this.getSessionId}/attack?pid=${playerId}`,
+					`/game/${this.getSessionId}/attack?pid=${playerId}${this.baseVersionQuery()}`,
 					data
 				);
 
-				await this.updateGameWorld(response.data.game_state);
+				await this.updateGameWorld(
+					response.data.game_state ?? response.data.game_state_delta
+				);
 			} catch (error) {
 				this.handleApiError(error, "Failed to attack");
 			} finally {
@@ -619,11 +644,13 @@ export const useWorldStore = defineStore("world", {
 				};
 
 				const response = await API.post(
-					`/game/${this.getSessionId}/retreat?pid=${playerId}`,
+					`/game/${this.getSessionId}/retreat?pid=${playerId}${this.baseVersionQuery()}`,
 					data
 				);
 
-				await this.updateGameWorld(response.data.game_state);
+				await this.updateGameWorld(
+					response.data.game_state ?? response.data.game_state_delta
+				);
 			} catch (error) {
 				this.handleApiError(error, "Failed to retreat");
 			} finally {
@@ -642,11 +669,13 @@ export const useWorldStore = defineStore("world", {
 				};
 
 				const response = await API.post(
-					`/game/${this.getSessionId}/casualties?pid=${playerId}`,
+					`/game/${this.getSessionId}/casualties?pid=${playerId}${this.baseVersionQuery()}`,
 					data
 				);
 
-				await this.updateGameWorld(response.data.game_state);
+				await this.updateGameWorld(
+					response.data.game_state ?? response.data.game_state_delta
+				);
 			} catch (error) {
 				this.handleApiError(error, "Failed to select casualties");
 			} finally {
@@ -664,7 +693,9 @@ export const useWorldStore = defineStore("world", {
 					`/game/${this.getSessionId}/undophase?pid=${playerId}`
 				);
 
-				await this.updateGameWorld(response.data.game_state);
+				await this.updateGameWorld(
+					response.data.game_state ?? response.data.game_state_delta
+				);
 			} catch (error) {
 				this.handleApiError(error, "Failed to undo phase");
 			} finally {
@@ -700,11 +731,13 @@ export const useWorldStore = defineStore("world", {
 				const playerId = sessionStore.getPlayerId;
 
 				const response = await API.post(
-					`/game/${this.getSessionId}/endturn?pid=${playerId}`
+					`/game/${this.getSessionId}/endturn?pid=${playerId}${this.baseVersionQuery()}`
 				);
 
 				sessionStore.setSession(response.data.session);
-				await this.updateGameWorld(response.data.game_state);
+				await this.updateGameWorld(
+					response.data.game_state ?? response.data.game_state_delta
+				);
 			} catch (error) {
 				this.handleApiError(error, "Failed to end turn");
 			} finally {